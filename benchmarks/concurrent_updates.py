@@ -0,0 +1,97 @@
+"""Нагрузочный тест: последовательная обработка апдейтов против OrderedApplication.
+
+Обработчик имитирует обычные ответы (--fast-ms) и долгую загрузку страницы
+преподавателя (--slow-ms, доля --slow-share). Проверяется и пропускная
+способность, и то, что апдейты одного чата не обгоняют друг друга.
+
+    python -m benchmarks.concurrent_updates --chats 50 --per-chat 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from telegram import Update
+from telegram.ext import ApplicationBuilder, TypeHandler
+from scr.bot.concurrency import MAX_PENDING_UPDATES, OrderedApplication
+from benchmarks.webhook_vs_polling import FakeBotAPI
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": "⬅ Назад",
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+        },
+    }, None)
+
+
+async def run(concurrent: bool, chats: int, per_chat: int, fast: float, slow: float, slow_share: float):
+    builder = ApplicationBuilder().token("1:bench").request(FakeBotAPI(0))
+    if concurrent:
+        builder = builder.application_class(OrderedApplication).concurrent_updates(MAX_PENDING_UPDATES)
+    app = builder.build()
+
+    rng = random.Random(42)
+    total = chats * per_chat
+    created, latencies, last_seen = {}, [], {}
+    reordered = 0
+    done = asyncio.Event()
+
+    async def handle(update: Update, context):
+        nonlocal reordered
+        await asyncio.sleep(slow if rng.random() < slow_share else fast)
+        chat_id = update.effective_chat.id
+        if last_seen.get(chat_id, 0) > update.update_id:
+            reordered += 1
+        last_seen[chat_id] = update.update_id
+        latencies.append(time.perf_counter() - created[update.update_id])
+        if len(latencies) == total:
+            done.set()
+
+    app.add_handler(TypeHandler(Update, handle))
+    await app.initialize()
+    await app.start()
+
+    started = time.perf_counter()
+    update_id = 0
+    for _ in range(per_chat):
+        for chat_id in range(1, chats + 1):
+            update_id += 1
+            created[update_id] = time.perf_counter()
+            await app.update_queue.put(make_update(update_id, chat_id))
+
+    await asyncio.wait_for(done.wait(), timeout=600)
+    elapsed = time.perf_counter() - started
+    await app.stop()
+    await app.shutdown()
+
+    latencies.sort()
+    return {
+        "mode": "concurrent" if concurrent else "sequential",
+        "throughput": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "reordered": reordered,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--per-chat", type=int, default=10)
+    parser.add_argument("--fast-ms", type=float, default=5)
+    parser.add_argument("--slow-ms", type=float, default=300)
+    parser.add_argument("--slow-share", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'Режим':<12}{'апд/с':>10}{'p50, мс':>10}{'p95, мс':>10}{'не по порядку':>15}")
+    for concurrent in (False, True):
+        r = await run(concurrent, args.chats, args.per_chat, args.fast_ms / 1000, args.slow_ms / 1000, args.slow_share)
+        print(f"{r['mode']:<12}{r['throughput']:>10.0f}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['reordered']:>15}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
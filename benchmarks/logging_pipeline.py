@@ -0,0 +1,103 @@
+"""Нагрузочный тест: задержка обработчиков при логгировании напрямую и через очередь.
+
+Режимы: off (логгирование выключено), sync (StreamHandler и RotatingFileHandler
+пишут прямо из loop, как раньше), queue (BoundedQueueHandler + QueueListener).
+Консоль и warning.log пишутся во временный каталог; --slow-io-ms добавляет задержку
+на каждую запись в консоль (медленный терминал, journald, переполненный pipe).
+
+    python -m benchmarks.logging_pipeline --handlers 2000 --slow-io-ms 0.2
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from scr.core import logger as bot_logger
+
+
+class SlowStream:
+    """Файл, каждая запись в который занимает не меньше delay секунд"""
+
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+async def handler(log, i: int, latencies: list):
+    start = time.perf_counter()
+    log.info(f"✅ user{i} ({i}) запросил расписание на сегодня.")
+    await asyncio.sleep(0)
+    log.info("Используется кэш расписания (TTLCache).")
+    if i % 20 == 0:
+        try:
+            raise ValueError("ошибка разбора")
+        except ValueError:
+            log.warning(f"❌ user{i} ({i}) ошибка обработки", exc_info=True)
+    latencies.append(time.perf_counter() - start)
+
+
+async def run(handlers: int, concurrency: int):
+    log = logging.getLogger("bot")
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            await handler(log, i, latencies)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(handlers)))
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies
+
+
+def report(mode: str, elapsed: float, latencies: list):
+    latencies = sorted(latencies)
+    q = statistics.quantiles(latencies, n=100)
+    print(
+        f"{mode:>5}: {len(latencies) / elapsed:8.0f} обработчиков/с | "
+        f"p50 {q[49] * 1000:.3f} мс | p95 {q[94] * 1000:.3f} мс | p99 {q[98] * 1000:.3f} мс | "
+        f"max {latencies[-1] * 1000:.3f} мс"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--handlers", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--slow-io-ms", type=float, default=0.2)
+    args = parser.parse_args()
+
+    real_stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as tmp:
+        bot_logger.LOG_FILE = Path(tmp) / "warning.log"
+        console = open(Path(tmp) / "console.log", "w", encoding="utf-8")
+        for mode in ("off", "sync", "queue"):
+            sys.stdout = SlowStream(console, args.slow_io_ms / 1000)
+            bot_logger.setup_logger(queued=mode == "queue")
+            logging.disable(logging.CRITICAL if mode == "off" else logging.NOTSET)
+            try:
+                elapsed, latencies = asyncio.run(run(args.handlers, args.concurrency))
+            finally:
+                logging.disable(logging.NOTSET)
+                for handler in logging.root.handlers[:]:
+                    handler.close()  # для queue — дожидаемся записи очереди
+                    logging.root.removeHandler(handler)
+                sys.stdout = real_stdout
+            report(mode, elapsed, latencies)
+        console.close()
+
+
+if __name__ == "__main__":
+    main()
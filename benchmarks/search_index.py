@@ -0,0 +1,119 @@
+"""Нагрузочный тест /search: линейный просмотр расписания против инвертированного индекса.
+
+Синтетическое расписание из --lessons пар и --teachers преподавателей; для обоих
+способов замеряется время одного запроса, для индекса — ещё и время построения.
+Отдельно — нечёткий поиск (триграммы) по запросам с опечатками и латиницей.
+
+    python -m benchmarks.search_index --lessons 100000 --teachers 5000
+"""
+import argparse
+import random
+import statistics
+import time
+from scr.parsers.search_index import SearchIndex, schedule_documents, teacher_documents, expand_query
+
+SUBJECTS = [
+    "Математический анализ", "Физика", "Программирование", "Базы данных", "История",
+    "Философия", "Иностранный язык", "Физическая культура", "Теория вероятностей",
+    "Дискретная математика", "Электротехника", "Экономика", "Сопротивление материалов",
+]
+KINDS = ["Лекция", "Практика", "Лабораторная работа"]
+SURNAME_ROOTS = ["Иван", "Петр", "Сидор", "Кузнец", "Смирн", "Поп", "Волк", "Сокол", "Лебед", "Морозк", "Орл", "Гусе"]
+SURNAME_ENDINGS = ["ов", "ин", "ев", "овский", "енко"]
+NAMES = ["Пётр", "Анна", "Олег", "Мария", "Сергей", "Елена", "Дмитрий", "Ольга"]
+QUERIES = ["матем", "физ", "иванов", "лекция", "базы данных", "соколов практика", "л-301", "нет такого"]
+FUZZY_QUERIES = ["иваов", "матан", "физ-ра", "kuznetsov", "програмирование", "сакалов лекция"]
+
+
+def make_dataset(lessons: int, teachers: int, seed: int = 42):
+    rng = random.Random(seed)
+    teacher_names = [
+        f"{rng.choice(SURNAME_ROOTS)}{rng.choice(SURNAME_ENDINGS)} {rng.choice(NAMES)} {rng.choice(NAMES)}ович"
+        for _ in range(teachers)
+    ]
+    schedule = {"week_1": {}, "week_2": {}, "session": {}}
+    for i in range(lessons):
+        week = ("week_1", "week_2", "session")[i % 3]
+        day = f"День {i % 97}"
+        info = (
+            f"{rng.choice(SUBJECTS)} ({rng.choice(KINDS)})\n"
+            f"{rng.choice(teacher_names)}\n"
+            f"ауд. {rng.choice('ЛНП')}-{rng.randint(100, 520)}"
+        )
+        schedule[week].setdefault(day, []).append({"time": "08:00-09:30", "info": info, "subgroup": None})
+    return schedule, {str(i): {"name": name} for i, name in enumerate(teacher_names)}
+
+
+def linear_search(schedule, teachers, query: str) -> list:
+    """Прежний алгоритм search_command: подстрока по каждой паре и каждому преподавателю"""
+    query = query.lower()
+    results = []
+    for week_key in ("week_1", "week_2", "session"):
+        for day, lessons in schedule[week_key].items():
+            for lesson in lessons:
+                if query in lesson["info"].lower():
+                    results.append(lesson)
+    for tid, teacher in teachers.items():
+        if query in teacher["name"].lower():
+            results.append(tid)
+    return results
+
+
+def timeit(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lessons", type=int, default=100_000)
+    parser.add_argument("--teachers", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    schedule, teachers = make_dataset(args.lessons, args.teachers)
+
+    start = time.perf_counter()
+    lessons_index = SearchIndex(*schedule_documents(schedule))
+    teachers_index = SearchIndex(*teacher_documents(teachers))
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"Построение индекса: {build_ms:.0f} мс, токенов {len(lessons_index.tokens) + len(teachers_index.tokens)}")
+
+    print(f"{'запрос':<20} {'линейно, мс':>12} {'индекс, мс':>11} {'найдено':>8}")
+    for query in QUERIES:
+        linear = timeit(lambda: linear_search(schedule, teachers, query), args.repeat)
+        indexed = timeit(lambda: lessons_index.search(query) + teachers_index.search(query), args.repeat)
+        found = len(lessons_index.search(query)) + len(teachers_index.search(query))
+        print(f"{query:<20} {linear:>12.2f} {indexed:>11.3f} {found:>8}")
+
+    print(f"\n{'нечёткий запрос':<20} {'мс':>12} {'способ':>10}  лучший результат")
+    for query in FUZZY_QUERIES:
+        expanded = expand_query(query)
+
+        def search():
+            # порядок как в search_command: с раскрытыми сокращениями, как есть, нечёткий
+            found = lessons_index.search(expanded) + teachers_index.search(expanded)
+            if found:
+                return "раскрытый", found
+            found = lessons_index.search(query) + teachers_index.search(query)
+            if found:
+                return "точный", found
+            ranked = sorted(
+                lessons_index.fuzzy_search(expanded) + teachers_index.fuzzy_search(expanded),
+                key=lambda match: match[0], reverse=True,
+            )
+            return "нечёткий", [doc for _, doc in ranked]
+
+        elapsed = timeit(search, args.repeat)
+        mode, found = search()
+        best = found[0] if found else {}
+        title = (best.get("info") or best.get("name") or "—").split("\n")[0]
+        print(f"{query:<20} {elapsed:>12.3f} {mode:>10}  {title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Нагрузочный тест приёма апдейтов: long polling против webhook.
+
+Сеть до Telegram заменена фейковым Bot API с задержкой --rtt, поэтому тест
+запускается локально и без токена. Апдейты приходят с частотой --rate,
+для каждого меряется время от появления в "Telegram" до вызова обработчика.
+
+    python -m benchmarks.webhook_vs_polling --updates 2000 --rate 200 --rtt 60
+"""
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import time
+import httpx
+from telegram import Update
+from telegram.ext import ApplicationBuilder, TypeHandler
+from telegram.request import BaseRequest
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+SECRET = "bench-secret"
+
+
+class FakeBotAPI(BaseRequest):
+    """Bot API в памяти: getUpdates отдаёт накопленные апдейты, остальное — ok"""
+
+    def __init__(self, rtt: float):
+        self.half_rtt = rtt / 2
+        self.pending = []
+        self.arrived = asyncio.Event()
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def push(self, update: dict):
+        self.pending.append(update)
+        self.arrived.set()
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        await asyncio.sleep(self.half_rtt)
+
+        if api_method == "getMe":
+            result = BOT_USER
+        elif api_method == "getUpdates":
+            offset = params.get("offset") or 0
+            self.pending = [u for u in self.pending if u["update_id"] >= offset]
+            if not self.pending:
+                self.arrived.clear()
+                try:
+                    await asyncio.wait_for(self.arrived.wait(), timeout=params.get("timeout") or 0)
+                except asyncio.TimeoutError:
+                    pass
+            result = list(self.pending[:100])
+        else:
+            result = True
+
+        await asyncio.sleep(self.half_rtt)
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def make_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": "/start",
+            "chat": {"id": update_id % 50, "type": "private"},
+            "from": {"id": update_id % 50, "is_bot": False, "first_name": "User"},
+        },
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run(mode: str, updates: int, rate: float, rtt: float, handler_ms: float):
+    api = FakeBotAPI(rtt)
+    created, latencies = {}, []
+    done = asyncio.Event()
+
+    async def handle(update: Update, context):
+        await asyncio.sleep(handler_ms / 1000)
+        latencies.append(time.perf_counter() - created[update.update_id])
+        if len(latencies) == updates:
+            done.set()
+
+    app = ApplicationBuilder().token("1:bench").request(api).get_updates_request(api).build()
+    app.add_handler(TypeHandler(Update, handle))
+    await app.initialize()
+
+    port = free_port()
+    if mode == "polling":
+        await app.updater.start_polling(poll_interval=0, timeout=10)
+    else:
+        await app.updater.start_webhook(
+            listen="127.0.0.1", port=port, url_path="bench",
+            webhook_url=f"http://127.0.0.1:{port}/bench", secret_token=SECRET,
+        )
+    await app.start()
+
+    # Telegram доставляет webhook-запросы параллельно, не больше max_connections (40)
+    connections = asyncio.Semaphore(40)
+    client = httpx.AsyncClient(limits=httpx.Limits(max_connections=40))
+
+    async def deliver(update: dict):
+        async with connections:
+            await asyncio.sleep(rtt / 2)
+            await client.post(
+                f"http://127.0.0.1:{port}/bench", json=update,
+                headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+            )
+
+    started = time.perf_counter()
+    tasks = []
+    for update_id in range(1, updates + 1):
+        update = make_update(update_id)
+        created[update_id] = time.perf_counter()
+        if mode == "polling":
+            api.push(update)
+        else:
+            tasks.append(asyncio.create_task(deliver(update)))
+        await asyncio.sleep(1 / rate)
+
+    await asyncio.wait_for(done.wait(), timeout=120)
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*tasks)
+    await client.aclose()
+
+    await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "throughput": updates / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=200, help="апдейтов в секунду")
+    parser.add_argument("--rtt", type=float, default=60, help="RTT до Telegram, мс")
+    parser.add_argument("--handler-ms", type=float, default=2, help="время работы обработчика, мс")
+    args = parser.parse_args()
+
+    print(f"{'Режим':<10}{'апд/с':>10}{'p50, мс':>10}{'p95, мс':>10}")
+    for mode in ("polling", "webhook"):
+        result = await run(mode, args.updates, args.rate, args.rtt / 1000, args.handler_ms)
+        print(f"{result['mode']:<10}{result['throughput']:>10.0f}{result['p50']:>10.1f}{result['p95']:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -25,13 +25,13 @@ def print_startup_messages():
     print(Colorate.Vertical(Colors.red_to_yellow, Center.XCenter(ascii_art)))
 
 def run_flask_in_thread():
-    from scr.admin_panel.app import app, SSL_CERT, SSL_KEY
+    from scr.admin_panel.app import app
+    from scr.core.settings import resolve_ssl_files
     
-    cert_path = SSL_CERT if os.path.isabs(SSL_CERT) else os.path.join(os.getcwd(), SSL_CERT)
-    key_path = SSL_KEY if os.path.isabs(SSL_KEY) else os.path.join(os.getcwd(), SSL_KEY)
+    ssl_files = resolve_ssl_files()
     
-    if os.path.exists(cert_path) and os.path.exists(key_path):
-        ssl_context = (SSL_CERT, SSL_KEY)
+    if ssl_files:
+        ssl_context = ssl_files
         print("🔐 SSL включён. Панель будет доступна по HTTPS.")
     else:
         ssl_context = None
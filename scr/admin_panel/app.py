@@ -1,27 +1,33 @@
 import os
+import hmac
 import json
 import asyncio
 import time
 import pyotp
 import qrcode
 import io
-import inspect
-import requests
+import itertools
 from functools import wraps
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-from flask import Flask, render_template, redirect, url_for, request, flash, session, send_file
+from typing import Dict, Any
+from flask import Flask, render_template, redirect, url_for, request, flash, session, send_file, jsonify
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_wtf import CSRFProtect
 from dotenv import load_dotenv
 from .forms import LoginForm, TwoFAForm
 import socket
-from scr.core.settings import PANEL_USER, PANEL_PASS, FLASK_SECRET, SSL_CERT, SSL_KEY, TOKEN
+from scr.core.settings import PANEL_USER, PANEL_PASS, FLASK_SECRET, SSL_CERT, SSL_KEY, METRICS_TOKEN
 from scr.core.logger import logger
-from scr.parsers.schedule_parser import fetch_schedule, schedule_cache
-from scr.parsers.teacher_parser import fetch_teachers, teachers_cache
-from scr.core.users import load_allowed_users
+from scr.core.logtail import tail
+from scr.parsers import schedule_parser, teacher_parser
+from scr.parsers.telemetry import recent_fetches
+from scr.core.loop_monitor import watchdog
+from scr.bot.broadcasts import broadcast_manager, format_progress
+from scr.core.users import load_allowed_users, save_allowed_users
+from scr.core.stats import stats_manager
+from scr.core.metrics import registry, process_rss_bytes
+from scr.bot.instrumentation import latency_summary
 from scr.bot import bot_app
 
 # ----- Настройки из окружения -----
@@ -53,8 +59,6 @@ if missing:
 
 # Пути к файлам проекта
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
-USERS_FILE = os.path.join(PROJECT_ROOT, "allowed_users.json")
-STATS_FILE = os.path.join(PROJECT_ROOT, "stats.json")
 LOG_FILE   = os.path.join(PROJECT_ROOT, "warning.log")
 TWOFA_FILE = os.path.join(PROJECT_ROOT, "2fa_status.json")
 
@@ -78,44 +82,33 @@ csrf = CSRFProtect(app)
 # Ограничитель запросов (anti-bruteforce)
 limiter = Limiter(get_remote_address, app=app, default_limits=["10 per minute"])
 
-# ----- Глобальные ссылки на бота -----
-application = None
-bot_loop: Optional[asyncio.AbstractEventLoop] = None
+# Эндпоинты, которые опрашиваются скриптами: без flash-предупреждений
+NO_FLASH_ENDPOINTS = {"metrics_endpoint", "broadcast_status", "task_status"}
 
 @app.before_request
 def warn_if_not_https():
+    if request.endpoint in NO_FLASH_ENDPOINTS:
+        return
     if not request.is_secure:
         flash("⚠️ Соединение не защищено! Используйте HTTPS", "danger")
 
-# --- корутины для вызова из Flask ---
+# --- корутины для вызова из Flask (выполняются в loop бота) ---
 async def _reload_coro(application):
-    try:
-        schedule_cache.clear()
-        await fetch_schedule(application)
-        logger.warning("✅ Перезагрузка расписания завершена через Flask")
-    except Exception as e:
-        logger.error(f"Ошибка при reload: {e}")
+    version = schedule_parser.schedule_version
+    await schedule_parser.fetch_schedule(application, force=True)
+    if schedule_parser.schedule_version == version:
+        raise RuntimeError("расписание не загружено, в кэше оставлены прежние данные")
+    logger.warning("✅ Перезагрузка расписания завершена через Flask")
+    return f"Расписание обновлено (версия {schedule_parser.schedule_version})"
 
 async def _fullreload_coro(application):
-    try:
-        schedule_cache.clear()
-        teachers_cache.clear()
-        await fetch_schedule(application)
-        await fetch_teachers(application)
-        logger.warning("✅ Полная перезагрузка завершена через Flask")
-    except Exception as e:
-        logger.error(f"Ошибка при fullreload: {e}")
-
-async def _broadcast_coro(application, text, users_data):
-    ok, fail = 0, 0
-    for uid in users_data.keys():
-        try:
-            await application.bot.send_message(chat_id=int(uid), text=f"🔔 {text}")
-            ok += 1
-        except Exception as e:
-            logger.error(f"Ошибка рассылки для {uid}: {e}")
-            fail += 1
-    return ok, fail
+    result = await _reload_coro(application)
+    version = teacher_parser.teachers_version
+    await teacher_parser.fetch_teachers(application, force=True)
+    if teacher_parser.teachers_version == version:
+        raise RuntimeError("список преподавателей не загружен, в кэше оставлены прежние данные")
+    logger.warning("✅ Полная перезагрузка завершена через Flask")
+    return f"{result}, преподаватели обновлены (версия {teacher_parser.teachers_version})"
 
 # ================== УТИЛИТЫ ==================
 def login_required(f):
@@ -144,56 +137,83 @@ def write_json(path: str, data: Any) -> None:
         raise
 
 def load_users() -> Dict[str, Dict[str, str]]:
-    data = read_json(USERS_FILE, {})
+    # load_allowed_users сам выбирает хранилище (JSON или SQLite)
+    raw = load_allowed_users().get("users", {})
     users = {}
+    legacy = False
 
-    if isinstance(data, dict) and "users" in data:
-        raw = data["users"]
-        for uid, val in raw.items():
-            if isinstance(val, dict):
-                users[uid] = {"role": val.get("role", "user"), "username": val.get("username", "")}
-            else:
-                # старый формат: uid: role
-                users[uid] = {"role": str(val), "username": ""}
-    elif isinstance(data, dict):
-        # если весь файл старый формат {id: role}
-        for uid, val in data.items():
+    for uid, val in raw.items():
+        if isinstance(val, dict):
+            users[uid] = {"role": val.get("role", "user"), "username": val.get("username") or ""}
+        else:
+            # старый формат: uid: role
             users[uid] = {"role": str(val), "username": ""}
+            legacy = True
 
     # перезаписываем в новом формате
-    if users:
+    if legacy:
         save_users(users)
 
     return users
 
 
 def save_users(users: Dict[str, Dict[str, str]]) -> None:
-    write_json(USERS_FILE, {"users": users})
+    save_allowed_users({"users": users})
 
 def load_stats() -> Dict[str, Any]:
-    data = read_json(STATS_FILE, {})
-    return data if isinstance(data, dict) else {}
+    # Панель работает в том же процессе, что и бот, — берём статистику из памяти
+    return stats_manager.snapshot()
 
-def tail_log(path: str, max_lines: int = 500) -> str:
-    if not os.path.exists(path):
-        return ""
+def tail_log(path: str, max_lines: int = 500, level: str = None, contains: str = None) -> str:
+    """Последние строки лога, новые сверху (файл читается с конца)"""
     try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            lines = f.readlines()
-        last_lines = lines[-max_lines:]
-        return "".join(reversed(last_lines))
+        return "\n".join(reversed(tail(path, max_lines, level, contains)))
     except Exception as e:
         return f"Ошибка чтения лога: {e}"
 
-def schedule_coro(coro, retries: int = 10, delay: float = 0.5) -> None:
-    global bot_loop
+def schedule_coro(coro, retries: int = 10, delay: float = 0.5):
+    """Запускает корутину в loop бота (бот и панель работают в одном процессе)"""
     for _ in range(retries):
-        if bot_loop is not None and bot_loop.is_running():
-            asyncio.run_coroutine_threadsafe(coro, bot_loop)
-            return
+        loop = bot_app.bot_loop
+        if loop is not None and loop.is_running():
+            return asyncio.run_coroutine_threadsafe(coro, loop)
         time.sleep(delay)
+    coro.close()
     raise RuntimeError("Loop бота недоступен")
 
+# Фоновые задачи панели: id -> {"id", "name", "started", "future"}
+TASKS_KEEP = 20
+panel_tasks = {}
+_task_ids = itertools.count(1)
+
+def submit_task(name: str, coro) -> int:
+    """Отправляет корутину в loop бота и сразу возвращает id задачи"""
+    future = schedule_coro(coro)
+    task_id = next(_task_ids)
+    panel_tasks[task_id] = {
+        "id": task_id,
+        "name": name,
+        "started": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "future": future,
+    }
+    while len(panel_tasks) > TASKS_KEEP:
+        panel_tasks.pop(next(iter(panel_tasks)))
+    return task_id
+
+def _task_view(task: dict) -> dict:
+    """Состояние задачи для страницы и JSON"""
+    future = task["future"]
+    status, result = "running", ""
+    if future.cancelled():
+        status = "cancelled"
+    elif future.done():
+        error = future.exception()
+        if error is not None:
+            status, result = "error", str(error)
+        else:
+            status, result = "done", future.result() or ""
+    return {"id": task["id"], "name": task["name"], "started": task["started"], "status": status, "result": result}
+
 # ================== АВТОРИЗАЦИЯ ==================
 def check_login(username: str, password: str) -> bool:
     return username.strip() == PANEL_USER and password.strip() == PANEL_PASS
@@ -217,8 +237,8 @@ def login():
 
             # ✅ Успешный вход
             try:
-                if OWNER_ID and application:
-                    schedule_coro(application.bot.send_message(
+                if OWNER_ID and bot_app.bot_app:
+                    schedule_coro(bot_app.bot_app.bot.send_message(
                         chat_id=int(OWNER_ID),
                         text=(
                             "✅ Успешный вход в панель.\n"
@@ -235,8 +255,8 @@ def login():
         else:
             # ❗️ Ошибка входа
             try:
-                if OWNER_ID and application:
-                    schedule_coro(application.bot.send_message(
+                if OWNER_ID and bot_app.bot_app:
+                    schedule_coro(bot_app.bot_app.bot.send_message(
                         chat_id=int(OWNER_ID),
                         text=(
                             "❗️ Ошибка входа в панель.\n"
@@ -258,17 +278,9 @@ def login():
 @login_required
 def index():
     stats = load_stats()
-    unique_users = stats.get("unique_users")
-    if isinstance(unique_users, (list, dict)):
-        uniq_count = len(unique_users)
-    else:
-        try:
-            uniq_count = int(unique_users)
-        except Exception:
-            uniq_count = 0
 
     totals = {
-        "unique_users_count": uniq_count,
+        "unique_users_count": stats_manager.unique_users_count(),
         "total_messages": stats.get("total_messages", 0),
         "schedule_requests": stats.get("schedule_requests", 0),
         "commands_executed": stats.get("commands_executed", 0),
@@ -282,7 +294,8 @@ def index():
         totals=totals,
         peak_usage=stats.get("peak_usage", {}),
         commands_per_user=stats.get("commands_per_user", {}),
-        daily_active_users=stats.get("daily_active_users", {}),
+        activity=stats_manager.rollups(),
+        estimate_error=stats_manager.estimate_error,
     )
 
 @app.route("/logout")
@@ -372,16 +385,72 @@ def users_delete(user_id: str):
 @app.route("/logs")
 @login_required
 def logs_page():
-    data = tail_log(LOG_FILE, 80000)
+    lines = min(request.args.get("lines", 2000, type=int), 20000)
+    level = request.args.get("level") or None
+    query = (request.args.get("q") or "").strip()
+    data = tail_log(LOG_FILE, lines, level, query or None)
     if request.args.get("ajax"):
         return data
-    return render_template("logs.html", logs=data)
+    return render_template("logs.html", logs=data, lines=lines, level=level or "", query=query)
+
+# ================== PERFORMANCE ==================
+@app.route("/perf")
+@login_required
+def perf_page():
+    summary = latency_summary()
+    fetches = recent_fetches()
+    loop_blocks = list(watchdog.recent_blocks)[::-1]
+    if request.args.get("json"):
+        return jsonify({"handlers": summary, "fetches": fetches, "loop_blocks": loop_blocks})
+    return render_template(
+        "perf.html",
+        summary=summary,
+        phases=["auth", "fetch", "render", "send"],
+        schedule_fetches=[r for r in fetches if r["target"] == "schedule"],
+        last_fetches=fetches[-20:][::-1],
+        loop_blocks=loop_blocks,
+    )
+
+# ================== PROMETHEUS ==================
+def _metrics_authorized() -> bool:
+    """Bearer-токен из заголовка или ?token=, сравнение за постоянное время"""
+    auth = request.headers.get("Authorization", "")
+    token = auth[7:] if auth.startswith("Bearer ") else request.args.get("token", "")
+    return hmac.compare_digest(token.encode("utf-8"), METRICS_TOKEN.encode("utf-8"))
+
+@app.route("/metrics")
+@limiter.limit("60 per minute")
+def metrics_endpoint():
+    if not METRICS_TOKEN:
+        return "metrics disabled", 404
+    if not _metrics_authorized():
+        return "unauthorized", 401
+
+    # размеры кэшей и память снимаем в момент запроса, остальное уже в реестре
+    registry.gauge("cache_entries", cache="schedule").set(len(schedule_parser.schedule_cache))
+    registry.gauge("cache_entries", cache="teachers").set(len(teacher_parser.teachers_cache))
+    rss = process_rss_bytes()
+    if rss is not None:
+        registry.gauge("process_resident_memory_bytes").set(rss)
+
+    return registry.render_prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
 
 # ================== CONTROL ==================
 @app.route("/control", methods=["GET"])
 @login_required
 def control_page():
-    return render_template("control.html")
+    jobs = sorted(broadcast_manager.jobs.values(), key=lambda job: job["id"], reverse=True)[:10]
+    tasks = [_task_view(task) for task in reversed(list(panel_tasks.values()))]
+    return render_template("control.html", jobs=jobs, tasks=tasks)
+
+@app.route("/control/tasks/<int:task_id>")
+@login_required
+@limiter.limit("60 per minute")
+def task_status(task_id):
+    task = panel_tasks.get(task_id)
+    if task is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(_task_view(task))
 
 @app.route("/control/reset2fa", methods=["POST"])
 @login_required
@@ -397,25 +466,16 @@ def action_reset2fa():
 @app.route("/control/reload", methods=["POST"])
 @login_required
 def action_reload():
+    # Загрузка идёт в loop бота: кэш заменяется целиком, когда новое расписание готово
     try:
-        from scr.parsers.schedule_parser import fetch_schedule, schedule_cache
-        # Очистим кэш (безопасно)
-        try:
-            schedule_cache.clear()
-        except Exception:
-            pass
-
-        # Если fetch_schedule - корутина, запускаем в свежем loop, иначе вызываем напрямую
-        if inspect.iscoroutinefunction(fetch_schedule):
-            asyncio.run(fetch_schedule(None))
-        else:
-            fetch_schedule(None)
-
-        logger.warning("Перезагрузка расписания через панель выполнена")
-        flash("✅ Перезагрузка расписания выполнена", "success")
-    except Exception as e:
+        task_id = submit_task("Перезагрузка расписания", _reload_coro(bot_app.bot_app))
+    except RuntimeError as e:
         logger.error(f"Не удалось вызвать reload: {e}")
         flash(f"❌ Ошибка: {e}", "danger")
+        return redirect(url_for("control_page"))
+
+    logger.warning(f"Перезагрузка расписания запущена через панель (задача #{task_id})")
+    flash(f"⏳ Перезагрузка расписания запущена (задача #{task_id})", "success")
     return redirect(url_for("control_page"))
 
 
@@ -423,34 +483,14 @@ def action_reload():
 @login_required
 def action_fullreload():
     try:
-        from scr.parsers.schedule_parser import fetch_schedule, schedule_cache
-        from scr.parsers.teacher_parser import fetch_teachers, teachers_cache
-
-        try:
-            schedule_cache.clear()
-        except Exception:
-            pass
-        try:
-            teachers_cache.clear()
-        except Exception:
-            pass
-
-        # Запускаем по порядку
-        if inspect.iscoroutinefunction(fetch_schedule):
-            asyncio.run(fetch_schedule(None))
-        else:
-            fetch_schedule(None)
-
-        if inspect.iscoroutinefunction(fetch_teachers):
-            asyncio.run(fetch_teachers(None))
-        else:
-            fetch_teachers(None)
-
-        logger.warning("Полная перезагрузка через панель выполнена")
-        flash("✅ Полная перезагрузка выполнена", "success")
-    except Exception as e:
+        task_id = submit_task("Полная перезагрузка", _fullreload_coro(bot_app.bot_app))
+    except RuntimeError as e:
         logger.error(f"Не удалось вызвать fullreload: {e}")
         flash(f"❌ Ошибка: {e}", "danger")
+        return redirect(url_for("control_page"))
+
+    logger.warning(f"Полная перезагрузка запущена через панель (задача #{task_id})")
+    flash(f"⏳ Полная перезагрузка запущена (задача #{task_id})", "success")
     return redirect(url_for("control_page"))
 
 
@@ -467,25 +507,72 @@ def action_broadcast():
         flash("Нет пользователей для рассылки", "warning")
         return redirect(url_for("control_page"))
 
-    ok, fail = 0, 0
-    for uid in list(users_data.keys()):
-        try:
-            # Простой HTTP-запрос к Telegram Bot API (синхронно, без loop'а)
-            resp = requests.post(
-                f"https://api.telegram.org/bot{TOKEN}/sendMessage",
-                data={"chat_id": str(uid), "text": f"🔔 {text}"}
-            )
-            if resp.ok:
-                ok += 1
-            else:
-                fail += 1
-        except Exception as e:
-            logger.error(f"Ошибка при отправке {uid}: {e}")
-            fail += 1
-
-    logger.warning(f"Рассылка завершена через панель. Успех: {ok}, Ошибки: {fail}")
-    flash(f"✅ Рассылка завершена. Успех: {ok}, Ошибки: {fail}", "success")
-    return redirect(url_for("control_page"))
+    try:
+        job = broadcast_manager.submit_threadsafe(f"🔔 {text}", list(users_data.keys()), created_by="panel")
+    except RuntimeError as e:
+        flash(f"❌ Рассылка не запущена: {e}", "danger")
+        return redirect(url_for("control_page"))
+
+    logger.warning(f"Рассылка #{job['id']} запущена через панель ({len(job['recipients'])} получателей)")
+    flash(f"✅ Рассылка #{job['id']} запущена: {len(job['recipients'])} получателей", "success")
+    return redirect(url_for("broadcast_page", job_id=job["id"]))
+
+
+def _job_view(job: dict) -> dict:
+    """Состояние рассылки для страницы и JSON (без списка получателей)"""
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "total": len(job["recipients"]),
+        "sent": job["cursor"],
+        "ok": job["ok"],
+        "failed": job["failed"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+        "text": job["text"],
+        "summary": format_progress(job),
+    }
+
+@app.route("/broadcasts/<int:job_id>")
+@login_required
+def broadcast_page(job_id):
+    job = broadcast_manager.get(job_id)
+    if job is None:
+        flash("Рассылка не найдена", "warning")
+        return redirect(url_for("control_page"))
+    return render_template("broadcast.html", job=_job_view(job))
+
+@app.route("/broadcasts/<int:job_id>/status")
+@login_required
+@limiter.limit("60 per minute")
+def broadcast_status(job_id):
+    job = broadcast_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(_job_view(job))
+
+@app.route("/broadcasts/<int:job_id>/cancel", methods=["POST"])
+@login_required
+def broadcast_cancel(job_id):
+    if broadcast_manager.cancel(job_id):
+        flash(f"⏸ Рассылка #{job_id} будет остановлена после текущей пачки", "warning")
+    else:
+        flash("Активная рассылка с таким id не найдена", "danger")
+    return redirect(url_for("broadcast_page", job_id=job_id))
+
+@app.route("/broadcasts/<int:job_id>/resume", methods=["POST"])
+@login_required
+def broadcast_resume(job_id):
+    try:
+        resumed = broadcast_manager.resume_threadsafe(job_id)
+    except RuntimeError as e:
+        flash(f"❌ {e}", "danger")
+        return redirect(url_for("broadcast_page", job_id=job_id))
+    if resumed:
+        flash(f"▶️ Рассылка #{job_id} продолжена", "success")
+    else:
+        flash("Остановленная рассылка с таким id не найдена", "danger")
+    return redirect(url_for("broadcast_page", job_id=job_id))
 
 # ======== 2FA (Google Authenticator) ========
 TWOFA_FILE = os.path.join(PROJECT_ROOT, "2fa_status.json")
@@ -1,22 +1,43 @@
 import sys
 import os
+import asyncio
+import secrets
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
     CallbackQueryHandler,
+    InlineQueryHandler,
 )
-from scr.core.settings import TOKEN
-from scr.bot.handlers import start, schedule, teachers, admin, misc
+from scr.core.settings import (
+    TOKEN, BOT_MODE, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, resolve_ssl_files,
+)
+from scr.bot.handlers import start, schedule, teachers, admin, misc, inline
 from scr.parsers.schedule_parser import fetch_schedule
 from scr.parsers.teacher_parser import fetch_teachers
+from scr.parsers.teacher_crawler import start_teacher_crawler, teacher_crawler
 from scr.core.logger import logger
+from scr.core.stats import stats_manager
+from scr.core.loop_monitor import start_loop_monitor, watchdog
+from scr.bot.instrumentation import instrument_handlers
+from scr.bot.outbox import OutboxRequest
+from scr.bot.concurrency import configure_concurrency
+from scr.bot.flood import register_flood_guard
+from scr.bot.broadcasts import broadcast_manager
+from scr.bot.welcome import start_welcome_board, welcome_board
 
 
-# Глобальная переменная, чтобы Flask мог к ней обращаться
+# Глобальные переменные, чтобы Flask мог к ним обращаться
 bot_app = None
+bot_loop = None  # event loop бота, задаётся при старте
 
 async def preload_data(application):
     """Предзагрузка данных при старте бота."""
+    global bot_loop
+    bot_loop = asyncio.get_running_loop()
+    start_loop_monitor(application)
+    # продолжаем рассылки, прерванные перезапуском
+    broadcast_manager.attach(application)
+
     try:
         await fetch_schedule(application)
         logger.info("✅ Расписание загружено в кэш при старте")
@@ -29,6 +50,42 @@ async def preload_data(application):
     except Exception as e:
         logger.error(f"❌ Ошибка при предзагрузке преподавателей: {e}")
 
+    # пары всех преподавателей для /search — фоновым обходом
+    start_teacher_crawler(application)
+    # текст главного меню (/start, "Назад") — раз в минуту
+    start_welcome_board(application)
+
+
+async def shutdown_data(application):
+    """Финальная запись статистики при остановке бота."""
+    watchdog.stop()
+    teacher_crawler.stop()
+    welcome_board.stop()
+    broadcast_manager.stop()
+    try:
+        stats_manager.stop()
+        logger.info("✅ Статистика сохранена при остановке")
+    except Exception as e:
+        logger.error(f"❌ Ошибка при сохранении статистики: {e}")
+
+
+def webhook_options() -> dict:
+    """Параметры run_webhook из настроек (SSL берётся тот же, что и у панели)"""
+    url_path = WEBHOOK_PATH.strip("/") or "telegram"
+    options = {
+        "listen": WEBHOOK_LISTEN,
+        "port": WEBHOOK_PORT,
+        "url_path": url_path,
+        "webhook_url": f"{WEBHOOK_URL.rstrip('/')}/{url_path}",
+        # Telegram присылает его в X-Telegram-Bot-Api-Secret-Token, чужие запросы получают 403
+        "secret_token": WEBHOOK_SECRET or secrets.token_urlsafe(32),
+    }
+    ssl_files = resolve_ssl_files()
+    if ssl_files:
+        # сертификат заодно загружается в Telegram (нужно для самоподписанного)
+        options["cert"], options["key"] = ssl_files
+    return options
+
 
 def run_bot():
     global bot_app
@@ -37,14 +94,20 @@ def run_bot():
         logger.critical("❌ TOKEN не найден в .env (ключ должен называться TOKEN)")
         sys.exit(1)
 
-    # создаём приложение и указываем preload_data в post_init
+    if BOT_MODE == "webhook" and not WEBHOOK_URL:
+        logger.critical("❌ BOT_MODE=webhook, но WEBHOOK_URL не задан в .env")
+        sys.exit(1)
+
+    # создаём приложение и указываем preload_data в post_init, shutdown_data в post_shutdown
     try:
-        bot_app = (
+        builder = (
             ApplicationBuilder()
             .token(TOKEN)
             .post_init(preload_data)
-            .build()
+            .post_shutdown(shutdown_data)
+            .request(OutboxRequest(connection_pool_size=256))
         )
+        bot_app = configure_concurrency(builder).build()
         logger.info(f"✅ Бот инициализирован (токен: {TOKEN[:8]}...)")
     except Exception as e:
         logger.critical(f"❌ Ошибка инициализации бота: {e}")
@@ -52,6 +115,9 @@ def run_bot():
 
     print(f"✅ Бот инициализирован с токеном: {TOKEN[:10]}...")
 
+    # Флуд-контроль раньше всех обработчиков (группа -1)
+    register_flood_guard(bot_app)
+
     # --- Команды ---
     bot_app.add_handler(CommandHandler("start", start.start))
     bot_app.add_handler(CommandHandler("help", misc.help_command))
@@ -72,6 +138,9 @@ def run_bot():
     bot_app.add_handler(CommandHandler("adm", admin.adm_command))
     bot_app.add_handler(CommandHandler("unadm", admin.unadm_command))
     bot_app.add_handler(CommandHandler("broadcast", admin.broadcast))
+    bot_app.add_handler(CommandHandler("bcancel", admin.bcancel))
+    bot_app.add_handler(CommandHandler("bresume", admin.bresume))
+    bot_app.add_handler(CommandHandler("bstatus", admin.bstatus))
     bot_app.add_handler(CommandHandler("restart", admin.restart))
 
     # --- Callback-хэндлеры ---
@@ -92,10 +161,27 @@ def run_bot():
     # Возвраты назад
     bot_app.add_handler(CallbackQueryHandler(start.back_to_week_handler, pattern="^back_to_week$"))
 
+    # Листание результатов /search
+    bot_app.add_handler(CallbackQueryHandler(misc.search_page_handler, pattern=r"^search_[0-9a-f]+_[0-9]+$"))
+
+    # Inline-режим: @бот матан, @бот сегодня, @бот <преподаватель>
+    bot_app.add_handler(InlineQueryHandler(inline.inline_query_handler))
+
+    # Гистограммы задержек для всех зарегистрированных обработчиков
+    instrument_handlers(bot_app)
+
     logger.info("🤖 Бот запущен. Ожидаю команды...")
     
     try:
-        bot_app.run_polling()
+        if BOT_MODE == "webhook":
+            options = webhook_options()
+            logger.info(
+                f"🌐 Режим webhook: {options['webhook_url']} "
+                f"(слушаю {options['listen']}:{options['port']}, SSL: {'да' if 'cert' in options else 'нет'})"
+            )
+            bot_app.run_webhook(**options)
+        else:
+            bot_app.run_polling()
         logger.info("✅ Зарегистрированы callback-хэндлеры для: week, day, today, tomorrow, session")
     except (KeyboardInterrupt, SystemExit) as e:
         logger.info(f"⚠️ Получен сигнал остановки: {e}")
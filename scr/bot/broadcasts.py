@@ -0,0 +1,243 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from scr.core.settings import BROADCASTS_FILE
+from scr.core.logger import logger
+from scr.bot.outbox import send_bulk
+
+# Сколько получателей отправлять между сохранениями курсора
+CHUNK_SIZE = 25
+# Как часто обновлять сообщение с прогрессом (секунды)
+PROGRESS_INTERVAL = 3
+# Сколько завершённых рассылок хранить в файле
+KEEP_FINISHED = 20
+# Сколько id с ошибкой показывать в итоговом отчёте
+REPORT_FAILED_LIMIT = 50
+
+ACTIVE = ("queued", "running")
+
+
+class BroadcastManager:
+    """Фоновые рассылки с сохранением курсора в broadcasts.json.
+
+    Рассылка — словарь: текст, список получателей, курсор, счётчики,
+    статус (queued, running, cancelled, done) и сообщение админа для прогресса.
+    После перезапуска незавершённые рассылки продолжаются с курсора
+    (повторно может уйти не больше одной пачки CHUNK_SIZE).
+    """
+
+    def __init__(self, file_path=BROADCASTS_FILE):
+        self.file_path = str(file_path)
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._saves = set()
+        self.application = None
+        self._loop = None
+        self.load()
+
+    # ---------------- Хранение ----------------
+    def load(self):
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                self.jobs = {int(job_id): job for job_id, job in json.load(f).items()}
+        except FileNotFoundError:
+            self.jobs = {}
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"❌ Не удалось прочитать {self.file_path}: {e}")
+            self.jobs = {}
+
+    def save(self):
+        with self._lock:
+            finished = sorted(job_id for job_id, job in self.jobs.items() if job["status"] == "done")
+            for job_id in finished[:-KEEP_FINISHED]:
+                del self.jobs[job_id]
+            data = json.dumps(self.jobs, ensure_ascii=False, indent=2)
+            tmp_path = self.file_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.file_path)
+
+    def save_soon(self):
+        """Запись файла не в loop бота: из loop — в отдельном потоке, из потока панели — сразу"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        task = asyncio.create_task(asyncio.to_thread(self.save))
+        self._saves.add(task)
+        task.add_done_callback(self._saves.discard)
+
+    # ---------------- Управление ----------------
+    def create(self, text: str, recipients, created_by=None, progress_chat=None) -> dict:
+        with self._lock:
+            job_id = max(self.jobs, default=0) + 1
+            job = self.jobs[job_id] = {
+                "id": job_id,
+                "text": text,
+                "recipients": [int(uid) for uid in recipients],
+                "cursor": 0,
+                "ok": 0,
+                "failed": [],
+                "status": "queued",
+                "created_by": created_by,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "finished_at": None,
+                "progress_chat": progress_chat,
+                "progress_message": None,
+            }
+        self.save_soon()
+        return job
+
+    def get(self, job_id):
+        try:
+            return self.jobs.get(int(job_id))
+        except (TypeError, ValueError):
+            return None
+
+    def launch(self, job: dict, application, resume: bool = False):
+        """Запускает рассылку фоновой задачей в loop бота (если она ещё не идёт).
+
+        В "running" переводится только рассылка из очереди или явно продолженная
+        (resume): отмена, пришедшая до запуска, не теряется.
+        """
+        if job["status"] == "queued" or resume:
+            job["status"] = "running"
+        elif job["status"] != "running":
+            return
+        task = self._tasks.get(job["id"])
+        if task is not None and not task.done():
+            # прежняя задача ещё дописывает пачку — она и продолжит рассылку
+            return
+        # application.create_task ждёт задачу при остановке приложения (и не отслеживает её
+        # из post_init) — храним сами и отменяем в stop, курсор при этом сохраняется
+        self._tasks[job["id"]] = asyncio.create_task(self.run(job, application.bot))
+
+    def cancel(self, job_id) -> bool:
+        """Останавливает рассылку после текущей пачки; её можно продолжить через resume"""
+        job = self.get(job_id)
+        if job is None or job["status"] not in ACTIVE:
+            return False
+        job["status"] = "cancelled"
+        self.save_soon()
+        return True
+
+    def resume(self, job_id, application) -> bool:
+        job = self.get(job_id)
+        if job is None or job["status"] != "cancelled":
+            return False
+        self.launch(job, application, resume=True)
+        return True
+
+    # ---------------- Связь с loop бота ----------------
+    def attach(self, application):
+        """Вызывается при старте бота: продолжает прерванные рассылки"""
+        self.application = application
+        self._loop = asyncio.get_running_loop()
+        for job in list(self.jobs.values()):
+            if job["status"] in ACTIVE:
+                logger.info(f"♻️ Продолжаю рассылку #{job['id']} с {job['cursor']}/{len(job['recipients'])}")
+                self.launch(job, application)
+
+    def stop(self):
+        """Вызывается при остановке бота: прерывает задачи, рассылки остаются "running"
+        и продолжаются с сохранённого курсора после перезапуска (attach)"""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self.save()
+
+    def _call_in_loop(self, func, *args):
+        if self._loop is None or not self._loop.is_running():
+            raise RuntimeError("Loop бота недоступен")
+        self._loop.call_soon_threadsafe(func, *args)
+
+    def submit_threadsafe(self, text: str, recipients, created_by=None) -> dict:
+        """Создаёт и запускает рассылку из другого потока (панель)"""
+        if self._loop is None or not self._loop.is_running():
+            raise RuntimeError("Loop бота недоступен")
+        job = self.create(text, recipients, created_by=created_by)
+        self._call_in_loop(self.launch, job, self.application)
+        return job
+
+    def resume_threadsafe(self, job_id) -> bool:
+        job = self.get(job_id)
+        if job is None or job["status"] != "cancelled":
+            return False
+        self._call_in_loop(self.resume, job_id, self.application)
+        return True
+
+    # ---------------- Выполнение ----------------
+    async def run(self, job: dict, bot):
+        # файл пишется в отдельном потоке: в нём списки получателей всех рассылок
+        await asyncio.to_thread(self.save)
+        total = len(job["recipients"])
+        last_report = 0.0
+        while True:
+            try:
+                while job["cursor"] < total and job["status"] == "running":
+                    chunk = job["recipients"][job["cursor"]:job["cursor"] + CHUNK_SIZE]
+                    ok, failed = await send_bulk(bot, chunk, job["text"])
+                    job["ok"] += ok
+                    job["failed"].extend(failed)
+                    job["cursor"] += len(chunk)
+                    await asyncio.to_thread(self.save)
+
+                    if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                        last_report = time.monotonic()
+                        await self.report(job, bot)
+            except Exception as e:
+                # курсор сохранён — рассылку можно продолжить через resume
+                logger.error(f"❌ Рассылка #{job['id']} прервана: {e}")
+                job["status"] = "cancelled"
+
+            if job["status"] == "running" and job["cursor"] >= total:
+                job["status"] = "done"
+                job["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                logger.info(f"✅ Рассылка #{job['id']} завершена: успех {job['ok']}, ошибок {len(job['failed'])}")
+            await asyncio.to_thread(self.save)
+            await self.report(job, bot)
+            # resume пришёл, пока задача сохраняла остановку, — продолжаем в ней же
+            if job["status"] != "running":
+                return
+
+    async def report(self, job: dict, bot):
+        """Создаёт или обновляет сообщение с прогрессом у автора рассылки"""
+        if job.get("progress_chat") is None:
+            return
+        text = format_progress(job)
+        try:
+            if job.get("progress_message") is not None:
+                await bot.edit_message_text(chat_id=job["progress_chat"], message_id=job["progress_message"], text=text)
+            else:
+                message = await bot.send_message(chat_id=job["progress_chat"], text=text)
+                job["progress_message"] = message.message_id
+        except Exception as e:
+            # "message is not modified" и подобное не должны останавливать рассылку
+            logger.warning(f"Не удалось обновить прогресс рассылки #{job['id']}: {e}")
+
+
+def format_progress(job: dict) -> str:
+    total = len(job["recipients"])
+    status = {
+        "queued": "⏳ в очереди",
+        "running": "📤 идёт",
+        "cancelled": f"⏸ остановлена (продолжить: /bresume {job['id']})",
+        "done": "✅ завершена",
+    }.get(job["status"], job["status"])
+    lines = [
+        f"Рассылка #{job['id']}: {status}",
+        f"Отправлено: {job['cursor']}/{total}, успех: {job['ok']}, ошибки: {len(job['failed'])}",
+    ]
+    if job["status"] == "done" and job["failed"]:
+        shown = ", ".join(str(uid) for uid in job["failed"][:REPORT_FAILED_LIMIT])
+        rest = len(job["failed"]) - REPORT_FAILED_LIMIT
+        lines.append(f"Не доставлено: {shown}" + (f" и ещё {rest}" if rest > 0 else ""))
+    return "\n".join(lines)
+
+
+broadcast_manager = BroadcastManager()
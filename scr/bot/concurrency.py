@@ -0,0 +1,87 @@
+import asyncio
+from contextlib import asynccontextmanager
+from telegram import Update
+from telegram.ext import Application
+from scr.core.settings import CONCURRENT_UPDATES
+from scr.core.metrics import registry
+
+# Сколько апдейтов PTB может держать в ожидании (ждут свой чат или общий лимит)
+MAX_PENDING_UPDATES = 4096
+
+registry.describe("updates_in_progress", "Апдейты, обрабатываемые прямо сейчас")
+
+
+class KeyedLock:
+    """Набор asyncio.Lock по ключу; запись удаляется, когда лок никому не нужен"""
+
+    def __init__(self):
+        self._locks = {}  # key -> [lock, число держателей и ожидающих]
+
+    @asynccontextmanager
+    async def hold(self, key):
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
+
+
+def update_key(update):
+    """Ключ упорядочивания: чат, а если его нет (inline-запросы) — пользователь"""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return None
+
+
+class OrderedApplication(Application):
+    """Application с параллельной обработкой апдейтов разных чатов.
+
+    Апдейты одного чата выполняются строго по очереди (asyncio.Lock отдаёт
+    лок в порядке ожидания, а задачи PTB создаёт в порядке получения).
+    Одновременно работают не больше CONCURRENT_UPDATES обработчиков; апдейты,
+    ждущие свой чат, этот лимит не занимают.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.chat_locks = KeyedLock()
+        self.update_limit = asyncio.Semaphore(max(CONCURRENT_UPDATES, 1))
+
+    async def process_update(self, update):
+        key = update_key(update)
+        if key is None:
+            async with self.update_limit:
+                await self._process_limited(update)
+            return
+
+        async with self.chat_locks.hold(key):
+            async with self.update_limit:
+                await self._process_limited(update)
+
+    async def _process_limited(self, update):
+        gauge = registry.gauge("updates_in_progress")
+        gauge.set(gauge.value + 1)
+        try:
+            await super().process_update(update)
+        finally:
+            gauge.set(gauge.value - 1)
+
+
+def configure_concurrency(builder):
+    """Включает параллельную обработку в ApplicationBuilder, если CONCURRENT_UPDATES > 1"""
+    if CONCURRENT_UPDATES <= 1:
+        return builder
+    return builder.application_class(OrderedApplication).concurrent_updates(MAX_PENDING_UPDATES)
@@ -0,0 +1,125 @@
+import time
+from cachetools import TTLCache
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes, TypeHandler
+from scr.core.settings import (
+    OWNER_ID, FLOOD_USER_RATE, FLOOD_USER_BURST, FLOOD_HEAVY_RATE, FLOOD_HEAVY_BURST,
+    FLOOD_INLINE_RATE, FLOOD_INLINE_BURST,
+)
+from scr.core.logger import logger
+from scr.core.metrics import registry
+
+registry.describe("flood_blocked_total", "Апдейты, отброшенные флуд-контролем")
+
+# Команды и кнопки, за которыми стоит загрузка страниц или чтение файлов
+HEAVY_COMMANDS = {"search", "showlog", "stats", "reload", "fullreload", "broadcast", "listusers"}
+# (навигация teachers_list, teacher_<id>, teacher_day_* читает только кэш)
+HEAVY_CALLBACK_PREFIXES = ("teacher_pairs_", "teacher_consult_")
+
+# Одинаковый ответ всем, кто превысил лимит (без обращений к API и хранилищу)
+FLOOD_REPLY = "⏳ Слишком много запросов. Подождите немного и попробуйте снова."
+
+# Корзина простаивающего пользователя давно полна, поэтому её можно забыть
+BUCKET_TTL = 10 * 60
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше burst"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def classify(update: Update) -> str:
+    """Класс апдейта для лимитов: "heavy" — дорогие команды и кнопки преподавателей"""
+    if update.callback_query and update.callback_query.data:
+        if update.callback_query.data.startswith(HEAVY_CALLBACK_PREFIXES):
+            return "heavy"
+        return "callback"
+    if update.inline_query:
+        return "inline"
+    message = update.effective_message
+    if message and message.text and message.text.startswith("/"):
+        command = message.text.split(maxsplit=1)[0][1:].split("@")[0].lower()
+        return "heavy" if command in HEAVY_COMMANDS else "command"
+    return "other"
+
+
+class FloodGuard:
+    """Лимиты на пользователя: общий, отдельный для тяжёлых запросов и для inline-запросов"""
+
+    def __init__(self):
+        self.user_buckets = TTLCache(maxsize=100_000, ttl=BUCKET_TTL)
+        self.heavy_buckets = TTLCache(maxsize=100_000, ttl=BUCKET_TTL)
+        self.inline_buckets = TTLCache(maxsize=100_000, ttl=BUCKET_TTL)
+        # пользователи, которым уже ответили FLOOD_REPLY в текущей серии блокировок
+        self.warned = TTLCache(maxsize=100_000, ttl=BUCKET_TTL)
+
+    def _bucket(self, cache, user_id: int, rate: float, burst: float) -> TokenBucket:
+        bucket = cache.get(user_id)
+        if bucket is None:
+            bucket = cache[user_id] = TokenBucket(rate, burst)
+        return bucket
+
+    def allow(self, user_id: int, kind: str) -> bool:
+        if kind == "inline":
+            # набор запроса не расходует общий лимит команд и кнопок
+            return self._bucket(self.inline_buckets, user_id, FLOOD_INLINE_RATE, FLOOD_INLINE_BURST).take()
+        if not self._bucket(self.user_buckets, user_id, FLOOD_USER_RATE, FLOOD_USER_BURST).take():
+            return False
+        if kind == "heavy":
+            return self._bucket(self.heavy_buckets, user_id, FLOOD_HEAVY_RATE, FLOOD_HEAVY_BURST).take()
+        return True
+
+    async def __call__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        user = update.effective_user
+        if user is None or user.id == OWNER_ID:
+            return
+
+        kind = classify(update)
+        if self.allow(user.id, kind):
+            self.warned.pop(user.id, None)
+            return
+
+        registry.counter("flood_blocked_total", kind=kind).inc()
+        try:
+            if update.callback_query:
+                # без answer() у пользователя будет крутиться индикатор загрузки
+                await update.callback_query.answer(FLOOD_REPLY)
+            elif update.inline_query:
+                # пустой ответ: иначе Telegram ждёт результатов до таймаута
+                await update.inline_query.answer([], cache_time=0, is_personal=True)
+            elif user.id not in self.warned and update.effective_message:
+                self.warned[user.id] = True
+                logger.warning(f"🚫 Флуд-контроль: {user.username or user.full_name} ({user.id}), {kind}")
+                await update.effective_message.reply_text(FLOOD_REPLY)
+        except Exception as e:
+            # истёкший запрос, заблокированный бот, сеть — апдейт всё равно отбрасывается
+            logger.warning(f"Флуд-контроль: не удалось ответить {user.id}: {e}")
+        raise ApplicationHandlerStop
+
+
+flood_guard = FloodGuard()
+
+
+def blocked_updates_total() -> int:
+    return int(sum(counter.value for _, counter in registry.collect("flood_blocked_total")))
+
+
+def register_flood_guard(application):
+    """Флуд-контроль в группе -1: срабатывает раньше всех обработчиков"""
+    application.add_handler(TypeHandler(Update, flood_guard), group=-1)
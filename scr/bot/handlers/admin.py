@@ -1,12 +1,18 @@
 import os
+import asyncio
 from telegram import Update
 from telegram.ext import ContextTypes
 from scr.core.users import get_user_role, is_user_allowed, load_allowed_users, save_allowed_users
-from scr.core.stats import stats, save_stats
+from scr.core.stats import stats, save_stats, stats_manager
 from scr.core.settings import OWNER_ID, LOG_FILE
 from scr.core.logger import logger
-from scr.parsers.schedule_parser import fetch_schedule, schedule_cache
-from scr.parsers.teacher_parser import fetch_teachers, teachers_cache
+from scr.core.logtail import tail
+from scr.bot.instrumentation import latency_summary
+from scr.bot.flood import blocked_updates_total
+from scr.bot.broadcasts import broadcast_manager, format_progress
+from scr.bot.handlers.schedule import escape_markdown
+from scr.parsers.schedule_parser import fetch_schedule
+from scr.parsers.teacher_parser import fetch_teachers
 
 
 # ---------------- Команды управления доступом ----------------
@@ -141,8 +147,8 @@ async def reload_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.warning(f"❌ {username} ({uid}) попытался выполнить /reload без прав.")
         return
 
-    schedule_cache.clear()
-    await fetch_schedule(context.application)
+    # старое расписание отдаётся, пока новое не загружено целиком
+    await fetch_schedule(context.application, force=True)
     await update.message.reply_text("Кэш расписания обновлён.")
     logger.info(f"✅ {username} ({uid}) выполнил /reload.")
 
@@ -155,16 +161,17 @@ async def fullreload(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.warning(f"❌ {username} ({uid}) попытался выполнить /fullreload без прав.")
         return
 
-    schedule_cache.clear()
-    teachers_cache.clear()
-    await fetch_schedule(context.application)
-    await fetch_teachers(context.application)
+    await fetch_schedule(context.application, force=True)
+    await fetch_teachers(context.application, force=True)
     await update.message.reply_text("Полная перезагрузка завершена.")
     logger.info(f"✅ {username} ({uid}) выполнил /fullreload.")
 
 
 # ---------------- Логи и статистика ----------------
 
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+SHOWLOG_MAX_LINES = 1000
+
 async def showlog(update: Update, context: ContextTypes.DEFAULT_TYPE):
     uid = update.effective_user.id
     username = update.effective_user.username or update.effective_user.full_name
@@ -173,11 +180,20 @@ async def showlog(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.warning(f"❌ {username} ({uid}) попытался выполнить /showlog без прав.")
         return
 
-    num_lines = int(context.args[0]) if context.args else 50
+    # /showlog [число] [уровень] [текст]
+    num_lines, level, words = 50, None, []
+    for arg in context.args or []:
+        if arg.isdigit():
+            num_lines = min(int(arg), SHOWLOG_MAX_LINES)
+        elif arg.upper() in LOG_LEVELS:
+            level = arg.upper()
+        else:
+            words.append(arg)
+
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()[-num_lines:]
-        log_text = "".join(lines) or "Лог пуст."
+        # чтение с конца файла (и ротированных копий) — в отдельном потоке, не в loop
+        lines = await asyncio.to_thread(tail, LOG_FILE, num_lines, level, " ".join(words) or None)
+        log_text = "\n".join(lines) or "Лог пуст."
 
         # Безопасная отправка по частям
         MAX_LEN = 4000
@@ -204,7 +220,10 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         logger.warning(f"❌ {username} ({uid}) попытался выполнить /stats без прав.")
         return
 
-    unique_users_count = len(stats['unique_users'])
+    unique_users_count = stats_manager.unique_users_count()
+    # в режиме hll счётчики пользователей — оценки
+    error = stats_manager.estimate_error
+    approx = f" (оценка, ±{error:.1%})" if error else ""
     schedule_requests = stats['schedule_requests']
     search_queries = stats['search_queries']
     commands_executed = stats['commands_executed']
@@ -217,20 +236,34 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     sorted_peak = sorted(stats['peak_usage'].items(), key=lambda item: item[1], reverse=True)
     peak_times = "\n".join([f"• Час {hour}: {count} команд" for hour, count in sorted_peak[:5]]) or "Нет данных"
 
-    sorted_daily = sorted(stats['daily_active_users'].items(), key=lambda item: len(item[1]), reverse=True)
-    daily_active = "\n".join([f"• {day}: {len(users)} пользователей" for day, users in sorted_daily[:5]]) or "Нет данных"
+    activity = stats_manager.rollups()
+    sorted_daily = sorted(activity["daily"].items(), key=lambda item: item[1], reverse=True)
+    daily_active = "\n".join([f"• {day}: {count} пользователей" for day, count in sorted_daily[:5]]) or "Нет данных"
+    weekly_active = "\n".join([f"• {week}: {count}" for week, count in list(activity["weekly"].items())[-4:]]) or "Нет данных"
+    monthly_active = "\n".join([f"• {month}: {count}" for month, count in list(activity["monthly"].items())[-3:]]) or "Нет данных"
+
+    latency = "\n".join(
+        f"• {escape_markdown(item['handler'])}: p50 {item['p50']:.0f} мс, p95 {item['p95']:.0f} мс ({item['count']})"
+        for item in latency_summary()[:5]
+    ) or "Нет данных"
+
+    blocked = blocked_updates_total()
 
     message = (
         f"📊 **Статистика использования** 📊\n\n"
-        f"👥 **Уникальных пользователей:** {unique_users_count}\n"
+        f"👥 **Уникальных пользователей:** {unique_users_count}{approx}\n"
         f"💬 **Общее количество сообщений:** {total_messages}\n"
         f"🔄 **Запросов расписания:** {schedule_requests}\n"
         f"🔍 **Поисковых запросов:** {search_queries}\n"
         f"📌 **Выполнено команд:** {commands_executed}\n"
-        f"⚠️ **Ошибок:** {errors}\n\n"
+        f"⚠️ **Ошибок:** {errors}\n"
+        f"🚫 **Отброшено флуд-контролем:** {blocked}\n\n"
         f"🔝 **Топ 5 пользователей по выполненным командам:**\n{top_commands}\n\n"
         f"⏰ **Пиковые времена использования (топ 5):**\n{peak_times}\n\n"
-        f"📅 **Ежедневная активность (топ 5 дней):**\n{daily_active}\n"
+        f"📅 **Ежедневная активность (топ 5 дней){approx}:**\n{daily_active}\n\n"
+        f"🗓 **Активность по неделям{approx}:**\n{weekly_active}\n\n"
+        f"🗓 **Активность по месяцам{approx}:**\n{monthly_active}\n\n"
+        f"⏱ **Самые медленные обработчики (p95):**\n{latency}\n"
     )
 
     await update.message.reply_text(message, parse_mode='Markdown')
@@ -391,17 +424,63 @@ async def broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     data = load_allowed_users()
-    ok, fail = 0, 0
-    for user_id_str in data["users"]:
-        try:
-            await context.bot.send_message(chat_id=int(user_id_str), text=f"🔔 {msg}")
-            ok += 1
-        except Exception as e:
-            logger.warning(f"Не удалось отправить сообщение пользователю {user_id_str}: {e}")
-            fail += 1
+    job = broadcast_manager.create(
+        f"🔔 {msg}", list(data["users"]), created_by=uid, progress_chat=update.effective_chat.id
+    )
+    progress = await update.message.reply_text(
+        f"Рассылка #{job['id']} запущена: {len(job['recipients'])} получателей.\n"
+        f"Остановить: /bcancel {job['id']}"
+    )
+    job["progress_message"] = progress.message_id
+    broadcast_manager.launch(job, context.application)
+    logger.info(f"✅ {username} ({uid}) запустил broadcast #{job['id']}: '{msg}' ({len(job['recipients'])} получателей)")
+
+
+async def bcancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if get_user_role(uid) not in ["admin", "owner"]:
+        await update.message.reply_text("Нет прав.")
+        return
+
+    if not context.args:
+        await update.message.reply_text("Использование: /bcancel <id рассылки>")
+        return
+
+    if broadcast_manager.cancel(context.args[0]):
+        await update.message.reply_text(f"⏸ Рассылка #{context.args[0]} будет остановлена после текущей пачки.")
+        logger.info(f"✅ {uid} остановил рассылку #{context.args[0]}")
+    else:
+        await update.message.reply_text("Активная рассылка с таким id не найдена.")
+
+
+async def bresume(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if get_user_role(uid) not in ["admin", "owner"]:
+        await update.message.reply_text("Нет прав.")
+        return
+
+    if not context.args:
+        await update.message.reply_text("Использование: /bresume <id рассылки>")
+        return
 
-    await update.message.reply_text(f"Рассылка завершена. Успех: {ok}, Ошибки: {fail}")
-    logger.info(f"✅ {username} ({uid}) отправил broadcast: '{msg}' (успех: {ok}, ошибок: {fail})")
+    if broadcast_manager.resume(context.args[0], context.application):
+        await update.message.reply_text(f"▶️ Рассылка #{context.args[0]} продолжена.")
+        logger.info(f"✅ {uid} продолжил рассылку #{context.args[0]}")
+    else:
+        await update.message.reply_text("Остановленная рассылка с таким id не найдена.")
+
+
+async def bstatus(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if get_user_role(uid) not in ["admin", "owner"]:
+        await update.message.reply_text("Нет прав.")
+        return
+
+    jobs = sorted(broadcast_manager.jobs.values(), key=lambda job: job["id"], reverse=True)[:5]
+    if not jobs:
+        await update.message.reply_text("Рассылок пока не было.")
+        return
+    await update.message.reply_text("\n\n".join(format_progress(job) for job in jobs))
 
 
 async def restart(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -420,6 +499,8 @@ async def restart(update: Update, context: ContextTypes.DEFAULT_TYPE):
         import time
         time.sleep(2)
         logger.info("♻️ Выполнение перезапуска...")
+        # os._exit не вызывает atexit — сохраняем статистику вручную
+        stats_manager.flush()
         # Используем os._exit для немедленного завершения
         os._exit(42)
     
@@ -0,0 +1,178 @@
+import re
+from cachetools import LRUCache
+from telegram import (
+    Update, InlineQueryResultArticle, InputTextMessageContent, InlineQueryResultsButton,
+)
+from telegram.ext import ContextTypes
+from scr.core.settings import INLINE_CACHE_TIME, SEARCH_CACHE_SIZE, RU_WEEKDAYS_ORDER
+from scr.core.users import is_user_allowed
+from scr.core.logger import logger
+from scr.core.metrics import registry
+from scr.core.events import annotate
+from scr.bot.handlers.schedule import format_day
+from scr.bot.handlers.misc import run_search, format_result, search_version
+from scr.parsers import schedule_parser, teacher_parser
+from scr.parsers.schedule_parser import (
+    fetch_schedule, schedule_cache, get_current_week_and_day, get_tomorrow_week_and_day,
+)
+from scr.parsers.teacher_parser import teachers_cache
+from scr.parsers.search_index import schedule_index, teachers_index, teacher_pairs_index, normalize
+
+# Telegram показывает не больше 50 результатов на inline-запрос
+INLINE_RESULTS = 50
+MESSAGE_LIMIT = 4096
+
+WEEK_TITLES = {"week_1": "1-ая неделя", "week_2": "2-ая неделя"}
+
+# Экранированный символ (\*, \_) или разметка Markdown (*, _)
+MARKDOWN_RE = re.compile(r"\\(.)|[*_]")
+
+# Ответы на поисковые inline-запросы по ключу (запрос, версия данных)
+inline_cache = LRUCache(maxsize=SEARCH_CACHE_SIZE)
+
+
+class DayRenders:
+    """Готовые тексты дней расписания; пересобираются один раз на версию расписания"""
+
+    def __init__(self):
+        self.version = None
+        self.days = {}  # (неделя, день) -> текст
+
+    def get(self, version, schedule) -> dict:
+        if version != self.version:
+            self.days = {
+                (week, day): format_day(lessons)
+                for week in WEEK_TITLES if week in schedule
+                for day, lessons in schedule[week].items() if not day.startswith("_")
+            }
+            self.version = version
+        return self.days
+
+
+day_renders = DayRenders()
+
+
+def truncate_message(text: str, limit: int = MESSAGE_LIMIT) -> str:
+    """Обрезает текст по целым блокам (пары разделены пустой строкой) и дописывает "…".
+
+    Обрезка посреди строки может разорвать *…* — тогда Telegram отклоняет весь ответ.
+    """
+    if len(text) <= limit:
+        return text
+    tail = "\n…"
+    cut = text.rfind("\n\n", 0, limit - len(tail))
+    if cut == -1:
+        cut = text.rfind("\n", 0, limit - len(tail))
+    if cut == -1:
+        # одна огромная строка — без разметки, чтобы не оставить незакрытую сущность
+        return text[:limit - len(tail)].replace("*", "") + tail
+    return text[:cut] + tail
+
+
+def plain_text(text: str) -> str:
+    """Заголовки и описания inline-результатов не размечаются: убираем *…* и экранирование"""
+    return MARKDOWN_RE.sub(lambda m: m.group(1) or "", text).strip()
+
+
+def article(result_id: str, title: str, description: str, text: str) -> InlineQueryResultArticle:
+    return InlineQueryResultArticle(
+        id=result_id,
+        title=title,
+        description=description,
+        input_message_content=InputTextMessageContent(truncate_message(text), parse_mode="Markdown"),
+    )
+
+
+def day_articles(query: str, days: dict) -> list:
+    """Результаты "сегодня", "завтра" и дней недели; пустой запрос — сегодня и завтра"""
+    results = []
+    for keyword, (date_str, day_name, week) in (
+        ("сегодня", get_current_week_and_day()),
+        ("завтра", get_tomorrow_week_and_day()),
+    ):
+        if keyword.startswith(query):
+            text = f"📅 {keyword.capitalize()} ({date_str}, {day_name}):\n\n" + days.get((week, day_name), "Нет пар.")
+            results.append(article(keyword, keyword.capitalize(), f"{date_str}, {day_name}", text))
+
+    if len(query) >= 2:
+        for day in RU_WEEKDAYS_ORDER:
+            if not normalize(day).startswith(query):
+                continue
+            for week, week_title in WEEK_TITLES.items():
+                if (week, day) in days:
+                    text = f"📅 {day} ({week_title}):\n\n" + days[(week, day)]
+                    results.append(article(f"{week}_{day}", day, week_title, text))
+    return results
+
+
+def teacher_text(teacher_id: str, name: str) -> str:
+    """Пары преподавателя из индекса пар (если его страница уже загружена)"""
+    text = f"👨‍🏫 Преподаватель: *{name}*\n\n"
+    for doc_id in teacher_pairs_index.by_teacher.get(teacher_id, ()):
+        pair = teacher_pairs_index.documents[doc_id]
+        # первая строка format_result повторяет имя — заменяем её неделей и днём
+        week_title = WEEK_TITLES["week_" + pair["week"]]
+        text += f"{week_title} - {pair['day']}\n" + format_result(pair).split("\n", 1)[1]
+    return text
+
+
+def search_articles(results: list) -> list:
+    articles = []
+    for i, res in enumerate(results[:INLINE_RESULTS]):
+        if res["source"] == "teacher":
+            articles.append(article(f"t{i}", res["name"], "Преподаватель", teacher_text(res["id"], res["name"])))
+            continue
+        info_lines = [ln for ln in (res["info"] or "").split("\n") if ln.strip()]
+        title = plain_text(info_lines[0]) if info_lines else res["time"]
+        if res["source"] == "teacher_pair":
+            week_title = WEEK_TITLES.get(f"week_{res['week']}", "")
+            description = f"{res['name']} · {week_title}, {res['day']}, {res['time']}"
+        else:
+            description = f"{WEEK_TITLES.get(res['week'], 'Сессия')}, {res['day']}, {res['time']}"
+        articles.append(article(f"s{i}", title, description, format_result(res)))
+    return articles
+
+
+async def inline_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """@бот <запрос>: ответ из готовых текстов дней и поисковых индексов, без загрузки страниц"""
+    inline = update.inline_query
+    uid = inline.from_user.id
+
+    if not is_user_allowed(uid):
+        # без кэша: после добавления в список доступа ответ сразу меняется
+        await inline.answer(
+            [],
+            cache_time=0,
+            is_personal=True,
+            button=InlineQueryResultsButton(text="Нет доступа — открыть бота", start_parameter="inline"),
+        )
+        logger.warning(f"❌ {inline.from_user.username or inline.from_user.full_name} ({uid}) inline-запрос без доступа.")
+        return
+
+    query = normalize(inline.query).strip()
+    # на каждое нажатие клавиши — только готовые данные; истёкший кэш обновляется в фоне,
+    # а тексты дней и индексы остаются от последней версии расписания
+    schedule = schedule_cache
+    if not schedule:
+        context.application.create_task(fetch_schedule(context.application))
+    results = day_articles(query, day_renders.get(schedule_parser.schedule_version, schedule))
+
+    if query:
+        key = (query, search_version())
+        found = inline_cache.get(key)
+        if found is not None:
+            registry.counter("cache_requests_total", cache="inline", result="hit").inc()
+            annotate(cache_inline="hit")
+        else:
+            registry.counter("cache_requests_total", cache="inline", result="miss").inc()
+            annotate(cache_inline="miss")
+            indexes = (
+                schedule_index.get(schedule_parser.schedule_version, schedule),
+                teachers_index.get(teacher_parser.teachers_version, teachers_cache),
+                teacher_pairs_index,
+            )
+            found = inline_cache[key] = search_articles(run_search(query, indexes)[0])
+        results += found[:INLINE_RESULTS - len(results)]
+
+    # ответ зависит от доступа пользователя, поэтому кэш Telegram — персональный
+    await inline.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=True)
@@ -1,15 +1,29 @@
-from telegram import Update
+import hashlib
+from cachetools import LRUCache
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from scr.core.settings import PLAN_URL, OWNER_ID
+from scr.core.settings import PLAN_URL, OWNER_ID, SEARCH_PAGE_SIZE, SEARCH_CACHE_SIZE
 from scr.core.users import UserManager, get_user_role, is_user_allowed
-from scr.core.stats import StatsManager
+from scr.core.stats import stats_manager
 from scr.core.logger import logger
+from scr.core.metrics import registry
+from scr.core.events import annotate
+from scr.bot.handlers.schedule import escape_markdown
+from scr.bot.handlers.utils import safe_edit_message
+from scr.parsers import schedule_parser, teacher_parser
 from scr.parsers.schedule_parser import fetch_schedule
 from scr.parsers.teacher_parser import fetch_teachers, teachers_cache
+from scr.parsers.search_index import schedule_index, teachers_index, teacher_pairs_index, expand_query
+
+FUZZY_RESULTS = 15
+PAGE_TEXT_LIMIT = 3500  # запас до лимита сообщения Telegram (4096) под заголовок
+
+# Наборы результатов /search по ключу (запрос, версия данных); листание читает отсюда
+search_cache = LRUCache(maxsize=SEARCH_CACHE_SIZE)
 
 # Инициализация
 users = UserManager(owner_id=OWNER_ID)
-stats = StatsManager()
+stats = stats_manager  # общий экземпляр, чтобы не перезаписывать stats.json двумя объектами
 
 
 # /help
@@ -27,7 +41,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_commands = [
         "/search <запрос> - Поиск по предметам и преподавателям",
         "/plan - Показать учебный план",
-        "/map - Показать карту корпусов"
+        "/map - Показать карту корпусов",
+        "@бот <запрос> - Inline-режим: сегодня, завтра, день недели, предмет или преподаватель"
     ]
 
     # Модер/админ
@@ -41,11 +56,14 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
     # Админ
     admin_commands = [
-        "/showlog [число] - Показать последние записи из логов",
+        "/showlog [число] [уровень] [текст] - Показать последние записи из логов",
         "/stats - Показать статистику",
         "/mod <user_id> - Назначить пользователя модератором",
         "/unmod <user_id> - Снять пользователя с роли модератора",
-        "/broadcast <сообщение> - Рассылка объявления"
+        "/broadcast <сообщение> - Рассылка объявления",
+        "/bstatus - Последние рассылки",
+        "/bcancel <id> - Остановить рассылку",
+        "/bresume <id> - Продолжить остановленную рассылку"
     ]
 
     # Владелец
@@ -80,6 +98,128 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     logger.info(f"✅ {username} ({uid}) вызвал /help.")
 
 # ---------------- /search ----------------
+def search_version() -> tuple:
+    """Версия данных поиска: меняется при обновлении расписания, преподавателей или их пар"""
+    return schedule_parser.schedule_version, teacher_parser.teachers_version, teacher_pairs_index.version
+
+
+def search_key(query: str, version: tuple) -> str:
+    """Короткий ключ набора результатов (помещается в callback_data)"""
+    return hashlib.blake2b(f"{query}\0{version}".encode("utf-8"), digest_size=6).hexdigest()
+
+
+def run_search(query: str, indexes) -> tuple:
+    """(результаты, нечёткий ли поиск) для запроса по индексам"""
+    # сокращения ("матан", "физ-ра") и латиница раскрываются; если так ничего нет — запрос как есть
+    expanded = expand_query(query)
+    results = [doc for index in indexes for doc in index.search(expanded)]
+    if not results and expanded != query:
+        results = [doc for index in indexes for doc in index.search(query)]
+    if results:
+        return results, False
+
+    # нечёткий поиск по триграммам: опечатки в фамилиях и названиях
+    ranked = sorted(
+        (match for index in indexes for match in index.fuzzy_search(expanded, FUZZY_RESULTS)),
+        key=lambda match: match[0],
+        reverse=True,
+    )
+    results = [doc for _, doc in ranked[:FUZZY_RESULTS]]
+    return results, bool(results)
+
+
+def format_result(res: dict) -> str:
+    if res["source"] == "schedule":
+        # неделя
+        if res["week"] == "week_1":
+            week_text = "1-ая неделя"
+        elif res["week"] == "week_2":
+            week_text = "2-ая неделя"
+        else:
+            week_text = "Сессия"
+
+        # форматируем инфо как в расписании
+        info_lines = [ln for ln in (res["info"] or "").split("\n") if ln.strip()]
+        subject = info_lines[0] if info_lines else ""
+        rest = "\n".join(info_lines[1:]) if len(info_lines) > 1 else ""
+
+        text = f"{week_text} - {res['day']}\n"
+        text += f"⏰ {res['time']}\n"
+        if res.get("subgroup"):
+            text += f"🔸 {res['subgroup']}\n"
+        if subject:
+            text += f"📚 *{subject}*\n"
+        if rest:
+            text += rest + "\n"
+        return text + "\n"
+
+    if res["source"] == "teacher":
+        return f"👨‍🏫 Преподаватель: *{res['name']}*\n\n"
+
+    if res["source"] == "teacher_pair":
+        info_lines = [
+            ln for ln in (res["info"] or "").split("\n")
+            if ln.strip() and ln != res.get("room")
+        ]
+        week_text = "1-ая неделя" if res["week"] == "1" else "2-ая неделя"
+        text = f"👨‍🏫 {res['name']}: {week_text} - {res['day']}\n"
+        text += f"⏰ {res['time']}\n"
+        if info_lines:
+            text += f"📚 *{escape_markdown(info_lines[0])}*\n"
+        for line in info_lines[1:]:
+            text += escape_markdown(line) + "\n"
+        if res.get("room"):
+            text += f"🏫 {escape_markdown(res['room'])}\n"
+        return text + "\n"
+
+    return ""
+
+
+def paginate(blocks: list, page_size: int = SEARCH_PAGE_SIZE, limit: int = PAGE_TEXT_LIMIT) -> list:
+    """Готовые тексты страниц: не больше page_size результатов и limit символов на страницу"""
+    pages, current = [], ""
+    count = 0
+    for block in blocks:
+        block = block[:limit]
+        if current and (count >= page_size or len(current) + len(block) > limit):
+            pages.append(current)
+            current, count = "", 0
+        current += block
+        count += 1
+    if current:
+        pages.append(current)
+    return pages
+
+
+def build_search_result(query: str, indexes) -> dict:
+    results, fuzzy = run_search(query, indexes)
+    return {
+        "query": query,
+        "fuzzy": fuzzy,
+        "count": len(results),
+        "pages": paginate([format_result(res) for res in results]),
+    }
+
+
+def render_search_page(key: str, result: dict, page: int) -> tuple:
+    """Текст и клавиатура страницы page (с нуля) закэшированного результата"""
+    pages = result["pages"]
+    page = min(max(page, 0), len(pages) - 1)
+    if result["fuzzy"]:
+        header = f"🔍 Точных совпадений для '{result['query']}' нет. Возможно, вы искали:\n\n"
+    else:
+        header = f"🔍 Результаты поиска для '{result['query']}' ({result['count']}):\n\n"
+
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("⬅ Назад", callback_data=f"search_{key}_{page - 1}"))
+    if page < len(pages) - 1:
+        buttons.append(InlineKeyboardButton("Далее ➡", callback_data=f"search_{key}_{page + 1}"))
+    if len(pages) > 1:
+        header = header.rstrip("\n") + f"\nСтраница {page + 1}/{len(pages)}\n\n"
+    return header + pages[page], InlineKeyboardMarkup([buttons]) if buttons else None
+
+
 async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     uid = update.effective_user.id
     username = update.effective_user.username or update.effective_user.full_name
@@ -102,82 +242,58 @@ async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     application = context.application
-    results = []
 
-    # --- Поиск в расписании ---
+    # --- Поиск по индексам расписания и преподавателей (слова — префиксы, по И) ---
     schedule = await fetch_schedule(application)
-    if schedule:
-        for week_key in ["week_1", "week_2", "session"]:
-            if week_key not in schedule:
-                continue
-            for day, lessons in schedule[week_key].items():
-                if day.startswith("_"):
-                    continue
-                for lesson in lessons:
-                    if isinstance(lesson, dict):
-                        if query in lesson["info"].lower():
-                            results.append({
-                                "source": "schedule",
-                                "week": week_key,
-                                "day": day,
-                                "time": lesson["time"],
-                                "info": lesson["info"],
-                                "subgroup": lesson.get("subgroup"),
-                            })
-
-    # --- Поиск по преподавателям ---
     await fetch_teachers(application)
-    for tid, t in teachers_cache.items():
-        if t["name"] and query in t["name"].lower():
-            results.append({
-                "source": "teacher",
-                "id": tid,
-                "name": t["name"],
-            })
-
-    if not results:
+    key = search_key(query, search_version())
+    result = search_cache.get(key)
+    if result is not None:
+        registry.counter("cache_requests_total", cache="search", result="hit").inc()
+        annotate(cache_search="hit")
+    else:
+        registry.counter("cache_requests_total", cache="search", result="miss").inc()
+        annotate(cache_search="miss")
+        indexes = (
+            schedule_index.get(schedule_parser.schedule_version, schedule),
+            teachers_index.get(teacher_parser.teachers_version, teachers_cache),
+            teacher_pairs_index,  # пары всех преподавателей ("иванов среда")
+        )
+        result = build_search_result(query, indexes)
+        search_cache[key] = result
+
+    if not result["pages"]:
         await update.message.reply_text("Совпадений не найдено.")
         return
 
-    # --- Формируем сообщение ---
-    message = f"🔍 Результаты поиска для '{query}':\n\n"
-
-    for res in results:
-        if res["source"] == "schedule":
-            # неделя
-            if res["week"] == "week_1":
-                week_text = "1-ая неделя"
-            elif res["week"] == "week_2":
-                week_text = "2-ая неделя"
-            else:
-                week_text = "Сессия"
-
-            # форматируем инфо как в расписании
-            info_lines = [ln for ln in (res["info"] or "").split("\n") if ln.strip()]
-            subject = info_lines[0] if info_lines else ""
-            rest = "\n".join(info_lines[1:]) if len(info_lines) > 1 else ""
-
-            message += f"{week_text} - {res['day']}\n"
-            message += f"⏰ {res['time']}\n"
-            if res.get("subgroup"):
-                message += f"🔸 {res['subgroup']}\n"
-            if subject:
-                message += f"📚 *{subject}*\n"
-            if rest:
-                message += rest + "\n"
-            message += "\n"
-
-        elif res["source"] == "teacher":
-            message += f"👨‍🏫 Преподаватель: *{res['name']}*\n\n"
-
-    # Ограничение телеги
-    if len(message) > 4096:
-        for i in range(0, len(message), 4096):
-            await update.message.reply_text(message[i:i+4096], parse_mode="Markdown")
-    else:
-        await update.message.reply_text(message, parse_mode="Markdown")
+    text, markup = render_search_page(key, result, 0)
+    await update.message.reply_text(text, parse_mode="Markdown", reply_markup=markup)
+
+    logger.info(f"✅ {username} ({uid}) выполнил поиск: '{query}' -> найдено {result['count']} результатов.")
+
+
+async def search_page_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Листание результатов /search: страница берётся из кэша, поиск не повторяется"""
+    query = update.callback_query
+    uid = query.from_user.id
+    username = query.from_user.username or query.from_user.full_name
+
+    if not is_user_allowed(uid):
+        await query.answer("У вас нет доступа к использованию этого бота.", show_alert=True)
+        logger.warning(f"❌ {username} ({uid}) попытался листать /search без доступа.")
+        return
+
+    # callback вида search_<ключ>_<страница>
+    _, key, page = query.data.split("_")
+    result = search_cache.get(key)
+    if result is None:
+        await query.answer("Результаты устарели, повторите поиск.", show_alert=True)
+        return
 
-    logger.info(f"✅ {username} ({uid}) выполнил поиск: '{query}' -> найдено {len(results)} результатов.")
+    await query.answer()
+    text, markup = render_search_page(key, result, int(page))
+    await safe_edit_message(query, text, markup)
+    logger.info(f"✅ {username} ({uid}) открыл страницу {int(page) + 1} поиска '{result['query']}'.")
 
 # ---------------- /plan ----------------
 async def plan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -11,6 +11,40 @@ from .utils import safe_edit_message
 def escape_markdown(text: str) -> str:
     return text.replace('_', r'\_').replace('*', r'\*')
 
+def format_day(lessons: list) -> str:
+    """Пары одного дня, сгруппированные по времени"""
+    if not lessons:
+        return "Нет пар."
+
+    text = ""
+    # сгруппировать по времени
+    grouped = {}
+    order = []
+    for l in lessons:
+        t = l.get("time", "")
+        if t not in grouped:
+            grouped[t] = []
+            order.append(t)
+        grouped[t].append(l)
+    for t in order:
+        text += f"⏰{t}\n"
+        for entry in grouped[t]:
+            subgroup = entry.get("subgroup")
+            info_lines = [ln for ln in (entry.get("info") or "").split("\n") if ln.strip()]
+            subject = info_lines[0] if info_lines else ""
+            rest = "\n".join(info_lines[1:]) if len(info_lines) > 1 else ""
+            if subgroup:
+                text += f"🔸 {subgroup}\n"
+            if subject:
+                text += f"📚 *{subject}*\n"
+            if rest:
+                text += rest + "\n"
+            classroom = entry.get("classroom")
+            if classroom:
+                text += f"📍 {classroom}\n"
+            text += "\n"
+    return text
+
 async def week_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     uid = query.from_user.id
@@ -169,35 +203,7 @@ async def today_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     lessons = schedule.get(current_week, {}).get(day_name, [])
     text = f"📅 Сегодня ({date_str}, {day_name}):\n\n"
-    if lessons:
-        # сгруппировать по времени
-        grouped = {}
-        order = []
-        for l in lessons:
-            t = l.get("time", "")
-            if t not in grouped:
-                grouped[t] = []
-                order.append(t)
-            grouped[t].append(l)
-        for t in order:
-            text += f"⏰{t}\n"
-            for entry in grouped[t]:
-                subgroup = entry.get("subgroup")
-                info_lines = [ln for ln in (entry.get("info") or "").split("\n") if ln.strip()]
-                subject = info_lines[0] if info_lines else ""
-                rest = "\n".join(info_lines[1:]) if len(info_lines) > 1 else ""
-                if subgroup:
-                    text += f"🔸 {subgroup}\n"
-                if subject:
-                    text += f"📚 *{subject}*\n"
-                if rest:
-                    text += rest + "\n"
-                classroom = entry.get("classroom")
-                if classroom:
-                    text += f"📍 {classroom}\n"
-                text += "\n"
-    else:
-        text += "Нет пар."
+    text += format_day(lessons)
 
     await safe_edit_message(
         query,
@@ -227,34 +233,7 @@ async def tomorrow_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     lessons = schedule.get(week, {}).get(day_name, [])
     text = f"📅 Завтра ({date_str}, {day_name}):\n\n"
-    if lessons:
-        grouped = {}
-        order = []
-        for l in lessons:
-            t = l.get("time", "")
-            if t not in grouped:
-                grouped[t] = []
-                order.append(t)
-            grouped[t].append(l)
-        for t in order:
-            text += f"⏰{t}\n"
-            for entry in grouped[t]:
-                subgroup = entry.get("subgroup")
-                info_lines = [ln for ln in (entry.get("info") or "").split("\n") if ln.strip()]
-                subject = info_lines[0] if info_lines else ""
-                rest = "\n".join(info_lines[1:]) if len(info_lines) > 1 else ""
-                if subgroup:
-                    text += f"🔸 {subgroup}\n"
-                if subject:
-                    text += f"📚 *{subject}*\n"
-                if rest:
-                    text += rest + "\n"
-                classroom = entry.get("classroom")
-                if classroom:
-                    text += f"📍 {classroom}\n"
-                text += "\n"
-    else:
-        text += "Нет пар."
+    text += format_day(lessons)
 
     await safe_edit_message(
         query,
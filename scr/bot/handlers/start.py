@@ -1,13 +1,47 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+from cachetools import TTLCache
 from scr.core.stats import stats, save_stats, increment_user_commands, record_peak_usage, record_daily_active
 from scr.core.users import UserManager, get_user_role, is_user_allowed
-from scr.parsers.schedule_parser import get_current_week_and_day, fetch_schedule, get_current_and_next_lesson
+from scr.bot.welcome import welcome_board
 from scr.core.settings import OWNER_ID
 from scr.core.logger import logger
 
 users = UserManager(owner_id=OWNER_ID)
 
+# Кнопки главного меню: одинаковые для всех, создаются один раз
+MAIN_MENU = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("1 неделя", callback_data='week_1'),
+        InlineKeyboardButton("2 неделя", callback_data='week_2'),
+        InlineKeyboardButton("Сессия", callback_data='session')
+    ],
+    [
+        InlineKeyboardButton("Сегодня", callback_data='today'),
+        InlineKeyboardButton("Завтра", callback_data='tomorrow')
+    ],
+    [
+        InlineKeyboardButton("Преподаватели", callback_data='teachers_list')
+    ]
+])
+
+# Имя владельца для ответа неавторизованным: get_chat не на каждый /start
+owner_name_cache = TTLCache(maxsize=1, ttl=60 * 60)
+
+
+async def get_owner_username(bot) -> str:
+    name = owner_name_cache.get(OWNER_ID)
+    if name is None:
+        try:
+            owner_user = await bot.get_chat(OWNER_ID)
+        except Exception as e:
+            logger.error(f"Ошибка при получении информации о владельце: {e}")
+            return "администратору"
+        name = owner_name_cache[OWNER_ID] = (
+            f"@{owner_user.username}" if owner_user.username else owner_user.full_name
+        )
+    return name
+
 
 # /start
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -25,12 +59,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
     if not is_user_allowed(uid):
         logger.warning(f"❌ Неавторизованный пользователь {username} ({uid}) вызвал /start.")
-        try:
-            owner_user = await context.bot.get_chat(OWNER_ID)
-            owner_username = f"@{owner_user.username}" if owner_user.username else owner_user.full_name
-        except Exception as e:
-            logger.error(f"Ошибка при получении информации о владельце: {e}")
-            owner_username = "администратору"
+        owner_username = await get_owner_username(context.bot)
 
         await update.message.reply_text(
             f"Ваш ID: {uid}\n\n"
@@ -43,84 +72,10 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     role = get_user_role(uid)
     logger.info(f"✅ {username} ({uid}) [{role}] вызвал /start.")
 
-    # Получаем данные о дне и расписании
-    date_str, day_name, current_week = get_current_week_and_day()
-    schedule = await fetch_schedule(context.application)
-    current_lesson, time_until_current_end, next_lesson, time_until_next = get_current_and_next_lesson(
-        schedule, current_week, day_name
-    )
-    # Конец получения данных
-
-    week_text = "1-ая неделя" if current_week == 'week_1' else "2-ая неделя"
-    welcome_message = f"⏱️ Сегодня: {date_str}, {day_name}, {week_text}.\n\n"
-
-    if current_lesson:
-        info_lines = [ln for ln in (current_lesson.get("info") or "").split("\n") if ln.strip()]
-        subject = info_lines[0].replace('*', '').strip() if info_lines else "Без названия"
-        subgroup = current_lesson.get("subgroup", "")
-        classroom = current_lesson.get("classroom", "")
-        welcome_message += f"🎓 Сейчас идёт: *{subject}*\n"
-        if time_until_current_end is not None:
-            mins = time_until_current_end
-            hours, minutes = divmod(mins, 60)
-            if hours > 0:
-                end_str = f"{hours} ч {minutes} мин"
-            else:
-                end_str = f"{minutes} мин"
-            welcome_message += f"⏳ До конца: *{end_str}*\n"
-        if subgroup:
-            welcome_message += f"🔸 {subgroup}\n"
-        if classroom:
-            welcome_message += f"📍 {classroom}\n"
-        welcome_message += "\n"
-
-    else:
-        welcome_message += "🎓 Сейчас пар нет.\n\n"
-
-    # Всегда показываем следующую пару (если есть)
-    if next_lesson is not None and time_until_next is not None:
-        total_minutes = time_until_next
-        if total_minutes < 0:
-            pass
-        elif total_minutes == 0:
-            welcome_message += "🔜 Следующая пара *начинается сейчас*!\n\n"
-        else:
-            hours, minutes = divmod(total_minutes, 60)
-            if hours > 0:
-                time_str = f"{hours} ч {minutes} мин"
-            else:
-                time_str = f"{minutes} мин"
-            info_lines = [ln for ln in (next_lesson.get("info") or "").split("\n") if ln.strip()]
-            subject = info_lines[0].replace('*', '').strip() if info_lines else "Без названия"
-            subgroup = next_lesson.get("subgroup", "")
-            classroom = next_lesson.get("classroom", "")
-            welcome_message += f"🔜 Следующая пара через *{time_str}*:\n📚 *{subject}*\n"
-            if subgroup:
-                welcome_message += f"🔸 {subgroup}\n"
-            if classroom:
-                welcome_message += f"📍 {classroom}\n"
-            welcome_message += "\n"
-    elif not current_lesson:
-        welcome_message += "🔚 Сегодня больше пар нет.\n\n"
-
-    welcome_message += "💻 Разработчик @lssued\n\n🤖 https://github.com/Baillora"
-
-    keyboard = [
-        [
-            InlineKeyboardButton("1 неделя", callback_data='week_1'),
-            InlineKeyboardButton("2 неделя", callback_data='week_2'),
-            InlineKeyboardButton("Сессия", callback_data='session')
-        ],
-        [
-            InlineKeyboardButton("Сегодня", callback_data='today'),
-            InlineKeyboardButton("Завтра", callback_data='tomorrow')
-        ],
-        [
-            InlineKeyboardButton("Преподаватели", callback_data='teachers_list')
-        ]
-    ]
+    # Текст меню собирается раз в минуту фоновым тиком
+    welcome_message = await welcome_board.get(context.application)
 
-    await update.message.reply_text(welcome_message, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown")
+    await update.message.reply_text(welcome_message, reply_markup=MAIN_MENU, parse_mode="Markdown")
 
 
 # Хэндлер для кнопки "Назад"
@@ -136,87 +91,12 @@ async def back_to_week_handler(update: Update, context: ContextTypes.DEFAULT_TYP
 
     await query.answer()
 
-    # Получаем данные о дне и расписании
-    date_str, day_name, current_week = get_current_week_and_day()
-    schedule = await fetch_schedule(context.application)
-    current_lesson, time_until_current_end, next_lesson, time_until_next = get_current_and_next_lesson(
-        schedule, current_week, day_name
-    )
-    # Конец получения данных
-
-    week_text = "1-ая неделя" if current_week == 'week_1' else "2-ая неделя"
-    welcome_message = f"⏱️ Сегодня: {date_str}, {day_name}, {week_text}.\n\n"
-
-    if current_lesson:
-        info_lines = [ln for ln in (current_lesson.get("info") or "").split("\n") if ln.strip()]
-        subject = info_lines[0].replace('*', '').strip() if info_lines else "Без названия"
-        subgroup = current_lesson.get("subgroup", "")
-        classroom = current_lesson.get("classroom", "")
-        welcome_message += f"🎓 Сейчас идёт: *{subject}*\n"
-        if time_until_current_end is not None:
-            mins = time_until_current_end
-            hours, minutes = divmod(mins, 60)
-            if hours > 0:
-                end_str = f"{hours} ч {minutes} мин"
-            else:
-                end_str = f"{minutes} мин"
-            welcome_message += f"⏳ До конца: *{end_str}*\n"
-        if subgroup:
-            welcome_message += f"🔸 {subgroup}\n"
-        if classroom:
-            welcome_message += f"📍 {classroom}\n"
-        welcome_message += "\n"
-
-    else:
-        welcome_message += "🎓 Сейчас пар нет.\n\n"
-
-    # Всегда показываем следующую пару (если есть)
-    if next_lesson is not None and time_until_next is not None:
-        total_minutes = time_until_next
-        if total_minutes < 0:
-            pass
-        elif total_minutes == 0:
-            welcome_message += "🔜 Следующая пара *начинается сейчас*!\n\n"
-        else:
-            hours, minutes = divmod(total_minutes, 60)
-            if hours > 0:
-                time_str = f"{hours} ч {minutes} мин"
-            else:
-                time_str = f"{minutes} мин"
-            info_lines = [ln for ln in (next_lesson.get("info") or "").split("\n") if ln.strip()]
-            subject = info_lines[0].replace('*', '').strip() if info_lines else "Без названия"
-            subgroup = next_lesson.get("subgroup", "")
-            classroom = next_lesson.get("classroom", "")
-            welcome_message += f"🔜 Следующая пара через *{time_str}*:\n📚 *{subject}*\n"
-            if subgroup:
-                welcome_message += f"🔸 {subgroup}\n"
-            if classroom:
-                welcome_message += f"📍 {classroom}\n"
-            welcome_message += "\n"
-    elif not current_lesson:
-        welcome_message += "🔚 Сегодня больше пар нет.\n\n"
-
-    welcome_message += "💻 Разработчик @lssued\n\n🤖 https://github.com/Baillora"
-
-    keyboard = [
-        [
-            InlineKeyboardButton("1 неделя", callback_data='week_1'),
-            InlineKeyboardButton("2 неделя", callback_data='week_2'),
-            InlineKeyboardButton("Сессия", callback_data='session')
-        ],
-        [
-            InlineKeyboardButton("Сегодня", callback_data='today'),
-            InlineKeyboardButton("Завтра", callback_data='tomorrow')
-        ],
-        [
-            InlineKeyboardButton("Преподаватели", callback_data='teachers_list')
-        ]
-    ]
+    welcome_message = await welcome_board.get(context.application)
 
     try:
         await query.edit_message_text(
             text=welcome_message,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=MAIN_MENU,
             parse_mode="Markdown"
         )
         logger.info(f"✅ {username} ({uid}) вернулся в главное меню.")
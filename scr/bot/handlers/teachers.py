@@ -3,9 +3,9 @@ from telegram.ext import ContextTypes
 from scr.parsers.teacher_parser import (
     fetch_teachers,
     fetch_consultations_for_teacher,
-    fetch_pairs_for_teacher,
     teachers_cache,
 )
+from scr.parsers.teacher_crawler import teacher_crawler
 from scr.core.users import UserManager, is_user_allowed
 from scr.core.settings import OWNER_ID, RU_WEEKDAYS_ORDER
 from scr.core.logger import logger
@@ -123,8 +123,11 @@ async def teacher_pairs_handler(update: Update, context: ContextTypes.DEFAULT_TY
         logger.warning(f"❌ {username} ({uid}) запросил несуществующего преподавателя: {teacher_id}")
         return
 
-    # получить пары (парсер возвращает структуру {day: {"1": [], "2": []}})
-    pairs = await fetch_pairs_for_teacher(teacher_id)
+    # получить пары (парсер возвращает структуру {day: {"1": [], "2": []}}),
+    # заодно обновляются пары преподавателя в индексе /search
+    pairs = await teacher_crawler.refresh(teacher_id, teacher["name"])
+    if pairs is None:
+        pairs = {day: {"1": [], "2": []} for day in RU_WEEKDAYS_ORDER}
     teacher["pairs"] = pairs  # обновляем внутри кэша
 
     # Кнопки — дни + Все дни
@@ -0,0 +1,104 @@
+import time
+from functools import wraps
+from telegram.ext import ApplicationHandlerStop
+from telegram.request import HTTPXRequest
+from scr.core import metrics, events
+from scr.core.metrics import registry
+
+registry.describe("handler_latency_seconds", "Полное время обработки апдейта обработчиком")
+registry.describe("handler_phase_seconds", "Время обработки по фазам (auth, fetch, render, send)")
+registry.describe("telegram_api_errors_total", "Ошибки вызовов Telegram Bot API")
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest, засекающий вызовы Telegram Bot API как фазу "send" """
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        with metrics.phase("send"):
+            start = time.perf_counter()
+            try:
+                status, payload = await super().do_request(url, method, request_data, **kwargs)
+            except Exception:
+                registry.counter("telegram_api_requests_total", method=api_method, status="error").inc()
+                registry.counter("telegram_api_errors_total", method=api_method).inc()
+                raise
+            finally:
+                registry.histogram("telegram_api_latency_seconds", method=api_method).observe(
+                    time.perf_counter() - start
+                )
+        registry.counter("telegram_api_requests_total", method=api_method, status=str(status)).inc()
+        if status >= 400:
+            registry.counter("telegram_api_errors_total", method=api_method).inc()
+        return status, payload
+
+
+def timed_handler(callback):
+    """Оборачивает callback: общая задержка и время по фазам в гистограммы.
+
+    Фазы auth/fetch/send засекаются явно, остальное время считается "render".
+    """
+    name = getattr(callback, "__name__", type(callback).__name__)
+
+    @wraps(callback)
+    async def wrapper(update, context):
+        phases = {}
+        token = metrics.current_phases.set(phases)
+        events.start_update_context()
+        outcome = "ok"
+        start = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except ApplicationHandlerStop:
+            outcome = "stopped"
+            raise
+        except Exception:
+            outcome = "error"
+            registry.counter("handler_errors_total", handler=name).inc()
+            raise
+        finally:
+            total = time.perf_counter() - start
+            metrics.current_phases.reset(token)
+            events.handler_event(name, update, total, phases, outcome)
+            registry.histogram("handler_latency_seconds", handler=name).observe(total)
+            for phase_name, elapsed in phases.items():
+                registry.histogram("handler_phase_seconds", handler=name, phase=phase_name).observe(elapsed)
+            render = max(total - sum(phases.values()), 0.0)
+            registry.histogram("handler_phase_seconds", handler=name, phase="render").observe(render)
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_handlers(application):
+    """Оборачивает все зарегистрированные обработчики приложения"""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if not getattr(handler.callback, "instrumented", False):
+                handler.callback = timed_handler(handler.callback)
+
+
+def latency_summary():
+    """Сводка задержек по обработчикам (мс), отсортированная по p95"""
+    phases_by_handler = {}
+    for labels, hist in registry.collect("handler_phase_seconds"):
+        phases_by_handler.setdefault(labels["handler"], {})[labels["phase"]] = {
+            "p50": hist.quantile(0.5) * 1000,
+            "p95": hist.quantile(0.95) * 1000,
+        }
+
+    summary = []
+    for labels, hist in registry.collect("handler_latency_seconds"):
+        if not hist.count:
+            continue
+        summary.append({
+            "handler": labels["handler"],
+            "count": hist.count,
+            "avg": hist.sum / hist.count * 1000,
+            "p50": hist.quantile(0.5) * 1000,
+            "p95": hist.quantile(0.95) * 1000,
+            "p99": hist.quantile(0.99) * 1000,
+            "phases": phases_by_handler.get(labels["handler"], {}),
+        })
+    summary.sort(key=lambda item: item["p95"], reverse=True)
+    return summary
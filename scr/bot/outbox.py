@@ -0,0 +1,204 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from scr.core.settings import OUTBOX_RATE, OUTBOX_CHAT_INTERVAL, OUTBOX_MAX_RETRIES
+from scr.core.logger import logger
+from scr.core import metrics
+from scr.core.metrics import registry
+from scr.bot.instrumentation import InstrumentedRequest
+
+# Классы приоритета: меньше — важнее
+INTERACTIVE = 0   # ответы и правки сообщений на действия пользователя
+NOTIFY = 1        # уведомления владельцу
+BULK = 2          # рассылки
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NOTIFY: "notify", BULK: "bulk"}
+
+# Методы Bot API, на которые действуют лимиты Telegram на сообщения
+LIMITED_PREFIXES = ("send", "edit", "copy", "forward")
+
+# Сколько одновременных отправок держит send_bulk (остальные ждут своей очереди здесь)
+BULK_IN_FLIGHT = 50
+
+send_priority: ContextVar = ContextVar("send_priority", default=INTERACTIVE)
+
+registry.describe("outbox_wait_seconds", "Ожидание своей очереди в исходящей очереди Telegram")
+registry.describe("outbox_retry_after_total", "Ответы 429 RetryAfter от Telegram")
+
+
+@contextmanager
+def priority(level: int):
+    """Все отправки внутри блока идут с указанным приоритетом"""
+    token = send_priority.set(level)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class Outbox:
+    """Общая очередь исходящих сообщений.
+
+    Глобальная корзина токенов (OUTBOX_RATE в секунду) раздаётся ожидающим
+    по приоритету, уведомления и рассылки дополнительно идут не чаще раза
+    в OUTBOX_CHAT_INTERVAL секунд в один чат. После RetryAfter вся очередь
+    ждёт указанное Telegram время.
+    """
+
+    def __init__(self, rate: float = OUTBOX_RATE, chat_interval: float = OUTBOX_CHAT_INTERVAL):
+        self.rate = rate
+        self.burst = max(1.0, rate / 5)
+        self.chat_interval = chat_interval
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._waiters = []              # (приоритет, номер, future, chat_id)
+        self._seq = itertools.count()
+        self._chat_ready = {}           # chat_id -> monotonic, раньше которого в чат не отправлять
+        self._wakeup = None
+        self._task = None
+        self._loop = None
+
+    def pending(self) -> int:
+        return sum(1 for *_, fut, _ in self._waiters if not fut.done())
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, chat_id=None, level: int = None):
+        """Ждёт разрешения на одну отправку"""
+        level = send_priority.get() if level is None else level
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._dispatch())
+
+        fut = loop.create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), fut, chat_id))
+        self._wakeup.set()
+        started = time.perf_counter()
+        await fut
+        registry.histogram("outbox_wait_seconds", priority=PRIORITY_NAMES.get(level, str(level))).observe(
+            time.perf_counter() - started
+        )
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _pop_ready(self, now: float):
+        """Самый приоритетный ожидающий, чей чат уже можно беспокоить; иначе (None, время готовности)"""
+        deferred, found, next_ready = [], None, None
+        while self._waiters:
+            item = heapq.heappop(self._waiters)
+            level, _, fut, chat_id = item
+            if fut.done():
+                continue
+            ready_at = self._chat_ready.get(chat_id, 0.0) if level != INTERACTIVE else 0.0
+            if ready_at <= now:
+                found = item
+                break
+            deferred.append(item)
+            next_ready = ready_at if next_ready is None else min(next_ready, ready_at)
+        for item in deferred:
+            heapq.heappush(self._waiters, item)
+        return found, next_ready
+
+    async def _sleep(self, seconds: float):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=max(seconds, 0.001))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch(self):
+        while True:
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+
+            self._refill(now)
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+
+            item, next_ready = self._pop_ready(now)
+            if item is None:
+                if next_ready is not None:
+                    # новые ожидающие (например, интерактивные) разбудят раньше
+                    await self._sleep(next_ready - now)
+                continue
+
+            level, _, fut, chat_id = item
+            self.tokens -= 1
+            if chat_id is not None:
+                self._chat_ready[chat_id] = now + self.chat_interval
+                if len(self._chat_ready) > 10_000:
+                    self._chat_ready = {k: v for k, v in self._chat_ready.items() if v > now}
+            fut.set_result(None)
+
+
+outbox = Outbox()
+
+
+class OutboxRequest(InstrumentedRequest):
+    """Отправка сообщений через общую очередь с повтором после RetryAfter"""
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        if not api_method.startswith(LIMITED_PREFIXES):
+            return await super().do_request(url, method, request_data, **kwargs)
+
+        chat_id = request_data.parameters.get("chat_id") if request_data else None
+        for attempt in range(OUTBOX_MAX_RETRIES + 1):
+            with metrics.phase("send"):
+                await outbox.acquire(chat_id)
+            status, payload = await super().do_request(url, method, request_data, **kwargs)
+            if status != 429 or attempt == OUTBOX_MAX_RETRIES:
+                return status, payload
+
+            retry_after = _retry_after(payload)
+            registry.counter("outbox_retry_after_total", method=api_method).inc()
+            logger.warning(f"⏳ Telegram просит подождать {retry_after} с ({api_method}, чат {chat_id})")
+            outbox.pause(retry_after)
+        return status, payload
+
+
+def _retry_after(payload: bytes) -> float:
+    try:
+        return float(json.loads(payload)["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return 1.0
+
+
+async def send_bulk(bot, chat_ids, text: str, level: int = BULK, **kwargs):
+    """Отправляет text всем chat_ids так быстро, как позволяет очередь.
+
+    Возвращает (число успешных, список id с ошибкой).
+    """
+    in_flight = asyncio.Semaphore(BULK_IN_FLIGHT)
+    failed = []
+
+    async def send_one(chat_id):
+        async with in_flight:
+            try:
+                await bot.send_message(chat_id=int(chat_id), text=text, **kwargs)
+                return True
+            except Exception as e:
+                logger.warning(f"Не удалось отправить сообщение пользователю {chat_id}: {e}")
+                failed.append(chat_id)
+                return False
+
+    with priority(level):
+        results = await asyncio.gather(*(send_one(chat_id) for chat_id in chat_ids))
+    return sum(results), failed
@@ -0,0 +1,134 @@
+import asyncio
+import datetime
+import time
+from scr.core.logger import logger
+from scr.parsers import schedule_parser
+from scr.parsers.schedule_parser import (
+    get_current_week_and_day, fetch_schedule, get_current_and_next_lesson, schedule_cache,
+)
+
+FOOTER = "💻 Разработчик @lssued\n\n🤖 https://github.com/Baillora"
+
+
+def _duration(total_minutes: int) -> str:
+    hours, minutes = divmod(total_minutes, 60)
+    if hours > 0:
+        return f"{hours} ч {minutes} мин"
+    return f"{minutes} мин"
+
+
+def _subject(lesson: dict) -> str:
+    info_lines = [ln for ln in (lesson.get("info") or "").split("\n") if ln.strip()]
+    return info_lines[0].replace('*', '').strip() if info_lines else "Без названия"
+
+
+def render_welcome(schedule, now: int = None) -> str:
+    """Текст главного меню: дата, неделя, текущая и следующая пара (now — минуты от начала суток)"""
+    date_str, day_name, current_week = get_current_week_and_day()
+    current_lesson, time_until_current_end, next_lesson, time_until_next = get_current_and_next_lesson(
+        schedule, current_week, day_name, now
+    )
+
+    week_text = "1-ая неделя" if current_week == 'week_1' else "2-ая неделя"
+    welcome_message = f"⏱️ Сегодня: {date_str}, {day_name}, {week_text}.\n\n"
+
+    if current_lesson:
+        subgroup = current_lesson.get("subgroup", "")
+        classroom = current_lesson.get("classroom", "")
+        welcome_message += f"🎓 Сейчас идёт: *{_subject(current_lesson)}*\n"
+        if time_until_current_end is not None:
+            welcome_message += f"⏳ До конца: *{_duration(time_until_current_end)}*\n"
+        if subgroup:
+            welcome_message += f"🔸 {subgroup}\n"
+        if classroom:
+            welcome_message += f"📍 {classroom}\n"
+        welcome_message += "\n"
+
+    else:
+        welcome_message += "🎓 Сейчас пар нет.\n\n"
+
+    # Всегда показываем следующую пару (если есть)
+    if next_lesson is not None and time_until_next is not None:
+        if time_until_next < 0:
+            pass
+        elif time_until_next == 0:
+            welcome_message += "🔜 Следующая пара *начинается сейчас*!\n\n"
+        else:
+            subgroup = next_lesson.get("subgroup", "")
+            classroom = next_lesson.get("classroom", "")
+            welcome_message += (
+                f"🔜 Следующая пара через *{_duration(time_until_next)}*:\n📚 *{_subject(next_lesson)}*\n"
+            )
+            if subgroup:
+                welcome_message += f"🔸 {subgroup}\n"
+            if classroom:
+                welcome_message += f"📍 {classroom}\n"
+            welcome_message += "\n"
+    elif not current_lesson:
+        welcome_message += "🔚 Сегодня больше пар нет.\n\n"
+
+    return welcome_message + FOOTER
+
+
+class WelcomeHeader:
+    """Готовый текст меню на одну минуту; после публикации не изменяется"""
+
+    __slots__ = ("text", "version", "expires")
+
+    def __init__(self, text: str, version: int, expires: float):
+        self.text = text
+        self.version = version    # версия расписания, из которой собран текст
+        self.expires = expires    # time.time() начала следующей минуты
+
+
+class WelcomeBoard:
+    """Раз в минуту пересобирает текст меню; /start и "Назад" только читают готовый"""
+
+    def __init__(self):
+        self.header = None
+        self.task = None
+
+    def refresh(self, schedule) -> WelcomeHeader:
+        now = datetime.datetime.now()
+        minute_start = now.replace(second=0, microsecond=0)
+        header = WelcomeHeader(
+            render_welcome(schedule, now.hour * 60 + now.minute),
+            schedule_parser.schedule_version,
+            (minute_start + datetime.timedelta(minutes=1)).timestamp(),
+        )
+        self.header = header  # замена ссылки: читатели видят старый или новый текст целиком
+        return header
+
+    async def get(self, application) -> str:
+        header = self.header
+        if header is None or header.version != schedule_parser.schedule_version or time.time() >= header.expires:
+            # тик ещё не прошёл (старт, задержка loop) или расписание обновилось — собираем сами
+            header = self.refresh(await fetch_schedule(application))
+        return header.text
+
+    async def run(self, application):
+        """Тик в начале каждой минуты; истёкший кэш расписания заодно загружается заново"""
+        while True:
+            try:
+                # кэш читается напрямую: тик не должен писать в лог и метрики попаданий раз в минуту
+                schedule = schedule_cache if schedule_cache else await fetch_schedule(application)
+                self.refresh(schedule)
+            except Exception as e:
+                logger.error(f"Ошибка обновления главного меню: {e}")
+            expires = self.header.expires if self.header else time.time() + 60
+            await asyncio.sleep(max(expires - time.time(), 1))
+
+    def stop(self):
+        """Отменяет тик (при остановке бота)"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+welcome_board = WelcomeBoard()
+
+
+def start_welcome_board(application):
+    # как и обход преподавателей: задача создаётся до запуска приложения, отменяется в shutdown
+    if welcome_board.task is None:
+        welcome_board.task = asyncio.create_task(welcome_board.run(application))
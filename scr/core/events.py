@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import json
+import logging
+import statistics
+import sys
+from itertools import count
+from logging.handlers import RotatingFileHandler
+import structlog
+from structlog.contextvars import bind_contextvars, clear_contextvars, merge_contextvars
+from scr.core.settings import EVENTS_LOG_FILE, EVENTS_SAMPLE_RATES
+from scr.core.logger import BoundedQueueHandler
+
+# Уровни, которые пишутся всегда, независимо от сэмплирования
+ALWAYS_KEEP = {"warning", "error", "critical", "exception"}
+
+
+def parse_rates(spec: str) -> dict:
+    """Строка "handler=0.25,flood=0.5" -> {"handler": 0.25, "flood": 0.5}"""
+    rates = {}
+    for item in spec.split(","):
+        name, _, value = item.strip().partition("=")
+        if name and value:
+            rates[name.strip()] = min(max(float(value), 0.0), 1.0)
+    return rates
+
+
+SAMPLE_RATES = parse_rates(EVENTS_SAMPLE_RATES)
+_sequence = count()
+
+
+def keep_event(event: str, key, rate: float) -> bool:
+    """Детерминированное решение: одно и то же (событие, ключ) всегда попадает или не попадает в выборку"""
+    digest = hashlib.blake2b(f"{event}:{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < rate * 2 ** 64
+
+
+def sample(logger, method_name, event_dict):
+    """Процессор structlog: пропускает только долю rate INFO-событий, ошибки — всегда"""
+    key = event_dict.pop("sample_key", None)
+    if method_name in ALWAYS_KEEP:
+        return event_dict
+    rate = SAMPLE_RATES.get(event_dict["event"], 1.0)
+    if rate >= 1.0:
+        return event_dict
+    if key is None:
+        key = next(_sequence)  # без ключа — каждое 1/rate-е событие
+    if not keep_event(event_dict["event"], key, rate):
+        raise structlog.DropEvent
+    event_dict["sample_rate"] = rate  # для пересчёта количества при анализе
+    return event_dict
+
+
+def _setup_events_logger():
+    """Отдельный stdlib-логгер для JSON-событий: свой файл, та же очередь, что у основного лога"""
+    file_handler = RotatingFileHandler(
+        EVENTS_LOG_FILE,
+        maxBytes=5 * 1024 * 1024,
+        backupCount=5,
+        encoding="utf-8",
+        delay=True,
+    )
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    events_logger = logging.getLogger("bot.events")
+    for handler in events_logger.handlers[:]:
+        handler.close()
+        events_logger.removeHandler(handler)
+    events_logger.addHandler(BoundedQueueHandler([file_handler]))
+    events_logger.setLevel(logging.INFO)
+    events_logger.propagate = False  # в консоль и warning.log события не дублируются
+    return events_logger
+
+
+events = structlog.wrap_logger(
+    _setup_events_logger(),
+    wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+    processors=[
+        merge_contextvars,
+        structlog.processors.add_log_level,
+        sample,
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.format_exc_info,
+        structlog.processors.JSONRenderer(ensure_ascii=False),
+    ],
+)
+
+
+def annotate(**fields):
+    """Добавляет поля к событиям текущего апдейта (например, cache_schedule="hit")"""
+    bind_contextvars(**fields)
+
+
+def start_update_context():
+    """Сбрасывает поля прошлого апдейта (при последовательной обработке контекст общий)"""
+    clear_contextvars()
+
+
+def handler_event(handler: str, update, duration: float, phases: dict, outcome: str = "ok"):
+    """Событие "handler": одно на каждый вызов обработчика"""
+    user = getattr(update, "effective_user", None)
+    fields = {
+        "handler": handler,
+        "user_id": user.id if user else None,
+        "duration_ms": round(duration * 1000, 3),
+        "phases_ms": {name: round(value * 1000, 3) for name, value in phases.items()},
+        "outcome": outcome,
+        "sample_key": getattr(update, "update_id", None),
+    }
+    if outcome == "error":
+        events.error("handler", **fields)
+    else:
+        events.info("handler", **fields)
+
+
+# ---------------- Анализ ----------------
+
+def read_events(paths):
+    """JSON-события из файлов; битые строки пропускаются"""
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def _quantile(values, q):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q * 100) - 1]
+
+
+def analyze(records) -> list:
+    """Сводка по обработчикам: оценка числа вызовов (с учётом sample_rate), ошибки, задержки, кэш"""
+    by_handler = {}
+    for record in records:
+        if record.get("event") != "handler":
+            continue
+        item = by_handler.setdefault(record.get("handler", "?"), {
+            "estimated": 0.0, "sampled": 0, "errors": 0, "durations": [], "cache_hits": 0, "cache_total": 0,
+        })
+        item["estimated"] += 1 / record.get("sample_rate", 1.0)
+        item["sampled"] += 1
+        if record.get("outcome") == "error":
+            item["errors"] += 1
+        item["durations"].append(record.get("duration_ms", 0.0))
+        for key, value in record.items():
+            if key.startswith("cache_"):
+                item["cache_total"] += 1
+                item["cache_hits"] += value == "hit"
+
+    summary = []
+    for handler, item in by_handler.items():
+        durations = sorted(item["durations"])
+        summary.append({
+            "handler": handler,
+            "count": round(item["estimated"]),
+            "sampled": item["sampled"],
+            "errors": item["errors"],
+            "p50": _quantile(durations, 0.5),
+            "p95": _quantile(durations, 0.95),
+            "p99": _quantile(durations, 0.99),
+            "max": durations[-1],
+            "cache_hit_ratio": item["cache_hits"] / item["cache_total"] if item["cache_total"] else None,
+        })
+    summary.sort(key=lambda row: row["count"], reverse=True)
+    return summary
+
+
+def main(argv=None):
+    # python -m scr.core.events events.log events.log.1
+    parser = argparse.ArgumentParser(description="Сводка по обработчикам из JSON-событий")
+    parser.add_argument("paths", nargs="*", default=[str(EVENTS_LOG_FILE)])
+    parser.add_argument("--json", action="store_true", help="вывести сводку в JSON")
+    args = parser.parse_args(argv)
+
+    summary = analyze(read_events(args.paths))
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+    if not summary:
+        print("Событий handler не найдено")
+        return
+
+    print(f"{'обработчик':<32} {'вызовов':>8} {'в выборке':>9} {'ошибок':>7} "
+          f"{'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} {'max мс':>8} {'кэш':>6}")
+    for row in summary:
+        cache = f"{row['cache_hit_ratio']:.0%}" if row["cache_hit_ratio"] is not None else "—"
+        print(f"{row['handler']:<32} {row['count']:>8} {row['sampled']:>9} {row['errors']:>7} "
+              f"{row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f} {row['max']:>8.1f} {cache:>6}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import base64
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """Приблизительный счётчик уникальных значений (HyperLogLog).
+
+    Память фиксирована: 2**p байт (p=12 -> 4 КБ) при любом числе пользователей,
+    стандартная ошибка ≈ 1.04 / sqrt(2**p) (≈1.6% для p=12).
+    Скетчи одного размера объединяются через merge().
+    Интерфейс повторяет нужную часть set: add(), update(), len().
+    """
+
+    def __init__(self, p: int = 12, registers: bytes = None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError("Размер регистров не совпадает с p")
+        self._estimate = None
+
+    # ---------------- Добавление ----------------
+    def add(self, value):
+        # hash() для str случаен между запусками, поэтому используем стабильный хэш
+        digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+        h = int.from_bytes(digest, "big")
+        idx = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+            self._estimate = None
+
+    def update(self, values):
+        if isinstance(values, HyperLogLog):
+            self.merge(values)
+            return
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog"):
+        if other.p != self.p:
+            raise ValueError("Нельзя объединить скетчи разного размера")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        self._estimate = None
+
+    # ---------------- Оценка ----------------
+    @property
+    def error(self) -> float:
+        """Относительная стандартная ошибка оценки"""
+        return 1.04 / math.sqrt(self.m)
+
+    def count(self) -> float:
+        if self._estimate is None:
+            m = self.m
+            alpha = 0.7213 / (1 + 1.079 / m)
+            total = math.fsum(2.0 ** -r for r in self.registers)
+            estimate = alpha * m * m / total
+            zeros = self.registers.count(0)
+            if estimate <= 2.5 * m and zeros:
+                # поправка для малых значений (linear counting)
+                estimate = m * math.log(m / zeros)
+            self._estimate = estimate
+        return self._estimate
+
+    def __len__(self) -> int:
+        return int(round(self.count()))
+
+    # ---------------- Сериализация ----------------
+    def to_str(self) -> str:
+        return f"hll{self.p}:" + base64.b64encode(bytes(self.registers)).decode("ascii")
+
+    @classmethod
+    def from_str(cls, data: str) -> "HyperLogLog":
+        header, payload = data.split(":", 1)
+        return cls(p=int(header[3:]), registers=base64.b64decode(payload))
+
+    @staticmethod
+    def is_serialized(data) -> bool:
+        return isinstance(data, str) and data.startswith("hll")
@@ -1,13 +1,73 @@
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
-from scr.core.settings import LOG_FILE
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from scr.core.settings import LOG_FILE, LOG_QUEUE_SIZE
+from scr.core.metrics import registry
+
+# При такой заполненности очереди DEBUG-записи отбрасываются сразу
+DEBUG_DROP_FILL = 0.5
+# а INFO — при такой: остаток очереди — запас для WARNING и выше
+INFO_DROP_FILL = 0.9
+
+registry.describe("log_records_dropped_total", "Записи лога, отброшенные из-за переполнения очереди")
+
 
 class TelegramFilter(logging.Filter):
     def filter(self, record):
         return "https://api.telegram.org" not in record.getMessage()
 
-def setup_logger():
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # очередь ограничена: ждём места, а не теряем сигнал остановки
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Кладёт записи в ограниченную очередь; форматирование и запись — в потоке слушателя.
+
+    Под нагрузкой DEBUG отбрасываются первыми, затем INFO; для WARNING и выше
+    остаётся запас очереди, но и они отбрасываются, если она заполнена целиком:
+    запись вызывается из loop бота и не должна его блокировать.
+    """
+
+    def __init__(self, handlers, maxsize: int = LOG_QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.listener = _Listener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Очередь внутри процесса: запись не нужно сериализовать, поэтому
+        # форматирование (и traceback) остаются потоку слушателя
+        return record
+
+    def enqueue(self, record):
+        q = self.queue
+        if record.levelno <= logging.DEBUG and q.qsize() >= q.maxsize * DEBUG_DROP_FILL:
+            self._drop(record)
+            return
+        if record.levelno < logging.WARNING and q.qsize() >= q.maxsize * INFO_DROP_FILL:
+            self._drop(record)
+            return
+        try:
+            q.put_nowait(record)
+        except queue.Full:
+            self._drop(record)
+
+    def _drop(self, record):
+        registry.counter("log_records_dropped_total", level=record.levelname).inc()
+
+    def close(self):
+        """Дописывает очередь и закрывает файл/консоль"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+        super().close()
+
+
+def setup_logger(queued: bool = True):
     formatter = logging.Formatter(
         "%(asctime)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
@@ -32,13 +92,18 @@ def setup_logger():
         handler.close()
         root_logger.removeHandler(handler)
 
+    handlers = [console_handler, file_handler]
+    if queued:
+        # обработчики бота только кладут запись в очередь, I/O и ротация — в отдельном потоке
+        handlers = [BoundedQueueHandler(handlers)]
+
     logging.basicConfig(
         level=logging.INFO,
-        handlers=[console_handler, file_handler],
+        handlers=handlers,
         force=True
     )
 
     return logging.getLogger("bot")
 
 # Инициализация при импорте
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
@@ -0,0 +1,89 @@
+import logging
+import os
+import re
+
+# Начало записи лога: "2024-01-01 12:00:00 - LEVEL - сообщение" (формат из scr.core.logger)
+RECORD_START = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} - ([A-Z]+) - ")
+
+BLOCK_SIZE = 64 * 1024
+BACKUP_COUNT = 5  # как у RotatingFileHandler в scr.core.logger
+
+
+def reverse_lines(path, block_size: int = BLOCK_SIZE):
+    """Строки файла от последней к первой; файл читается блоками с конца"""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        first = True
+        while pos > 0:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            parts = (f.read(size) + tail).split(b"\n")
+            # первая часть может быть обрезана — склеится со следующим блоком
+            tail = parts.pop(0)
+            for raw in reversed(parts):
+                if first and not raw:
+                    first = False  # перевод строки в конце файла
+                    continue
+                first = False
+                yield raw.rstrip(b"\r").decode("utf-8", errors="replace")
+        if tail:
+            yield tail.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+def log_files(path, backups: int = BACKUP_COUNT):
+    """Текущий лог и ротированные копии, от новых к старым"""
+    yield path
+    for i in range(1, backups + 1):
+        yield f"{path}.{i}"
+
+
+def reverse_records(path, backups: int = BACKUP_COUNT):
+    """Записи лога (уровень, строки) от новых к старым, включая ротированные файлы.
+
+    Многострочные записи (traceback) собираются целиком: строки продолжения
+    относятся к ближайшей строке-заголовку выше.
+    """
+    for file_path in log_files(path, backups):
+        pending = []
+        for line in reverse_lines(file_path):
+            pending.append(line)
+            match = RECORD_START.match(line)
+            if match:
+                yield match.group(1), pending[::-1]
+                pending = []
+        if pending:
+            # начало файла без заголовка — хвост записи из более старого файла
+            yield None, pending[::-1]
+
+
+def tail(path, max_lines: int = 50, level: str = None, contains: str = None,
+         backups: int = BACKUP_COUNT) -> list:
+    """Последние max_lines строк лога (по порядку записи) с фильтрами.
+
+    level — минимальный уровень ("ERROR" покажет ERROR и CRITICAL),
+    contains — подстрока без учёта регистра. Память — O(max_lines), файл
+    читается с конца ровно настолько, насколько нужно.
+    """
+    min_level = logging.getLevelName(level.upper()) if level else None
+    if not isinstance(min_level, int):
+        min_level = None
+    needle = contains.lower() if contains else None
+
+    lines = []
+    for record_level, record in reverse_records(path, backups):
+        if min_level is not None:
+            value = logging.getLevelName(record_level) if record_level else None
+            if not isinstance(value, int) or value < min_level:
+                continue
+        if needle and not any(needle in line.lower() for line in record):
+            continue
+        lines.extend(reversed(record))
+        if len(lines) >= max_lines:
+            break
+    return lines[:max_lines][::-1]
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as StackCounter, deque
+from datetime import datetime
+from scr.core.settings import (
+    BASE_DIR, LOOP_MONITOR_INTERVAL, LOOP_BLOCK_THRESHOLD, LOOP_STACK_SAMPLE_INTERVAL, LOOP_BLOCK_LOG_COOLDOWN,
+)
+from scr.core.logger import logger
+from scr.core.metrics import registry, LATENCY_BUCKETS
+
+registry.describe("event_loop_lag_seconds", "Последняя измеренная задержка event loop бота")
+registry.describe("event_loop_blocks_total", "Блокировки event loop дольше порога, по месту в коде")
+registry.describe("event_loop_block_seconds", "Длительность блокировок event loop")
+
+# Глубина сохраняемого стека
+STACK_DEPTH = 20
+PROJECT_ROOT = str(BASE_DIR)
+
+
+class LoopWatchdog:
+    """Следит за event loop бота.
+
+    Корутина heartbeat() просыпается каждые interval секунд и меряет задержку.
+    Отдельный поток замечает, что heartbeat давно не отмечался, и, пока loop
+    заблокирован, снимает стек его потока каждые sample_interval секунд.
+    Самый частый стек за блокировку уходит в лог и метрики.
+    """
+
+    def __init__(self, interval=LOOP_MONITOR_INTERVAL, threshold=LOOP_BLOCK_THRESHOLD,
+                 sample_interval=LOOP_STACK_SAMPLE_INTERVAL, log_cooldown=LOOP_BLOCK_LOG_COOLDOWN):
+        self.interval = interval
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.log_cooldown = log_cooldown
+        self.recent_blocks = deque(maxlen=50)
+        self._loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_logged = {}
+        self.task = None
+
+    # ---------- Внутри event loop ----------
+    async def heartbeat(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        gauge = registry.gauge("event_loop_lag_seconds")
+        hist = registry.histogram("event_loop_lag_distribution_seconds", buckets=LATENCY_BUCKETS)
+        while True:
+            self._last_beat = time.monotonic()
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            gauge.set(lag)
+            hist.observe(lag)
+
+    # ---------- Поток-наблюдатель ----------
+    def start_thread(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Отменяет heartbeat и останавливает поток-наблюдатель (при остановке бота)"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _blocked_for(self) -> float:
+        return time.monotonic() - self._last_beat - self.interval
+
+    def _watch(self):
+        while not self._stop.wait(self.sample_interval):
+            if self._loop_thread_id is None or self._blocked_for() < self.threshold:
+                continue
+
+            beat = self._last_beat
+            samples = StackCounter()
+            while self._last_beat == beat and not self._stop.is_set():
+                stack = self.sample_stack()
+                if stack:
+                    samples[stack] += 1
+                self._stop.wait(self.sample_interval)
+
+            self.report(time.monotonic() - beat - self.interval, samples)
+
+    def sample_stack(self):
+        """Стек потока event loop как кортеж (файл, номер строки, функция, код)"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        return tuple(
+            (fs.filename, fs.lineno, fs.name, fs.line)
+            for fs in traceback.extract_stack(frame, limit=STACK_DEPTH)
+        )
+
+    def report(self, duration: float, samples: StackCounter):
+        """Публикует блокировку: метрики всегда, лог — не чаще раза в log_cooldown на место"""
+        stack, hits = samples.most_common(1)[0] if samples else ((), 0)
+        location = _location(stack)
+
+        registry.counter("event_loop_blocks_total", location=location).inc()
+        registry.histogram("event_loop_block_seconds", buckets=LATENCY_BUCKETS).observe(duration)
+        self.recent_blocks.append({
+            "time": datetime.now().strftime("%d.%m %H:%M:%S"),
+            "duration_ms": duration * 1000,
+            "location": location,
+            "samples": sum(samples.values()),
+        })
+
+        now = time.monotonic()
+        if now - self._last_logged.get(location, -self.log_cooldown) < self.log_cooldown:
+            return
+        self._last_logged[location] = now
+        formatted = "".join(traceback.format_list(list(stack))) if stack else "  (стек не снят)\n"
+        logger.warning(
+            f"🐢 Event loop заблокирован на {duration * 1000:.0f} мс в {location} "
+            f"({hits} из {sum(samples.values())} снимков):\n{formatted}"
+        )
+
+
+def _location(stack) -> str:
+    """Самый глубокий кадр из кода проекта (или просто самый глубокий)"""
+    for filename, lineno, name, _ in reversed(stack):
+        if filename.startswith(PROJECT_ROOT) and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{lineno} {name}"
+    if stack:
+        filename, lineno, name, _ = stack[-1]
+        return f"{os.path.basename(filename)}:{lineno} {name}"
+    return "unknown"
+
+
+watchdog = LoopWatchdog()
+
+
+def start_loop_monitor(application):
+    """Запускает heartbeat в loop бота и поток-наблюдатель"""
+    # как и обход преподавателей: задача создаётся в post_init, отменяется в shutdown
+    if watchdog.task is None:
+        watchdog.task = asyncio.create_task(watchdog.heartbeat())
+    watchdog.start_thread()
@@ -0,0 +1,227 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from functools import wraps
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Границы корзин гистограмм задержек (секунды)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами: observe() — O(log n) без аллокаций"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя корзина — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля линейной интерполяцией внутри корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class MetricsRegistry:
+    """Хранилище метрик процесса (в памяти). Метрика = имя + набор меток."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, text: str):
+        """Описание метрики для строки # HELP"""
+        self._help[name] = text
+
+    def _get(self, factory, name: str, labels: dict):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, factory())
+        return metric
+
+    def histogram(self, name: str, buckets=LATENCY_BUCKETS, **labels) -> Histogram:
+        return self._get(lambda: Histogram(buckets), name, labels)
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        return self._get(Gauge, name, labels)
+
+    def collect(self, name: str):
+        """Список (метки, метрика) для всех метрик с данным именем"""
+        return [
+            (dict(labels), metric)
+            for (metric_name, labels), metric in list(self._metrics.items())
+            if metric_name == name
+        ]
+
+
+    def render_prometheus(self, prefix: str = "bot_") -> str:
+        """Все метрики в текстовом формате Prometheus (только из памяти)"""
+        by_name = {}
+        for (name, labels), metric in list(self._metrics.items()):
+            by_name.setdefault(name, []).append((labels, metric))
+
+        lines = []
+        for name in sorted(by_name):
+            series = by_name[name]
+            full = prefix + name
+            kind = {Histogram: "histogram", Counter: "counter", Gauge: "gauge"}[type(series[0][1])]
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, metric in sorted(series, key=lambda item: item[0]):
+                if kind != "histogram":
+                    lines.append(f"{full}{_labels(labels)} {_value(metric.value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), list(metric.counts)):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _value(bound)
+                    lines.append(f"{full}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{full}_sum{_labels(labels)} {_value(metric.sum)}")
+                lines.append(f"{full}_count{_labels(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def process_rss_bytes():
+    """Резидентная память процесса (байты) или None, если узнать не удалось"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+        except Exception:
+            return None
+        return None
+
+    try:
+        import resource
+        # ru_maxrss — пиковое значение (КБ в Linux, байты в macOS)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+    except Exception:
+        return None
+
+
+registry = MetricsRegistry()
+
+# Время по фазам текущего обработчика (заполняется обёрткой из scr.bot.instrumentation)
+current_phases: ContextVar = ContextVar("current_phases", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Засекает фазу обработки (auth, fetch, send, ...) текущего обработчика"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = current_phases.get()
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def timed_phase(name: str):
+    """Декоратор: время выполнения функции (обычной или async) идёт в фазу name"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with phase(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
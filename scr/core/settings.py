@@ -24,16 +24,104 @@ PANEL_PASS = os.getenv("PANEL_PASS", "admin")
 SSL_CERT = os.getenv("SSL_CERT", "self_signed.crt")
 SSL_KEY = os.getenv("SSL_KEY", "self_signed.key")
 
+
+def resolve_ssl_files():
+    """Абсолютные пути (сертификат, ключ), если оба файла существуют, иначе None"""
+    cert_path = SSL_CERT if os.path.isabs(SSL_CERT) else os.path.join(os.getcwd(), SSL_CERT)
+    key_path = SSL_KEY if os.path.isabs(SSL_KEY) else os.path.join(os.getcwd(), SSL_KEY)
+    if os.path.exists(cert_path) and os.path.exists(key_path):
+        return cert_path, key_path
+    return None
+
+
+# Режим получения апдейтов: "polling" (по умолчанию) или "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")              # внешний адрес, например https://example.com:8443
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))   # Telegram принимает 443, 80, 88 и 8443
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")        # пустой — генерируется при запуске
+
 # 2FA
 TOTP_SECRET = os.getenv("TOTP_SECRET", "")
 
+# Сколько апдейтов обрабатывать одновременно (апдейты одного чата — всегда по очереди).
+# 1 — последовательная обработка, как раньше
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "32"))
+
+# Флуд-контроль: запросов в секунду на пользователя и допустимый всплеск,
+# отдельно для тяжёлых команд (поиск, страницы преподавателей, логи)
+FLOOD_USER_RATE = float(os.getenv("FLOOD_USER_RATE", "1"))
+FLOOD_USER_BURST = float(os.getenv("FLOOD_USER_BURST", "8"))
+FLOOD_HEAVY_RATE = float(os.getenv("FLOOD_HEAVY_RATE", "0.2"))
+FLOOD_HEAVY_BURST = float(os.getenv("FLOOD_HEAVY_BURST", "3"))
+# Inline-запросы приходят на каждое нажатие клавиши и отвечаются из кэша — свой, щедрый лимит
+FLOOD_INLINE_RATE = float(os.getenv("FLOOD_INLINE_RATE", "5"))
+FLOOD_INLINE_BURST = float(os.getenv("FLOOD_INLINE_BURST", "30"))
+
+# Исходящая очередь: сообщений в секунду на весь бот (лимит Telegram ~30),
+# интервал между рассылочными сообщениями в один чат и число повторов после RetryAfter
+OUTBOX_RATE = float(os.getenv("OUTBOX_RATE", "25"))
+OUTBOX_CHAT_INTERVAL = float(os.getenv("OUTBOX_CHAT_INTERVAL", "1"))
+OUTBOX_MAX_RETRIES = int(os.getenv("OUTBOX_MAX_RETRIES", "5"))
+
+# Токен для /metrics панели (Prometheus). Пустой — эндпоинт отключён
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # Файлы данных
 ALLOWED_USERS_FILE = BASE_DIR / "allowed_users.json"
 STATS_FILE = BASE_DIR / "stats.json"
 LOG_FILE = BASE_DIR / "warning.log"
+EVENTS_LOG_FILE = BASE_DIR / "events.log"  # структурированные JSON-события
+DB_FILE = BASE_DIR / "bot.db"  # используется при STORAGE_BACKEND=sqlite
+BROADCASTS_FILE = BASE_DIR / "broadcasts.json"  # состояние фоновых рассылок
+
+# Хранилище пользователей и статистики: "json" (по умолчанию) или "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json").strip().lower()
+
+# Отложенная запись статистики: не реже чем раз в N секунд (окно возможной потери)
+STATS_FLUSH_INTERVAL = float(os.getenv("STATS_FLUSH_INTERVAL", "5"))
+
+# Хранение активности: полные списки пользователей за последние N дней,
+# дальше — только количество за день (и недельные/месячные сводки)
+DAU_RETENTION_DAYS = int(os.getenv("DAU_RETENTION_DAYS", "30"))
+DAU_ROLLUP_DAYS = int(os.getenv("DAU_ROLLUP_DAYS", "365"))
+
+# Подсчёт уникальных пользователей: "exact" (множества id) или "hll" (HyperLogLog, ~4 КБ на счётчик)
+STATS_COUNTER_MODE = os.getenv("STATS_COUNTER_MODE", "exact").strip().lower()
+HLL_PRECISION = int(os.getenv("HLL_PRECISION", "12"))
+
+# Обход страниц преподавателей для поиска по их парам: период (часы, 0 — только
+# при открытии страницы преподавателя), одновременных загрузок и пауза между ними (секунды)
+TEACHER_CRAWL_INTERVAL = float(os.getenv("TEACHER_CRAWL_INTERVAL", "24"))
+TEACHER_CRAWL_CONCURRENCY = int(os.getenv("TEACHER_CRAWL_CONCURRENCY", "2"))
+TEACHER_CRAWL_DELAY = float(os.getenv("TEACHER_CRAWL_DELAY", "1"))
+
+# /search: результатов на странице и сколько наборов результатов (запрос + версия данных) держать в LRU
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+# Inline-режим: сколько секунд Telegram кэширует ответ на одинаковый запрос пользователя
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "300"))
+
+# Телеметрия загрузок pallada: размер кольцевого буфера (на каждую страницу) и пороги предупреждений
+FETCH_TELEMETRY_SIZE = int(os.getenv("FETCH_TELEMETRY_SIZE", "500"))
+FETCH_ALERT_SIZE_CHANGE = float(os.getenv("FETCH_ALERT_SIZE_CHANGE", "0.3"))   # доля от медианы
+FETCH_ALERT_PARSE_FACTOR = float(os.getenv("FETCH_ALERT_PARSE_FACTOR", "3"))   # во сколько раз медленнее медианы
+
+# Мониторинг event loop: период замера, порог блокировки, частота снимков стека (секунды)
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.25"))
+LOOP_STACK_SAMPLE_INTERVAL = float(os.getenv("LOOP_STACK_SAMPLE_INTERVAL", "0.05"))
+LOOP_BLOCK_LOG_COOLDOWN = float(os.getenv("LOOP_BLOCK_LOG_COOLDOWN", "60"))  # одно место в лог не чаще
 
 # Уровень логгирования
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Доля сохраняемых INFO-событий в events.log по имени события ("handler=0.25,other=0.5").
+# Решение детерминировано (по update_id), ошибки пишутся всегда
+EVENTS_SAMPLE_RATES = os.getenv("EVENTS_SAMPLE_RATES", "handler=0.25")
+
+# Размер очереди записей лога (запись в файл/консоль идёт в отдельном потоке)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 
 # Кэши
 CACHE_EXPIRY = 60 * 30              # 30 минут для расписания
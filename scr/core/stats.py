@@ -1,15 +1,31 @@
+import atexit
 import json
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from collections import defaultdict
-from scr.core.settings import STATS_FILE
+from scr.core.settings import (
+    STATS_FILE, STORAGE_BACKEND, STATS_FLUSH_INTERVAL, DAU_RETENTION_DAYS, DAU_ROLLUP_DAYS,
+    STATS_COUNTER_MODE, HLL_PRECISION,
+)
+from scr.core.hll import HyperLogLog
+from scr.core.logger import logger
 
 
 class StatsManager:
-    def __init__(self, file_path: str = STATS_FILE):
+    def __init__(self, file_path: str = STATS_FILE, backend: str = STORAGE_BACKEND,
+                 flush_interval: float = STATS_FLUSH_INTERVAL, counter_mode: str = STATS_COUNTER_MODE):
         self.file_path = file_path
+        self.backend = backend
+        self.counter_mode = counter_mode
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flusher = None
+        self._compacted_day = None
         self.stats = {
-            "unique_users": set(),
+            "unique_users": self._new_users(),
             "total_messages": 0,
             "schedule_requests": 0,
             "search_queries": 0,
@@ -17,46 +33,140 @@ class StatsManager:
             "errors": 0,
             "commands_per_user": defaultdict(int),
             "peak_usage": defaultdict(int),
-            "daily_active_users": defaultdict(set),
+            # сырые множества: дни за DAU_RETENTION_DAYS, текущие неделя и месяц
+            # (в режиме hll вместо множеств — скетчи HyperLogLog)
+            "daily_active_users": defaultdict(self._new_users),
+            "weekly_active_users": defaultdict(self._new_users),
+            "monthly_active_users": defaultdict(self._new_users),
+            # количество активных пользователей за закрытые периоды
+            "activity_rollups": {"daily": {}, "weekly": {}, "monthly": {}},
         }
         self.load()
+        self.compact()
 
     # ---------------- Основное ----------------
-    def save(self):
+    def _new_users(self):
+        if self.counter_mode == "hll":
+            return HyperLogLog(HLL_PRECISION)
+        return set()
+
+    def _load_users(self, value):
+        """Множество или скетч из значения stats.json (список id или строка hll)"""
+        if HyperLogLog.is_serialized(value):
+            return HyperLogLog.from_str(value)
+        users = self._new_users()
+        users.update(value)
+        return users
+
+    def snapshot(self) -> dict:
+        """Сериализуемая копия статистики (в формате stats.json).
+
+        Может вызываться из фонового потока, пока хэндлеры меняют статистику:
+        коллекции копируются через list()/copy(), которые выполняются целиком под GIL.
+        """
         serializable = self.stats.copy()
-        serializable["unique_users"] = list(self.stats["unique_users"])
-        serializable["commands_per_user"] = dict(self.stats["commands_per_user"])
-        serializable["peak_usage"] = dict(self.stats["peak_usage"])
-        serializable["daily_active_users"] = {
-            k: list(v) for k, v in self.stats["daily_active_users"].items()
+        serializable["unique_users"] = _dump_users(self.stats["unique_users"])
+        serializable["commands_per_user"] = {
+            str(k): v for k, v in list(self.stats["commands_per_user"].items())
         }
+        serializable["peak_usage"] = {str(k): v for k, v in list(self.stats["peak_usage"].items())}
+        for key in ("daily_active_users", "weekly_active_users", "monthly_active_users"):
+            serializable[key] = {k: _dump_users(v) for k, v in list(self.stats[key].items())}
+        serializable["activity_rollups"] = {
+            period: dict(counts) for period, counts in self.stats["activity_rollups"].items()
+        }
+        return serializable
+
+    def save(self):
+        """Помечает статистику изменённой; запись выполнит фоновый поток"""
+        self._dirty = True
+        if self._flusher is None:
+            self._start_flusher()
 
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(serializable, f, indent=4, ensure_ascii=False)
+    def flush(self):
+        """Немедленная запись статистики на диск (или в SQLite)"""
+        with self._flush_lock:
+            self._dirty = False
+            serializable = self.snapshot()
 
-    def load(self):
+            if self.backend == "sqlite":
+                from scr.core.storage import get_storage
+                get_storage().save_stats(serializable)
+                return
+
+            # пишем во временный файл и подменяем — stats.json никогда не остаётся обрезанным
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(serializable, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.file_path)
+
+    def stop(self):
+        """Остановка фонового потока с финальной записью (при завершении бота)"""
+        self._stop_event.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval + 1)
+            self._flusher = None
+        if self._dirty:
+            self.flush()
+
+    def _start_flusher(self):
+        self._stop_event.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name="stats-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            if not self._dirty:
+                continue
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка при сохранении статистики: {e}")
+
+    def _read(self):
+        if self.backend == "sqlite":
+            from scr.core.storage import get_storage
+            return get_storage().load_stats()
         if not os.path.exists(self.file_path):
-            return
+            return None
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self):
         try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = self._read()
+            if data is None:
+                return
 
-            self.stats["unique_users"] = set(data.get("unique_users", []))
+            self.stats["unique_users"] = self._load_users(data.get("unique_users", []))
             self.stats["total_messages"] = data.get("total_messages", 0)
             self.stats["schedule_requests"] = data.get("schedule_requests", 0)
             self.stats["search_queries"] = data.get("search_queries", 0)
             self.stats["commands_executed"] = data.get("commands_executed", 0)
             self.stats["errors"] = data.get("errors", 0)
+            # ключи в JSON — строки, в памяти храним int (как их пишут хэндлеры)
             self.stats["commands_per_user"] = defaultdict(
-                int, data.get("commands_per_user", {})
+                int, {int(k): v for k, v in data.get("commands_per_user", {}).items()}
             )
             self.stats["peak_usage"] = defaultdict(
-                int, data.get("peak_usage", {})
-            )
-            self.stats["daily_active_users"] = defaultdict(
-                set,
-                {k: set(v) for k, v in data.get("daily_active_users", {}).items()},
+                int, {int(k): v for k, v in data.get("peak_usage", {}).items()}
             )
+            for key in ("daily_active_users", "weekly_active_users", "monthly_active_users"):
+                self.stats[key] = defaultdict(
+                    self._new_users, {k: self._load_users(v) for k, v in data.get(key, {}).items()}
+                )
+
+            rollups = data.get("activity_rollups")
+            if rollups is None:
+                # старый stats.json: вся история в daily_active_users — собираем периоды из неё
+                rollups = {}
+                for day, users in self.stats["daily_active_users"].items():
+                    week, month = _period_keys(day)
+                    self.stats["weekly_active_users"][week].update(users)
+                    self.stats["monthly_active_users"][month].update(users)
+            self.stats["activity_rollups"] = {
+                period: dict(rollups.get(period, {})) for period in ("daily", "weekly", "monthly")
+            }
         except Exception:
             pass
 
@@ -70,7 +180,59 @@ class StatsManager:
 
     def record_daily_active(self, user_id: int):
         day = datetime.now().strftime("%Y-%m-%d")
+        if day != self._compacted_day:
+            self.compact()
+        week, month = _period_keys(day)
         self.stats["daily_active_users"][day].add(user_id)
+        self.stats["weekly_active_users"][week].add(user_id)
+        self.stats["monthly_active_users"][month].add(user_id)
+
+    def compact(self, today: datetime = None):
+        """Переносит закрытые периоды из множеств пользователей в счётчики"""
+        today = today or datetime.now()
+        day_key = today.strftime("%Y-%m-%d")
+        week, month = _period_keys(day_key)
+        keep_from = (today - timedelta(days=DAU_RETENTION_DAYS - 1)).strftime("%Y-%m-%d")
+        rollup_from = (today - timedelta(days=DAU_ROLLUP_DAYS - 1)).strftime("%Y-%m-%d")
+        rollups = self.stats["activity_rollups"]
+
+        daily = self.stats["daily_active_users"]
+        for day in [d for d in daily if d < keep_from]:
+            rollups["daily"][day] = len(daily.pop(day))
+        for day in [d for d in rollups["daily"] if d < rollup_from]:
+            del rollups["daily"][day]
+
+        for key, period, current in (
+            ("weekly_active_users", "weekly", week),
+            ("monthly_active_users", "monthly", month),
+        ):
+            sets = self.stats[key]
+            for closed in [k for k in sets if k != current]:
+                rollups[period][closed] = len(sets.pop(closed))
+
+        self._compacted_day = day_key
+
+    @property
+    def estimate_error(self):
+        """Относительная ошибка счётчиков пользователей (None в точном режиме)"""
+        users = self.stats["unique_users"]
+        return users.error if isinstance(users, HyperLogLog) else None
+
+    def unique_users_count(self) -> int:
+        return len(self.stats["unique_users"])
+
+    def rollups(self) -> dict:
+        """Количество активных пользователей по дням/неделям/месяцам (по возрастанию даты)"""
+        result = {}
+        for period, key in (
+            ("daily", "daily_active_users"),
+            ("weekly", "weekly_active_users"),
+            ("monthly", "monthly_active_users"),
+        ):
+            counts = dict(self.stats["activity_rollups"][period])
+            counts.update({k: len(v) for k, v in list(self.stats[key].items())})
+            result[period] = dict(sorted(counts.items()))
+        return result
 
     def add_search_query(self):
         self.stats["search_queries"] += 1
@@ -79,14 +241,31 @@ class StatsManager:
         self.stats["schedule_requests"] += 1
 
 
+def _dump_users(users):
+    if isinstance(users, HyperLogLog):
+        return users.to_str()
+    return list(users)
+
+
+def _period_keys(day: str):
+    """'2024-09-01' -> ('2024-W35', '2024-09')"""
+    date = datetime.strptime(day, "%Y-%m-%d")
+    year, week, _ = date.isocalendar()
+    return f"{year}-W{week:02d}", day[:7]
+
+
 # ---------- Глобальный объект для совместимости ----------
 stats_manager = StatsManager()
 stats = stats_manager.stats
+atexit.register(stats_manager.stop)
 
 # Функции-обертки (чтобы старые импорты не ломались)
 def save_stats():
     stats_manager.save()
 
+def flush_stats():
+    stats_manager.flush()
+
 def increment_user_commands(user_id: int):
     stats_manager.increment_command(user_id)
 
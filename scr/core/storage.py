@@ -0,0 +1,371 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from scr.core.settings import DB_FILE, ALLOWED_USERS_FILE, STATS_FILE
+from scr.core.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id  INTEGER PRIMARY KEY,
+    role     TEXT NOT NULL DEFAULT 'user',
+    username TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS unique_users (
+    user_id INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS user_counters (
+    user_id  INTEGER PRIMARY KEY,
+    commands INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_user_counters_commands ON user_counters(commands DESC);
+
+CREATE TABLE IF NOT EXISTS peak_usage (
+    hour  INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS daily_activity (
+    day     TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (day, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS weekly_activity (
+    week    TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (week, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS monthly_activity (
+    month   TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (month, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS activity_rollups (
+    period TEXT NOT NULL,
+    key    TEXT NOT NULL,
+    count  INTEGER NOT NULL,
+    PRIMARY KEY (period, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS kv (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Множества активных пользователей по периодам: ключ статистики -> (таблица, столбец периода)
+ACTIVITY_TABLES = {
+    "daily_active_users": ("daily_activity", "day"),
+    "weekly_active_users": ("weekly_activity", "week"),
+    "monthly_active_users": ("monthly_activity", "month"),
+}
+
+# Ключи статистики, у которых есть собственные таблицы
+TABLE_KEYS = ("unique_users", "commands_per_user", "peak_usage", "activity_rollups", *ACTIVITY_TABLES)
+
+# Скетчи HyperLogLog (STATS_COUNTER_MODE=hll) хранятся строками в kv под этими ключами
+HLL_UNIQUE_KEY = "unique_users_hll"
+HLL_DAILY_KEY = "daily_active_users_hll"
+HLL_ACTIVITY_KEYS = {
+    "daily_active_users": HLL_DAILY_KEY,
+    "weekly_active_users": "weekly_active_users_hll",
+    "monthly_active_users": "monthly_active_users_hll",
+}
+
+
+class SqliteStorage:
+    """SQLite (WAL) хранилище пользователей и статистики.
+
+    Статистика пишется инкрементально: в базу уходят только строки,
+    изменившиеся с прошлого сохранения.
+    """
+
+    def __init__(self, db_path=DB_FILE):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._migrate_kv()
+        # Последнее записанное состояние статистики (для вычисления разницы)
+        self._written = None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------------- Пользователи ----------------
+    def load_users(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, role, username FROM users").fetchall()
+        return {str(uid): {"role": role, "username": username} for uid, role, username in rows}
+
+    def get_user(self, user_id: int):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT role, username FROM users WHERE user_id = ?", (int(user_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"role": row[0], "username": row[1]}
+
+    def upsert_user(self, user_id: int, role: str = "user", username: str = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO users (user_id, role, username) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET role = excluded.role, username = excluded.username",
+                (int(user_id), role, username),
+            )
+
+    def delete_user(self, user_id: int):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM users WHERE user_id = ?", (int(user_id),))
+
+    def replace_users(self, users: dict):
+        """Приводит таблицу users к переданному словарю {id: {role, username}}"""
+        rows = []
+        for uid, val in users.items():
+            if isinstance(val, dict):
+                rows.append((int(uid), val.get("role", "user"), val.get("username")))
+            else:
+                # старый формат: uid: role
+                rows.append((int(uid), str(val), None))
+
+        with self._lock, self._conn:
+            existing = {r[0] for r in self._conn.execute("SELECT user_id FROM users")}
+            removed = existing - {r[0] for r in rows}
+            self._conn.executemany("DELETE FROM users WHERE user_id = ?", [(uid,) for uid in removed])
+            self._conn.executemany(
+                "INSERT INTO users (user_id, role, username) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET role = excluded.role, username = excluded.username "
+                "WHERE users.role IS NOT excluded.role OR users.username IS NOT excluded.username",
+                rows,
+            )
+
+    def _migrate_kv(self):
+        """Периоды и сводки, сохранённые прежней версией целыми JSON в kv, — в свои таблицы"""
+        legacy_keys = ("activity_rollups", "weekly_active_users", "monthly_active_users")
+        with self._lock, self._conn:
+            conn = self._conn
+            rows = conn.execute(
+                f"SELECT key, value FROM kv WHERE key IN ({', '.join('?' * len(legacy_keys))})", legacy_keys
+            ).fetchall()
+            if not rows:
+                return
+            legacy = {key: json.loads(value) for key, value in rows}
+            new = _normalize(legacy)
+            self._write_rows(conn, new["activity"], [(p, k, n) for (p, k), n in new["rollups"].items()])
+            for key, value in new["kv"].items():
+                # скетчи hll из старого формата
+                conn.execute("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", (key, value))
+            conn.executemany("DELETE FROM kv WHERE key = ?", [(key,) for key in legacy])
+
+    @staticmethod
+    def _write_rows(conn, activity_added: dict, rollups: list):
+        for key, (table, column) in ACTIVITY_TABLES.items():
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({column}, user_id) VALUES (?, ?)", list(activity_added[key])
+            )
+        conn.executemany(
+            "INSERT INTO activity_rollups (period, key, count) VALUES (?, ?, ?) "
+            "ON CONFLICT(period, key) DO UPDATE SET count = excluded.count",
+            rollups,
+        )
+
+    # ---------------- Статистика ----------------
+    def load_stats(self) -> dict:
+        """Собирает статистику из таблиц в том же виде, что и stats.json"""
+        with self._lock:
+            conn = self._conn
+            data = {name: value for name, value in conn.execute("SELECT name, value FROM counters")}
+            data["unique_users"] = [r[0] for r in conn.execute("SELECT user_id FROM unique_users")]
+            data["commands_per_user"] = {
+                str(uid): n for uid, n in conn.execute("SELECT user_id, commands FROM user_counters")
+            }
+            data["peak_usage"] = {str(h): n for h, n in conn.execute("SELECT hour, count FROM peak_usage")}
+            for key, (table, column) in ACTIVITY_TABLES.items():
+                periods = {}
+                for period, uid in conn.execute(f"SELECT {column}, user_id FROM {table} ORDER BY {column}"):
+                    periods.setdefault(period, []).append(uid)
+                data[key] = periods
+            rollups = {"daily": {}, "weekly": {}, "monthly": {}}
+            for period, key, count in conn.execute("SELECT period, key, count FROM activity_rollups"):
+                rollups.setdefault(period, {})[key] = count
+            data["activity_rollups"] = rollups
+            for key, value in conn.execute("SELECT key, value FROM kv"):
+                data[key] = json.loads(value)
+
+        # скетчи возвращаем на место списков
+        if HLL_UNIQUE_KEY in data:
+            data["unique_users"] = data.pop(HLL_UNIQUE_KEY)
+        for key, hll_key in HLL_ACTIVITY_KEYS.items():
+            data[key].update(data.pop(hll_key, {}))
+
+        self._written = _normalize(data)
+        return data
+
+    def save_stats(self, data: dict):
+        """Записывает только изменения относительно прошлого сохранения"""
+        new = _normalize(data)
+        old = self._written or _normalize({})
+
+        counters = [
+            (k, v) for k, v in new["counters"].items() if old["counters"].get(k) != v
+        ]
+        unique_added = new["unique_users"] - old["unique_users"]
+        commands = [
+            (uid, n) for uid, n in new["commands_per_user"].items() if old["commands_per_user"].get(uid) != n
+        ]
+        peak = [(h, n) for h, n in new["peak_usage"].items() if old["peak_usage"].get(h) != n]
+        activity_added = {key: new["activity"][key] - old["activity"][key] for key in ACTIVITY_TABLES}
+        # закрытые периоды удаляются целиком (compact переносит их в сводки)
+        periods_removed = {
+            key: {p for p, _ in old["activity"][key]} - {p for p, _ in new["activity"][key]}
+            for key in ACTIVITY_TABLES
+        }
+        rollups = [(p, k, n) for (p, k), n in new["rollups"].items() if old["rollups"].get((p, k)) != n]
+        rollups_removed = list(old["rollups"].keys() - new["rollups"].keys())
+        kv = [(k, v) for k, v in new["kv"].items() if old["kv"].get(k) != v]
+        kv_removed = [(k,) for k in old["kv"].keys() - new["kv"].keys()]
+
+        with self._lock, self._conn:
+            conn = self._conn
+            conn.executemany(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                counters,
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO unique_users (user_id) VALUES (?)",
+                [(uid,) for uid in unique_added],
+            )
+            conn.executemany(
+                "INSERT INTO user_counters (user_id, commands) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET commands = excluded.commands",
+                commands,
+            )
+            conn.executemany(
+                "INSERT INTO peak_usage (hour, count) VALUES (?, ?) "
+                "ON CONFLICT(hour) DO UPDATE SET count = excluded.count",
+                peak,
+            )
+            for key, (table, column) in ACTIVITY_TABLES.items():
+                conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(p,) for p in periods_removed[key]])
+            self._write_rows(conn, activity_added, rollups)
+            conn.executemany("DELETE FROM activity_rollups WHERE period = ? AND key = ?", rollups_removed)
+            conn.executemany(
+                "INSERT INTO kv (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                kv,
+            )
+            conn.executemany("DELETE FROM kv WHERE key = ?", kv_removed)
+
+        self._written = new
+
+
+def _normalize(data: dict) -> dict:
+    """Раскладывает статистику по таблицам в удобный для сравнения вид"""
+    counters = {}
+    kv = {}
+    unique_users = data.get("unique_users", [])
+    activity = {}
+    for key in ACTIVITY_TABLES:
+        activity[key] = set()
+        hll = {}
+        for period, users in data.get(key, {}).items():
+            if isinstance(users, str):
+                hll[period] = users
+            else:
+                activity[key].update((period, int(uid)) for uid in users)
+        if hll:
+            kv[HLL_ACTIVITY_KEYS[key]] = json.dumps(hll, sort_keys=True)
+
+    if isinstance(unique_users, str):
+        kv[HLL_UNIQUE_KEY] = json.dumps(unique_users)
+        unique_users = []
+
+    for key, value in data.items():
+        if key in TABLE_KEYS:
+            continue
+        if isinstance(value, int) and not isinstance(value, bool):
+            counters[key] = value
+        else:
+            kv[key] = json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+    return {
+        "counters": counters,
+        "unique_users": {int(uid) for uid in unique_users},
+        "commands_per_user": {int(uid): n for uid, n in data.get("commands_per_user", {}).items()},
+        "peak_usage": {int(h): n for h, n in data.get("peak_usage", {}).items()},
+        "activity": activity,
+        "rollups": {
+            (period, key): count
+            for period, counts in data.get("activity_rollups", {}).items()
+            for key, count in counts.items()
+        },
+        "kv": kv,
+    }
+
+
+# ---------- Общий экземпляр ----------
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> SqliteStorage:
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = SqliteStorage(DB_FILE)
+        return _storage
+
+
+# ---------- Миграция из JSON ----------
+def migrate_from_json(users_file=ALLOWED_USERS_FILE, stats_file=STATS_FILE, db_path=DB_FILE):
+    """Однократный перенос allowed_users.json и stats.json в SQLite"""
+    storage = SqliteStorage(db_path)
+    users_count, stats_migrated = 0, False
+
+    if os.path.exists(users_file):
+        with open(users_file, "r", encoding="utf-8") as f:
+            users = json.load(f)
+        if "users" in users:
+            users = users["users"]
+        storage.replace_users(users)
+        users_count = len(users)
+
+    if os.path.exists(stats_file):
+        with open(stats_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        storage.load_stats()
+        storage.save_stats(data)
+        stats_migrated = True
+
+    storage.close()
+    logger.info(
+        f"✅ Миграция в {db_path} завершена: пользователей {users_count}, "
+        f"статистика {'перенесена' if stats_migrated else 'не найдена'}"
+    )
+    return users_count, stats_migrated
+
+
+if __name__ == "__main__":
+    # python -m scr.core.storage migrate
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Использование: python -m scr.core.storage migrate")
+        sys.exit(1)
+    migrate_from_json()
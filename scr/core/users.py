@@ -1,10 +1,22 @@
 import json
 import os
-from scr.core.settings import ALLOWED_USERS_FILE, OWNER_ID
+from scr.core.settings import ALLOWED_USERS_FILE, OWNER_ID, STORAGE_BACKEND
+from scr.core.metrics import timed_phase
+
+
+def _use_sqlite() -> bool:
+    return STORAGE_BACKEND == "sqlite"
+
+
+def _storage():
+    from scr.core.storage import get_storage
+    return get_storage()
 
 
 def load_allowed_users():
-    """Загрузка пользователей из allowed_users.json"""
+    """Загрузка пользователей из allowed_users.json (или SQLite)"""
+    if _use_sqlite():
+        return {"users": _storage().load_users()}
     if not os.path.exists(ALLOWED_USERS_FILE):
         return {"users": {}}
     try:
@@ -19,21 +31,33 @@ def load_allowed_users():
 
 
 def save_allowed_users(users):
-    """Сохраняем пользователей в JSON (всегда {"users": {}})"""
+    """Сохраняем пользователей в JSON (всегда {"users": {}}) или SQLite"""
     if "users" not in users:
         users = {"users": users}
+    if _use_sqlite():
+        _storage().replace_users(users["users"])
+        return
     with open(ALLOWED_USERS_FILE, "w", encoding="utf-8") as f:
         json.dump(users, f, indent=4, ensure_ascii=False)
 
 
+@timed_phase("auth")
 def is_user_allowed(user_id: int) -> bool:
+    if user_id == OWNER_ID:
+        return True
+    if _use_sqlite():
+        return _storage().get_user(user_id) is not None
     users = load_allowed_users()
-    return str(user_id) in users["users"] or user_id == OWNER_ID
+    return str(user_id) in users["users"]
 
 
+@timed_phase("auth")
 def get_user_role(user_id: int) -> str:
     if user_id == OWNER_ID:
         return "owner"
+    if _use_sqlite():
+        user = _storage().get_user(user_id)
+        return user["role"] if user else "user"
     users = load_allowed_users()
     return users["users"].get(str(user_id), {}).get("role", "user")
 
@@ -58,12 +82,18 @@ class UserManager:
             "role": role,
             "username": username or "Неизвестно"
         }
-        self.save()
+        if _use_sqlite():
+            _storage().upsert_user(user_id, role, username or "Неизвестно")
+        else:
+            self.save()
 
     def remove_user(self, user_id: int):
         if str(user_id) in self.users["users"]:
             del self.users["users"][str(user_id)]
-            self.save()
+            if _use_sqlite():
+                _storage().delete_user(user_id)
+            else:
+                self.save()
 
     def get_role(self, user_id: int) -> str:
         if user_id == self.owner_id:
@@ -1,40 +1,92 @@
-import httpx, re, datetime
+import asyncio, httpx, re, datetime, time
+from bisect import bisect_right
 from bs4 import BeautifulSoup
 from cachetools import TTLCache
 from scr.core.settings import SCHEDULE_URL, WEEKDAYS, EXPECTED_DAYS, LESSON_SCHEDULE, CACHE_EXPIRY
 from scr.core.logger import logger
+from scr.core.metrics import timed_phase, registry
+from scr.core.events import annotate
+from scr.parsers.telemetry import timed_get, finish_fetch
+from scr.parsers.search_index import schedule_index
+
+registry.describe("cache_requests_total", "Обращения к кэшам расписания/преподавателей (hit/miss)")
 
 # TTL-кэши
 schedule_cache = TTLCache(maxsize=100, ttl=CACHE_EXPIRY)
 
+# Время пары в тексте и длительность пары, если на сайте указано только начало
+TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+LESSON_DURATION = 90
+SLOT_ENDS = dict(LESSON_SCHEDULE)
+
+# Номер версии расписания: растёт при каждой успешной замене кэша
+schedule_version = 0
+
+# Одна загрузка за раз: одновременные промахи кэша ждут общую загрузку
+_schedule_lock = asyncio.Lock()
+
+
+def replace_cache(cache, data: dict):
+    """Атомарная (для корутин loop) замена содержимого кэша.
+
+    Между clear() и update() нет await, поэтому обработчики никогда
+    не видят пустой или наполовину заполненный кэш.
+    """
+    cache.clear()
+    cache.update(data)
+
 
 async def notify_admin(application, message: str):
     """Отправка ошибок админу"""
     from scr.core.settings import OWNER_ID
+    from scr.bot.outbox import priority, NOTIFY
     try:
-        await application.bot.send_message(chat_id=OWNER_ID, text=message)
+        with priority(NOTIFY):
+            await application.bot.send_message(chat_id=OWNER_ID, text=message)
     except Exception as e:
         logger.error(f"Не удалось уведомить администратора: {e}")
 
 
-async def fetch_schedule(application):
-    """Основной парсинг расписания"""
-    if len(schedule_cache) > 0:
+@timed_phase("fetch")
+async def fetch_schedule(application, force: bool = False):
+    """Расписание из кэша или с сайта.
+
+    force=True — загрузить заново, не дожидаясь TTL. Старые данные остаются
+    в кэше, пока новая страница не разобрана целиком.
+    """
+    if not force and len(schedule_cache) > 0:
+        registry.counter("cache_requests_total", cache="schedule", result="hit").inc()
+        annotate(cache_schedule="hit")
         logger.info("Используется кэш расписания (TTLCache).")
         return schedule_cache
 
+    async with _schedule_lock:
+        # пока ждали, расписание мог загрузить другой обработчик
+        if not force and len(schedule_cache) > 0:
+            registry.counter("cache_requests_total", cache="schedule", result="hit").inc()
+            annotate(cache_schedule="hit")
+            return schedule_cache
+        registry.counter("cache_requests_total", cache="schedule", result="miss").inc()
+        annotate(cache_schedule="miss")
+        return await _load_schedule(application)
+
+
+async def _load_schedule(application):
+    """Основной парсинг расписания"""
+    global schedule_version
     logger.info("Обновление расписания с сайта.")
     schedule = {}
 
     async with httpx.AsyncClient(timeout=30) as client:
         try:
-            response = await client.get(SCHEDULE_URL)
+            response, record = await timed_get(client, SCHEDULE_URL, "schedule")
             response.raise_for_status()
         except httpx.RequestError as e:
             logger.error(f"Ошибка при получении страницы расписания: {e}")
             await notify_admin(application, f"Ошибка при получении страницы расписания: {e}")
             return schedule_cache
 
+    parse_started = time.perf_counter()
     soup = BeautifulSoup(response.content, "html.parser")
 
     try:
@@ -71,7 +123,8 @@ async def fetch_schedule(application):
                     if not time_div or not discipline_div:
                         continue
 
-                    time_text = _extract_time(time_div.get_text(separator=" ", strip=True))
+                    raw_time = time_div.get_text(separator=" ", strip=True)
+                    time_text = _extract_time(raw_time)
 
                     # Получаем все блоки (подгруппы или один блок)
                     subgroup_blocks = discipline_div.find_all("div", class_=re.compile(r"col-md"))
@@ -86,7 +139,7 @@ async def fetch_schedule(application):
                             continue  # пропускаем дубль
                         seen_lessons.add(lesson_key)
 
-                        _append_lesson(schedule, week_key, day_name_ru, time_text, block)
+                        _append_lesson(schedule, week_key, day_name_ru, time_text, block, raw_time)
 
             # добиваем пустые дни
             for day in EXPECTED_DAYS:
@@ -106,23 +159,36 @@ async def fetch_schedule(application):
                     time_div, discipline_div = line.find("div", class_="time"), line.find("div", class_="discipline")
                     if not time_div or not discipline_div:
                         continue
-                    time_text = _extract_time(time_div.get_text(separator=" ", strip=True))
-                    _append_lesson(schedule, "session", day_name_ru, time_text, discipline_div)
+                    raw_time = time_div.get_text(separator=" ", strip=True)
+                    time_text = _extract_time(raw_time)
+                    _append_lesson(schedule, "session", day_name_ru, time_text, discipline_div, raw_time)
 
     except Exception as e:
         logger.error(f"Ошибка при парсинге расписания: {e}")
         await notify_admin(application, f"Ошибка при парсинге расписания: {e}")
         return schedule_cache
 
-    schedule_cache.clear()
-    for k, v in schedule.items():
-        schedule_cache[k] = v
-
-    logger.info("Расписание успешно обновлено.")
+    lessons = sum(
+        len(lessons_list)
+        for week in schedule.values()
+        for lessons_list in week.values()
+        if isinstance(lessons_list, list)
+    )
+    for alert in finish_fetch(record, time.perf_counter() - parse_started, lessons):
+        await notify_admin(application, f"⚠️ {alert}")
+
+    replace_cache(schedule_cache, schedule)
+    schedule_version += 1
+    # индекс /search строится один раз на версию расписания
+    schedule_index.get(schedule_version, schedule_cache)
+    # и интервалы пар для "сейчас идёт / следующая пара"
+    lesson_index.get(schedule_version, schedule_cache)
+
+    logger.info(f"Расписание успешно обновлено (версия {schedule_version}).")
     return schedule_cache
 
 
-def _append_lesson(schedule, week_key, day_name_ru, time_text, block):
+def _append_lesson(schedule, week_key, day_name_ru, time_text, block, raw_time: str = None):
     """Обработка блока пары (включая подгруппы)"""
     subgroup = None
     classroom = None
@@ -165,12 +231,16 @@ def _append_lesson(schedule, week_key, day_name_ru, time_text, block):
         info_lines[0] = f"*{escaped_subject}*"
 
     discipline_info = "\n".join(info_lines)
+    # минуты начала и конца: текст времени разбирается один раз, при загрузке
+    start, end = parse_minutes(raw_time or time_text)
 
     schedule[week_key][day_name_ru].append({
         "time": time_text,
         "info": discipline_info,
         "subgroup": subgroup,
-        "classroom": classroom
+        "classroom": classroom,
+        "start": start,
+        "end": end,
     })
 
 
@@ -179,6 +249,68 @@ def _extract_time(raw_text: str) -> str:
     return match.group(0) if match else raw_text
 
 
+def parse_minutes(time_text: str) -> tuple:
+    """"08:00-09:30" или "08:00 09:30" -> (480, 570) минут от начала суток.
+
+    Без времени окончания — конец стандартного слота с тем же началом,
+    иначе LESSON_DURATION минут. Нет времени — (None, None).
+    """
+    found = [int(h) * 60 + int(m) for h, m in TIME_RE.findall(time_text or "")]
+    if not found:
+        return None, None
+    start = found[0]
+    if len(found) > 1 and found[1] > start:
+        return start, found[1]
+    return start, SLOT_ENDS.get(start, start + LESSON_DURATION)
+
+
+class DayIntervals:
+    """Пары одного дня, отсортированные по началу, для поиска bisect"""
+
+    __slots__ = ("starts", "ends", "max_ends", "lessons")
+
+    def __init__(self, lessons):
+        intervals = []
+        for lesson in lessons:
+            if not isinstance(lesson, dict):
+                continue
+            start, end = lesson.get("start"), lesson.get("end")
+            if start is None:
+                start, end = parse_minutes(lesson.get("time", ""))
+            if start is not None:
+                intervals.append((start, end, lesson))
+        intervals.sort(key=lambda item: item[0])  # сортировка устойчивая: порядок подгрупп сохраняется
+
+        self.starts = [start for start, _, _ in intervals]
+        self.ends = [end for _, end, _ in intervals]
+        self.lessons = [lesson for _, _, lesson in intervals]
+        self.max_ends = []  # максимум окончаний среди первых i+1 пар
+        for end in self.ends:
+            self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+
+
+class LessonIndex:
+    """Интервалы пар по (неделя, день); пересобирается один раз на версию расписания"""
+
+    def __init__(self):
+        self.version = None
+        self.days = {}
+
+    def get(self, version, schedule) -> dict:
+        if version != self.version:
+            self.days = {
+                (week_key, day): DayIntervals(lessons)
+                for week_key in ("week_1", "week_2") if week_key in schedule
+                for day, lessons in schedule[week_key].items()
+                if not day.startswith("_") and isinstance(lessons, list)
+            }
+            self.version = version
+        return self.days
+
+
+lesson_index = LessonIndex()
+
+
 def get_current_week_and_day():
     """Определяет текущую неделю и день"""
     try:
@@ -203,56 +335,47 @@ def get_tomorrow_week_and_day():
     current_week = "week_1" if delta_weeks % 2 == 0 else "week_2"
     return tomorrow.strftime("%d.%m.%Y"), day_name_ru, current_week
 
-def get_current_and_next_lesson(schedule, current_week: str, day_name_ru: str):
+def get_current_and_next_lesson(schedule, current_week: str, day_name_ru: str, now: int = None):
     """
     Возвращает:
     - current_lesson
     - minutes_until_current_end (None если пара не идёт)
     - next_lesson
     - minutes_until_next_start
-    """
-    from datetime import datetime
 
-    now = datetime.now()
-    current_minutes = now.hour * 60 + now.minute
-
-    today_lessons = schedule.get(current_week, {}).get(day_name_ru, [])
-    if not today_lessons:
+    now — минуты от начала суток (по умолчанию текущее время)
+    """
+    if now is None:
+        current = datetime.datetime.now()
+        now = current.hour * 60 + current.minute
+
+    # готовый индекс версии для кэша; для другого словаря — разовый
+    index = lesson_index if schedule is schedule_cache else LessonIndex()
+    day = index.get(schedule_version, schedule).get((current_week, day_name_ru))
+    if day is None:
         return None, None, None, None
 
-    # Группируем по времени начала
-    time_to_lessons = {}
-    for lesson in today_lessons:
-        time_str = lesson.get("time", "").strip()
-        if not time_str:
-            continue
-        start_str = time_str.split("-")[0].strip()
-        try:
-            start_h, start_m = map(int, start_str.split(":"))
-            start_minutes = start_h * 60 + start_m
-            if start_minutes not in time_to_lessons:
-                time_to_lessons[start_minutes] = []
-            time_to_lessons[start_minutes].append(lesson)
-        except (ValueError, IndexError):
-            continue
-
     current_lesson = None
     minutes_until_current_end = None
     next_lesson = None
     minutes_until_next_start = None
 
-    for start_min, end_min in LESSON_SCHEDULE:
-        lessons_here = time_to_lessons.get(start_min, [])
-
-        if current_minutes >= start_min and current_minutes < end_min:
-            # Сейчас идёт пара
-            if lessons_here:
-                current_lesson = lessons_here[0]
-                minutes_until_current_end = end_min - current_minutes
-        elif current_minutes < start_min:
-            # Следующая пара
-            if lessons_here and next_lesson is None:
-                next_lesson = lessons_here[0]
-                minutes_until_next_start = start_min - current_minutes
-
-    return current_lesson, minutes_until_current_end, next_lesson, minutes_until_next_start
\ No newline at end of file
+    # первая пара, начинающаяся позже now, — следующая
+    i = bisect_right(day.starts, now)
+    if i < len(day.starts):
+        next_lesson = day.lessons[i]
+        minutes_until_next_start = day.starts[i] - now
+
+    # идущая пара — среди начавшихся; max_ends отсекает поиск, если все уже закончились
+    j = i - 1
+    while j >= 0 and day.max_ends[j] > now:
+        if day.ends[j] > now:
+            # среди пар с тем же началом (подгруппы) — первая по расписанию
+            while j > 0 and day.starts[j - 1] == day.starts[j] and day.ends[j - 1] > now:
+                j -= 1
+            current_lesson = day.lessons[j]
+            minutes_until_current_end = day.ends[j] - now
+            break
+        j -= 1
+
+    return current_lesson, minutes_until_current_end, next_lesson, minutes_until_next_start
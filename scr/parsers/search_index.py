@@ -0,0 +1,313 @@
+import re
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+
+TOKEN_RE = re.compile(r"\w+")
+LATIN_RE = re.compile(r"[a-z][a-z'-]*")
+
+WEEK_KEYS = ("week_1", "week_2", "session")
+
+# Студенческие сокращения (ключ — без знаков препинания: "физ-ра" -> "физра")
+SYNONYMS = {
+    "матан": "математический анализ",
+    "матанализ": "математический анализ",
+    "линал": "линейная алгебра",
+    "линейка": "линейная алгебра",
+    "тервер": "теория вероятностей",
+    "дискра": "дискретная математика",
+    "дискретка": "дискретная математика",
+    "физра": "физическая культура",
+    "физкультура": "физическая культура",
+    "инфа": "информатика",
+    "бд": "базы данных",
+    "оп": "основы программирования",
+    "англ": "иностранный язык",
+    "лаба": "лабораторная",
+    "лабы": "лабораторная",
+    "практ": "практика",
+}
+
+# Латиница -> кириллица: сначала сочетания, затем отдельные буквы
+TRANSLIT = {
+    "shch": "щ", "sch": "щ", "zh": "ж", "kh": "х", "ts": "ц", "ch": "ч", "sh": "ш",
+    "yu": "ю", "ya": "я", "yo": "е", "ye": "е", "iy": "ий", "yy": "ый", "ey": "ей", "ay": "ай", "oy": "ой",
+    "a": "а", "b": "б", "v": "в", "g": "г", "d": "д", "e": "е", "z": "з", "i": "и", "y": "ы",
+    "k": "к", "l": "л", "m": "м", "n": "н", "o": "о", "p": "п", "r": "р", "s": "с", "t": "т",
+    "u": "у", "f": "ф", "h": "х", "c": "к", "w": "в", "x": "кс", "q": "к", "j": "й", "'": "ь",
+}
+TRANSLIT_RE = re.compile("|".join(sorted(map(re.escape, TRANSLIT), key=len, reverse=True)))
+
+# Нечёткий поиск: минимальное сходство токенов и сколько похожих токенов брать на слово
+FUZZY_THRESHOLD = 0.35
+FUZZY_TOKENS_PER_WORD = 8
+
+
+def normalize(text: str) -> str:
+    return (text or "").lower().replace("ё", "е")
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall(normalize(text))
+
+
+def transliterate(word: str) -> str:
+    return TRANSLIT_RE.sub(lambda m: TRANSLIT[m.group(0)], word)
+
+
+def expand_query(query: str) -> str:
+    """Запрос с раскрытыми сокращениями и латиницей, переведённой в кириллицу"""
+    words = []
+    for chunk in normalize(query).split():
+        if LATIN_RE.fullmatch(chunk):
+            chunk = transliterate(chunk)
+        words.append(SYNONYMS.get(re.sub(r"\W", "", chunk), chunk))
+    return " ".join(words)
+
+
+def trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Инвертированный индекс: нормализованный токен -> номера документов.
+
+    Каждое слово запроса ищется как префикс токенов (бинарный поиск по
+    отсортированному словарю), слова запроса объединяются по И.
+    """
+
+    def __init__(self, documents=(), texts=()):
+        self.documents = {}    # номер -> документ
+        self.doc_tokens = {}   # номер -> токены документа
+        self.postings = {}     # токен -> номера документов
+        self.tokens = []       # отсортированный словарь
+        self.gram_tokens = {}  # триграмма -> токены (для нечёткого поиска)
+        self.token_grams = {}  # токен -> число его триграмм
+        self._next_id = 0
+
+        for document, text in zip(documents, texts):
+            self._add(document, text)
+        self.tokens = sorted(self.postings)
+
+    def _add(self, document, text) -> list:
+        """Добавляет документ; возвращает токены, которых не было в словаре"""
+        doc_id = self._next_id
+        self._next_id += 1
+        tokens = tuple(set(tokenize(text)))
+        self.documents[doc_id] = document
+        self.doc_tokens[doc_id] = tokens
+        new_tokens = []
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = set()
+                new_tokens.append(token)
+                grams = trigrams(token)
+                self.token_grams[token] = len(grams)
+                for gram in grams:
+                    self.gram_tokens.setdefault(gram, set()).add(token)
+            posting.add(doc_id)
+        return new_tokens
+
+    def add(self, document, text) -> int:
+        """Добавляет документ в уже построенный индекс"""
+        for token in self._add(document, text):
+            insort(self.tokens, token)
+        return self._next_id - 1
+
+    def remove(self, doc_id: int):
+        """Удаляет документ; токены без документов уходят из словаря"""
+        self.documents.pop(doc_id, None)
+        for token in self.doc_tokens.pop(doc_id, ()):
+            posting = self.postings[token]
+            posting.discard(doc_id)
+            if posting:
+                continue
+            del self.postings[token]
+            del self.tokens[bisect_left(self.tokens, token)]
+            for gram in trigrams(token):
+                grams = self.gram_tokens[gram]
+                grams.discard(token)
+                if not grams:
+                    del self.gram_tokens[gram]
+            del self.token_grams[token]
+
+    def prefix_range(self, prefix: str) -> tuple:
+        """Границы токенов словаря, начинающихся с prefix"""
+        return bisect_left(self.tokens, prefix), bisect_left(self.tokens, prefix + "\U0010ffff")
+
+    def prefix_matches(self, prefix: str) -> set:
+        """Документы, в которых есть токен, начинающийся с prefix"""
+        lo, hi = self.prefix_range(prefix)
+        matched = set()
+        for token in self.tokens[lo:hi]:
+            matched.update(self.postings[token])
+        return matched
+
+    def search(self, query: str) -> list:
+        words = set(tokenize(query))
+        if not words:
+            return []
+        # оценка числа совпадений каждого слова по длине списков документов
+        estimated = []
+        for word in words:
+            lo, hi = self.prefix_range(word)
+            estimated.append((sum(len(self.postings[t]) for t in self.tokens[lo:hi]), word))
+        estimated.sort()
+
+        found = self.prefix_matches(estimated[0][1])
+        for size, word in estimated[1:]:
+            if not found:
+                break
+            if size <= 4 * len(found):
+                found &= self.prefix_matches(word)
+            else:
+                # частое слово: проще проверить токены уже найденных документов
+                found = {
+                    doc_id for doc_id in found
+                    if any(token.startswith(word) for token in self.doc_tokens[doc_id])
+                }
+        return [self.documents[doc_id] for doc_id in sorted(found)]
+
+    def similar_tokens(self, word: str) -> list:
+        """Похожие токены словаря [(сходство, токен)] по доле общих триграмм"""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.gram_tokens.get(gram, ()))
+        scored = []
+        for token, common in shared.items():
+            similarity = common / (len(grams) + self.token_grams[token] - common)
+            if token.startswith(word):
+                similarity = max(similarity, 0.9)  # начало слова — почти точное совпадение
+            if similarity >= FUZZY_THRESHOLD:
+                scored.append((similarity, token))
+        return heapq.nlargest(FUZZY_TOKENS_PER_WORD, scored)
+
+    def fuzzy_search(self, query: str, limit: int = 20) -> list:
+        """Ранжированные результаты [(оценка 0..1, документ)] с учётом опечаток"""
+        words = tokenize(query)
+        per_word = []
+        for word in words:
+            best = {}
+            # по возрастанию сходства: у документа остаётся лучшее совпадение слова
+            for similarity, token in sorted(self.similar_tokens(word)):
+                best.update(dict.fromkeys(self.postings[token], similarity))
+            if best:
+                per_word.append(best)
+        if not per_word:
+            return []
+
+        def score(doc_id):
+            return sum(best.get(doc_id, 0.0) for best in per_word) / len(words)
+
+        # сначала документы, где нашлись все слова запроса
+        ranked = heapq.nlargest(limit, set(per_word[0]).intersection(*per_word[1:]), key=score)
+        if len(ranked) < limit and len(per_word) > 1:
+            # добираем по самому редкому слову
+            seen = set(ranked)
+            rarest = min(per_word, key=len)
+            ranked += heapq.nlargest(limit - len(ranked), (d for d in rarest if d not in seen), key=score)
+        return [(score(doc_id), self.documents[doc_id]) for doc_id in ranked]
+
+
+def schedule_documents(schedule) -> tuple:
+    """Пары расписания в виде результатов поиска и тексты для индексации"""
+    documents, texts = [], []
+    for week_key in WEEK_KEYS:
+        if week_key not in schedule:
+            continue
+        for day, lessons in schedule[week_key].items():
+            if day.startswith("_"):
+                continue
+            for lesson in lessons:
+                if isinstance(lesson, dict):
+                    documents.append({
+                        "source": "schedule",
+                        "week": week_key,
+                        "day": day,
+                        "time": lesson["time"],
+                        "info": lesson["info"],
+                        "subgroup": lesson.get("subgroup"),
+                    })
+                    texts.append(lesson["info"])
+    return documents, texts
+
+
+def teacher_documents(teachers) -> tuple:
+    documents, texts = [], []
+    for tid, teacher in teachers.items():
+        if teacher["name"]:
+            documents.append({"source": "teacher", "id": tid, "name": teacher["name"]})
+            texts.append(teacher["name"])
+    return documents, texts
+
+
+def teacher_pair_documents(teacher_id: str, name: str, pairs: dict) -> tuple:
+    """Пары преподавателя {день: {"1": [...], "2": [...]}} -> документы (преподаватель, неделя, день, время, аудитория)"""
+    documents, texts = [], []
+    for day, weeks in pairs.items():
+        for week, lessons in weeks.items():
+            for lesson in lessons:
+                info = lesson.get("info") or ""
+                room = next(
+                    (ln for ln in info.split("\n") if "каб." in ln.lower() or "корп." in ln.lower()),
+                    None,
+                )
+                documents.append({
+                    "source": "teacher_pair",
+                    "teacher_id": teacher_id,
+                    "name": name,
+                    "week": week,
+                    "day": day,
+                    "time": lesson.get("time", ""),
+                    "info": info,
+                    "room": room,
+                })
+                texts.append(f"{name} {day} {info}")
+    return documents, texts
+
+
+class TeacherPairsIndex(SearchIndex):
+    """Пары всех преподавателей; обновляется по одному преподавателю при загрузке его страницы"""
+
+    def __init__(self):
+        super().__init__()
+        self.by_teacher = {}  # id преподавателя -> номера его документов
+        self.version = 0
+
+    def update_teacher(self, teacher_id: str, name: str, pairs: dict) -> bool:
+        """Заменяет пары преподавателя; возвращает False, если они не изменились.
+
+        Версия растёт только при изменении: от неё зависят кэши /search и inline-ответов.
+        """
+        documents, texts = teacher_pair_documents(teacher_id, name, pairs)
+        old_ids = self.by_teacher.get(teacher_id)
+        if old_ids is not None and [self.documents[doc_id] for doc_id in old_ids] == documents:
+            return False
+        for doc_id in self.by_teacher.pop(teacher_id, ()):
+            self.remove(doc_id)
+        self.by_teacher[teacher_id] = [self.add(document, text) for document, text in zip(documents, texts)]
+        self.version += 1
+        return True
+
+
+class VersionedIndex:
+    """Индекс, перестраиваемый один раз на каждую версию данных"""
+
+    def __init__(self, build_documents):
+        self.build_documents = build_documents
+        self.version = None
+        self.index = SearchIndex([], [])
+
+    def get(self, version, source) -> SearchIndex:
+        if version != self.version:
+            self.index = SearchIndex(*self.build_documents(source))
+            self.version = version
+        return self.index
+
+
+schedule_index = VersionedIndex(schedule_documents)
+teachers_index = VersionedIndex(teacher_documents)
+teacher_pairs_index = TeacherPairsIndex()
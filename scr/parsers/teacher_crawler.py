@@ -0,0 +1,85 @@
+import asyncio
+import time
+from scr.core.settings import TEACHER_CRAWL_INTERVAL, TEACHER_CRAWL_CONCURRENCY, TEACHER_CRAWL_DELAY
+from scr.core.logger import logger
+from scr.core.metrics import registry
+from scr.parsers.teacher_parser import fetch_teachers, fetch_pairs_for_teacher, teachers_cache
+from scr.parsers.search_index import teacher_pairs_index
+
+registry.describe("teacher_pages_refreshed_total", "Загрузки страниц преподавателей для индекса пар")
+
+
+class TeacherCrawler:
+    """Обновляет индекс пар преподавателей: при открытии страницы и фоновым обходом"""
+
+    def __init__(self, index=teacher_pairs_index, interval: float = TEACHER_CRAWL_INTERVAL * 3600,
+                 concurrency: int = TEACHER_CRAWL_CONCURRENCY, delay: float = TEACHER_CRAWL_DELAY):
+        self.index = index
+        self.interval = interval
+        self.concurrency = max(concurrency, 1)
+        self.delay = delay
+        self.refreshed = {}  # id преподавателя -> time.monotonic() последней загрузки
+        self.task = None
+
+    def is_stale(self, teacher_id: str) -> bool:
+        last = self.refreshed.get(teacher_id)
+        return last is None or time.monotonic() - last >= self.interval
+
+    async def refresh(self, teacher_id: str, name: str):
+        """Загружает пары преподавателя и заменяет его документы в индексе.
+
+        При ошибке возвращает None, а старые пары остаются в индексе.
+        """
+        try:
+            pairs = await fetch_pairs_for_teacher(teacher_id, raise_errors=True)
+        except Exception as e:
+            registry.counter("teacher_pages_refreshed_total", result="error").inc()
+            logger.error(f"Ошибка при получении пар {teacher_id}: {e}")
+            return None
+        self.index.update_teacher(teacher_id, name, pairs)
+        self.refreshed[teacher_id] = time.monotonic()
+        registry.counter("teacher_pages_refreshed_total", result="ok").inc()
+        return pairs
+
+    async def crawl_once(self, application) -> int:
+        """Один проход по устаревшим страницам; возвращает число обновлённых"""
+        await fetch_teachers(application)
+        stale = [(tid, t["name"]) for tid, t in list(teachers_cache.items()) if t.get("name") and self.is_stale(tid)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(teacher_id, name):
+            async with semaphore:
+                pairs = await self.refresh(teacher_id, name)
+                # не нагружаем pallada: пауза между загрузками
+                await asyncio.sleep(self.delay)
+                return pairs is not None
+
+        results = await asyncio.gather(*(worker(tid, name) for tid, name in stale))
+        return sum(results)
+
+    async def run(self, application):
+        """Фоновый обход: сразу после старта и затем раз в interval"""
+        while True:
+            try:
+                updated = await self.crawl_once(application)
+                logger.info(f"Индекс пар преподавателей обновлён: {updated} страниц, {len(self.index.documents)} пар")
+            except Exception as e:
+                logger.error(f"Ошибка обхода страниц преподавателей: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stop(self):
+        """Отменяет фоновый обход (при остановке бота)"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+teacher_crawler = TeacherCrawler()
+
+
+def start_teacher_crawler(application):
+    """Запускает фоновый обход, если он не отключён (TEACHER_CRAWL_INTERVAL=0)"""
+    # post_init вызывается до запуска приложения: application.create_task здесь не отслеживает
+    # задачу, поэтому храним её сами и отменяем в shutdown
+    if teacher_crawler.interval > 0 and teacher_crawler.task is None:
+        teacher_crawler.task = asyncio.create_task(teacher_crawler.run(application))
@@ -1,62 +1,99 @@
-import httpx, re
+import asyncio, httpx, re, time
 from bs4 import BeautifulSoup
 from cachetools import TTLCache
 from scr.core.settings import SCHEDULE_URL, WEEKDAYS, RU_WEEKDAYS_ORDER, TEACHERS_CACHE_EXPIRY
 from scr.core.logger import logger
-from scr.parsers.schedule_parser import notify_admin
+from scr.core.metrics import timed_phase, registry
+from scr.core.events import annotate
+from scr.parsers.schedule_parser import notify_admin, replace_cache
+from scr.parsers.telemetry import timed_get, finish_fetch
+from scr.parsers.search_index import teachers_index
 
 # TTL-кэш для преподавателей
 teachers_cache = TTLCache(maxsize=100, ttl=TEACHERS_CACHE_EXPIRY)
 
-async def fetch_teachers(application):
-    """Парсинг списка преподавателей"""
-    if len(teachers_cache) > 0:
+# Номер версии списка преподавателей: растёт при каждой успешной замене кэша
+teachers_version = 0
+
+_teachers_lock = asyncio.Lock()
+
+
+@timed_phase("fetch")
+async def fetch_teachers(application, force: bool = False):
+    """Список преподавателей из кэша или с сайта (force=True — загрузить заново)"""
+    if not force and len(teachers_cache) > 0:
+        registry.counter("cache_requests_total", cache="teachers", result="hit").inc()
+        annotate(cache_teachers="hit")
         logger.info("Используется TTLCache преподавателей 24 часа.")
         return teachers_cache
 
+    async with _teachers_lock:
+        if not force and len(teachers_cache) > 0:
+            registry.counter("cache_requests_total", cache="teachers", result="hit").inc()
+            annotate(cache_teachers="hit")
+            return teachers_cache
+        registry.counter("cache_requests_total", cache="teachers", result="miss").inc()
+        annotate(cache_teachers="miss")
+        return await _load_teachers(application)
+
+
+async def _load_teachers(application):
+    """Парсинг списка преподавателей"""
+    global teachers_version
     logger.info("Обновление списка преподавателей с сайта...")
     async with httpx.AsyncClient(timeout=30) as client:
         try:
-            response = await client.get(SCHEDULE_URL)
+            response, record = await timed_get(client, SCHEDULE_URL, "teachers")
             response.raise_for_status()
         except httpx.RequestError as e:
             logger.error(f"Ошибка при получении страницы расписания: {e}")
             await notify_admin(application, f"Ошибка при получении списка преподавателей: {e}")
             return teachers_cache
 
+    parse_started = time.perf_counter()
     soup = BeautifulSoup(response.text, "html.parser")
     professor_links = soup.find_all("a", href=re.compile(r"/timetable/professor/\d+"))
     logger.info(f"Найдено ссылок на преподавателей: {len(professor_links)}")
 
-    teachers_cache.clear()
+    teachers = {}
     for link in professor_links:
         full_name = link.get_text(strip=True)
         href = link.get("href")
         match = re.search(r"professor/(\d+)", href)
         if match:
             teacher_id = match.group(1)
-            teachers_cache[teacher_id] = {
+            teachers[teacher_id] = {
                 "name": full_name,
                 "href": f"https://timetable.pallada.sibsau.ru{href}",
                 "pairs": {},
                 "consultations": []
             }
 
-    logger.info("Список преподавателей успешно обновлён.")
+    for alert in finish_fetch(record, time.perf_counter() - parse_started, len(teachers)):
+        await notify_admin(application, f"⚠️ {alert}")
+
+    replace_cache(teachers_cache, teachers)
+    teachers_version += 1
+    teachers_index.get(teachers_version, teachers_cache)
+
+    logger.info(f"Список преподавателей успешно обновлён (версия {teachers_version}).")
     return teachers_cache
 
 
+@timed_phase("fetch")
 async def fetch_consultations_for_teacher(teacher_id: str):
     """Парсинг консультаций конкретного преподавателя"""
     consultations = []
     try:
         url = f"https://timetable.pallada.sibsau.ru/timetable/professor/{teacher_id}"
         async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url)
+            response, record = await timed_get(client, url, "teacher_consultations")
             response.raise_for_status()
+        parse_started = time.perf_counter()
         soup = BeautifulSoup(response.content, "html.parser")
         consultation_tab = soup.find("div", {"id": "consultation_tab"})
         if not consultation_tab:
+            finish_fetch(record, time.perf_counter() - parse_started, 0)
             return consultations
 
         for day_block in consultation_tab.find_all("div", class_="day"):
@@ -68,19 +105,25 @@ async def fetch_consultations_for_teacher(teacher_id: str):
                 time_text = _extract_time(time_div.get_text(separator=" ", strip=True))
                 discipline_info = discipline_div.get_text(separator="\n", strip=True)
                 consultations.append({"date": date_text, "time": time_text, "info": discipline_info})
+        finish_fetch(record, time.perf_counter() - parse_started, len(consultations))
     except Exception as e:
         logger.error(f"Ошибка при получении консультаций {teacher_id}: {e}")
     return consultations
 
 
-async def fetch_pairs_for_teacher(teacher_id: str):
-    """Парсинг пар по дням для преподавателя (1 и 2 недели отдельно)."""
+@timed_phase("fetch")
+async def fetch_pairs_for_teacher(teacher_id: str, raise_errors: bool = False):
+    """Парсинг пар по дням для преподавателя (1 и 2 недели отдельно).
+
+    raise_errors=True — ошибку загрузки пробросить, а не вернуть пустое расписание.
+    """
     result = {day: {"1": [], "2": []} for day in RU_WEEKDAYS_ORDER}
     try:
         url = f"https://timetable.pallada.sibsau.ru/timetable/professor/{teacher_id}"
         async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url)
+            response, record = await timed_get(client, url, "teacher_pairs")
             response.raise_for_status()
+        parse_started = time.perf_counter()
         soup = BeautifulSoup(response.content, "html.parser")
 
         for week_num in ("1", "2"):
@@ -109,8 +152,12 @@ async def fetch_pairs_for_teacher(teacher_id: str):
                         "time": time_text,
                         "info": discipline_info
                     })
+        lessons = sum(len(pairs) for weeks in result.values() for pairs in weeks.values())
+        finish_fetch(record, time.perf_counter() - parse_started, lessons)
 
     except Exception as e:
+        if raise_errors:
+            raise
         logger.error(f"Ошибка при получении пар {teacher_id}: {e}")
     return result
 
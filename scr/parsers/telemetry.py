@@ -0,0 +1,173 @@
+import asyncio
+import itertools
+import statistics
+import time
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlsplit
+import httpx
+from scr.core.settings import FETCH_TELEMETRY_SIZE, FETCH_ALERT_SIZE_CHANGE, FETCH_ALERT_PARSE_FACTOR
+from scr.core.logger import logger
+from scr.core.metrics import registry
+
+registry.describe("upstream_fetch_seconds", "Время загрузки страниц pallada")
+registry.describe("upstream_fetch_bytes_total", "Объём загруженных страниц pallada")
+registry.describe("upstream_parse_seconds", "Время разбора страниц pallada")
+
+# Сколько предыдущих загрузок нужно для сравнения с медианой
+ALERT_MIN_HISTORY = 5
+# Не повторять одинаковое предупреждение чаще, чем раз в N секунд
+ALERT_COOLDOWN = 60 * 60
+
+# Последние загрузки: свой кольцевой буфер на каждую страницу (target), чтобы суточный
+# обход преподавателей не вытеснял историю расписания. Записи — словари, см. timed_get()
+fetch_logs = {}
+_fetch_seq = itertools.count()
+_last_alerts = {}
+
+
+def log_fetch(record: dict):
+    record["seq"] = next(_fetch_seq)  # общий порядок загрузок разных страниц
+    log = fetch_logs.get(record["target"])
+    if log is None:
+        log = fetch_logs[record["target"]] = deque(maxlen=FETCH_TELEMETRY_SIZE)
+    log.append(record)
+
+
+async def _resolve_time(host: str, port: int):
+    """Время DNS-запроса (мс) или None, если разрешить имя не удалось"""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        await loop.getaddrinfo(host, port)
+    except OSError:
+        return None
+    return (time.perf_counter() - started) * 1000
+
+
+async def timed_get(client, url: str, target: str):
+    """GET с трассировкой: DNS, соединение, TLS, TTFB, общее время, размер и статус.
+
+    Запись сразу попадает в fetch_logs и возвращается вместе с ответом,
+    время разбора и число пар дописывает finish_fetch().
+    """
+    parts = urlsplit(url)
+    record = {
+        "time": datetime.now().strftime("%d.%m %H:%M:%S"),
+        "target": target,
+        "url": url,
+        "status": None,
+        "error": None,
+        "dns_ms": None,
+        "connect_ms": None,
+        "tls_ms": None,
+        "ttfb_ms": None,
+        "total_ms": None,
+        "bytes": None,
+        "parse_ms": None,
+        "lessons": None,
+    }
+    marks = {}
+
+    async def trace(event_name, info):
+        marks[event_name] = time.perf_counter()
+
+    # DNS меряем параллельно запросом, чтобы не добавлять его к общему времени
+    dns_task = asyncio.create_task(
+        _resolve_time(parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+    )
+    started = time.perf_counter()
+    try:
+        response = await client.get(url, extensions={"trace": trace})
+    except httpx.RequestError as e:
+        record["error"] = type(e).__name__
+        registry.counter("upstream_fetch_errors_total", target=target).inc()
+        raise
+    finally:
+        record["total_ms"] = (time.perf_counter() - started) * 1000
+        record["dns_ms"] = await dns_task
+        record["connect_ms"] = _span(marks, "connection.connect_tcp")
+        record["tls_ms"] = _span(marks, "connection.start_tls")
+        sent = marks.get("http11.send_request_headers.started") or marks.get("http2.send_request_headers.started")
+        got = marks.get("http11.receive_response_headers.complete") or marks.get("http2.receive_response_headers.complete")
+        if sent and got:
+            record["ttfb_ms"] = (got - sent) * 1000
+        log_fetch(record)
+
+    record["status"] = response.status_code
+    record["bytes"] = len(response.content)
+    registry.histogram("upstream_fetch_seconds", target=target).observe(record["total_ms"] / 1000)
+    registry.counter("upstream_fetch_bytes_total", target=target).inc(record["bytes"])
+    registry.counter("upstream_responses_total", target=target, status=str(response.status_code)).inc()
+    return response, record
+
+
+def _span(marks: dict, prefix: str):
+    started, complete = marks.get(f"{prefix}.started"), marks.get(f"{prefix}.complete")
+    if started is None or complete is None:
+        return None
+    return (complete - started) * 1000
+
+
+def finish_fetch(record: dict, parse_seconds: float, lessons: int) -> list:
+    """Дописывает время разбора и число пар; возвращает тексты предупреждений о скачках"""
+    record["parse_ms"] = parse_seconds * 1000
+    record["lessons"] = lessons
+    registry.histogram("upstream_parse_seconds", target=record["target"]).observe(parse_seconds)
+
+    alerts = []
+    for kind, text in _check_jumps(record):
+        key = (record["url"], kind)
+        now = time.monotonic()
+        if now - _last_alerts.get(key, -ALERT_COOLDOWN) < ALERT_COOLDOWN:
+            continue
+        _last_alerts[key] = now
+        logger.warning(f"⚠️ {text}")
+        alerts.append(text)
+    return alerts
+
+
+def _check_jumps(record: dict):
+    """Сравнивает загрузку с медианой предыдущих успешных загрузок той же страницы"""
+    history = [
+        r for r in list(fetch_logs.get(record["target"], ()))
+        if r is not record and r["url"] == record["url"] and r["parse_ms"] is not None
+    ]
+    if len(history) < ALERT_MIN_HISTORY:
+        return []
+
+    jumps = []
+    median_bytes = statistics.median(r["bytes"] for r in history)
+    if median_bytes and abs(record["bytes"] - median_bytes) / median_bytes > FETCH_ALERT_SIZE_CHANGE:
+        jumps.append((
+            "size",
+            f"Размер страницы {record['target']} изменился: {record['bytes']} байт "
+            f"при медиане {median_bytes:.0f}. Возможно, поменялась вёрстка pallada.",
+        ))
+
+    median_parse = statistics.median(r["parse_ms"] for r in history)
+    if median_parse and record["parse_ms"] > median_parse * FETCH_ALERT_PARSE_FACTOR:
+        jumps.append((
+            "parse",
+            f"Разбор страницы {record['target']} занял {record['parse_ms']:.0f} мс "
+            f"при медиане {median_parse:.0f} мс.",
+        ))
+
+    median_lessons = statistics.median(r["lessons"] for r in history)
+    if median_lessons and record["lessons"] == 0:
+        jumps.append((
+            "lessons",
+            f"Со страницы {record['target']} не извлечено ни одной пары (обычно {median_lessons:.0f}).",
+        ))
+    return jumps
+
+
+def recent_fetches(target: str = None, limit: int = None) -> list:
+    """Последние загрузки (старые сначала), опционально только для одной страницы"""
+    if target is not None:
+        records = list(fetch_logs.get(target, ()))
+    else:
+        records = sorted(
+            (r for log in list(fetch_logs.values()) for r in list(log)), key=lambda r: r["seq"]
+        )
+    return records[-limit:] if limit else records
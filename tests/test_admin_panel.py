@@ -0,0 +1,42 @@
+import importlib
+import pytest
+
+
+@pytest.fixture
+def panel(monkeypatch):
+    # панель проверяет обязательные переменные при импорте
+    monkeypatch.setenv("FLASK_SECRET", "test-secret")
+    monkeypatch.setenv("PANEL_USER", "admin")
+    monkeypatch.setenv("PANEL_PASS", "admin")
+    app_module = importlib.import_module("scr.admin_panel.app")
+    monkeypatch.setattr(app_module, "METRICS_TOKEN", "metrics-secret")
+    app_module.app.config["TESTING"] = True
+    app_module.limiter.reset()
+    return app_module
+
+
+def test_metrics_endpoint_renders_prometheus(panel):
+    client = panel.app.test_client()
+    response = client.get("/metrics", headers={"Authorization": "Bearer metrics-secret"})
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert 'bot_cache_entries{cache="schedule"}' in text
+    assert 'bot_cache_entries{cache="teachers"}' in text
+
+    # токен можно передать и параметром запроса
+    assert client.get("/metrics?token=metrics-secret").status_code == 200
+
+
+def test_metrics_endpoint_rejects_bad_token(panel):
+    client = panel.app.test_client()
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics?token=wrong").status_code == 401
+
+
+def test_metrics_endpoint_disabled_without_token(panel, monkeypatch):
+    monkeypatch.setattr(panel, "METRICS_TOKEN", "")
+    response = panel.app.test_client().get("/metrics", headers={"Authorization": "Bearer metrics-secret"})
+    assert response.status_code == 404
@@ -0,0 +1,110 @@
+import pytest
+from unittest.mock import AsyncMock
+from scr.bot import broadcasts
+from scr.bot.broadcasts import BroadcastManager, format_progress
+
+
+@pytest.fixture
+def manager(temp_dir, monkeypatch):
+    monkeypatch.setattr(broadcasts, "CHUNK_SIZE", 2)
+    return BroadcastManager(temp_dir / "broadcasts.json")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_resumes_from_saved_cursor(manager, temp_dir):
+    bot = AsyncMock()
+    sent = []
+
+    async def send_message(chat_id, text, **kwargs):
+        sent.append(chat_id)
+        if chat_id == 2:
+            # админ остановил рассылку, пока шла первая пачка
+            manager.cancel(job["id"])
+        if chat_id == 4:
+            raise RuntimeError("Forbidden: bot was blocked by the user")
+
+    bot.send_message.side_effect = send_message
+    job = manager.create("🔔 тест", [1, 2, 3, 4, 5])
+    job["status"] = "running"
+    await manager.run(job, bot)
+
+    assert job["status"] == "cancelled"
+    assert job["cursor"] == 2
+
+    # после "перезапуска" состояние читается из файла
+    restored = BroadcastManager(temp_dir / "broadcasts.json")
+    job = restored.get(job["id"])
+    assert job["cursor"] == 2
+    job["status"] = "running"
+    await restored.run(job, bot)
+
+    assert sent == [1, 2, 3, 4, 5]
+    assert job["status"] == "done"
+    assert job["ok"] == 4
+    assert job["failed"] == [4]
+    assert "Не доставлено: 4" in format_progress(job)
+
+
+
+@pytest.mark.asyncio
+async def test_resume_while_chunk_in_flight_continues_same_task(manager):
+    import asyncio
+    bot = AsyncMock()
+    application = AsyncMock()
+    application.bot = bot
+    sent = []
+
+    async def send_message(chat_id, text, **kwargs):
+        sent.append(chat_id)
+        if chat_id == 1:
+            # /bcancel и сразу /bresume, пока пачка ещё отправляется
+            manager.cancel(job["id"])
+            assert manager.resume(job["id"], application)
+
+    bot.send_message.side_effect = send_message
+    job = manager.create("🔔 тест", [1, 2, 3, 4, 5])
+    manager.launch(job, application)
+    await manager._tasks[job["id"]]
+
+    assert sent == [1, 2, 3, 4, 5]
+    assert job["status"] == "done"
+
+
+def test_cancel_before_launch_is_kept(manager):
+    application = AsyncMock()
+    job = manager.create("🔔 тест", [1, 2])
+    manager.cancel(job["id"])
+    manager.launch(job, application)
+
+    assert job["status"] == "cancelled"
+    assert job["id"] not in manager._tasks
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_task_and_keeps_job_resumable(manager, temp_dir):
+    import asyncio
+    started = asyncio.Event()
+    bot = AsyncMock()
+    application = AsyncMock()
+    application.bot = bot
+
+    async def send_message(chat_id, text, **kwargs):
+        if chat_id == 3:
+            started.set()
+            await asyncio.sleep(3600)
+
+    bot.send_message.side_effect = send_message
+    job = manager.create("🔔 тест", [1, 2, 3, 4])
+    manager.launch(job, application)
+    task = manager._tasks[job["id"]]
+    await started.wait()
+
+    # остановка бота не ждёт конца рассылки
+    manager.stop()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    restored = BroadcastManager(temp_dir / "broadcasts.json")
+    job = restored.get(job["id"])
+    assert job["status"] == "running"
+    assert job["cursor"] == 2
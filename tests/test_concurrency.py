@@ -0,0 +1,60 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock
+from telegram import Update
+from telegram.ext import ApplicationBuilder, TypeHandler
+from scr.bot.concurrency import KeyedLock, OrderedApplication
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": "⬅ Назад",
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+        },
+    }, None)
+
+
+@pytest.mark.asyncio
+async def test_updates_of_one_chat_stay_ordered(monkeypatch):
+    app = ApplicationBuilder().token("1:TEST").application_class(OrderedApplication).build()
+    monkeypatch.setattr(type(app.bot), "initialize", AsyncMock())
+    await app.initialize()
+    seen = []
+
+    async def handler(update, context):
+        # первый апдейт каждого чата самый медленный: без лока его обогнали бы
+        await asyncio.sleep(0.05 if update.update_id < 3 else 0.01)
+        seen.append((update.effective_chat.id, update.update_id))
+
+    app.add_handler(TypeHandler(Update, handler))
+    updates = [make_update(i, chat_id=1 + i % 2) for i in range(1, 11)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(app.process_update(u) for u in updates))
+    elapsed = time.perf_counter() - started
+
+    for chat_id in (1, 2):
+        ids = [uid for chat, uid in seen if chat == chat_id]
+        assert ids == sorted(ids)
+    # два чата обрабатывались параллельно, а не один за другим (0.05 + 0.05 + 8 * 0.01)
+    assert elapsed < 0.17
+    assert len(app.chat_locks) == 0
+
+
+@pytest.mark.asyncio
+async def test_keyed_lock_serializes_same_key_only():
+    lock = KeyedLock()
+    order = []
+
+    async def worker(key, name, delay):
+        async with lock.hold(key):
+            await asyncio.sleep(delay)
+            order.append(name)
+
+    await asyncio.gather(worker("a", "a1", 0.03), worker("a", "a2", 0), worker("b", "b1", 0))
+    assert order == ["b1", "a1", "a2"]
+    assert len(lock) == 0
@@ -0,0 +1,64 @@
+import pytest
+import structlog
+from scr.core import events
+from scr.bot.instrumentation import timed_handler
+
+
+def run_sample(method, event, key, monkeypatch, rate=0.25):
+    monkeypatch.setitem(events.SAMPLE_RATES, event, rate)
+    try:
+        return events.sample(None, method, {"event": event, "sample_key": key})
+    except structlog.DropEvent:
+        return None
+
+
+def test_sampling_is_deterministic(monkeypatch):
+    kept = [run_sample("info", "handler", key, monkeypatch) is not None for key in range(10_000)]
+    again = [run_sample("info", "handler", key, monkeypatch) is not None for key in range(10_000)]
+
+    assert kept == again
+    assert 0.22 < sum(kept) / len(kept) < 0.28
+    assert run_sample("info", "handler", 1, monkeypatch) in (None, {"event": "handler", "sample_rate": 0.25})
+
+
+def test_errors_are_always_kept(monkeypatch):
+    assert all(run_sample("error", "handler", key, monkeypatch, rate=0.0) for key in range(100))
+    assert run_sample("info", "handler", 1, monkeypatch, rate=0.0) is None
+
+
+def test_analyze_scales_sampled_counts():
+    records = [
+        {"event": "handler", "handler": "today_handler", "duration_ms": float(ms), "sample_rate": 0.25,
+         "cache_schedule": "hit" if ms % 2 else "miss", "outcome": "ok"}
+        for ms in range(1, 11)
+    ]
+    records.append({"event": "handler", "handler": "today_handler", "duration_ms": 50.0, "outcome": "error"})
+    records.append({"event": "other"})
+
+    [row] = events.analyze(records)
+
+    assert row["handler"] == "today_handler"
+    assert row["count"] == 41  # 10 событий с rate 0.25 + ошибка без сэмплирования
+    assert row["sampled"] == 11
+    assert row["errors"] == 1
+    assert row["max"] == 50.0
+    assert row["cache_hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_timed_handler_emits_event(monkeypatch):
+    emitted = []
+    monkeypatch.setattr(events, "handler_event", lambda *args: emitted.append(args))
+
+    async def broken_handler(update, context):
+        events.annotate(cache_schedule="hit")
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await timed_handler(broken_handler)(None, None)
+
+    name, update, duration, phases, outcome = emitted[0]
+    assert (name, outcome) == ("broken_handler", "error")
+    # поля апдейта видны событиям, пока не начнётся следующий обработчик
+    assert structlog.contextvars.get_contextvars() == {"cache_schedule": "hit"}
+    events.start_update_context()
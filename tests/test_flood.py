@@ -0,0 +1,99 @@
+import pytest
+from telegram.ext import ApplicationHandlerStop
+from tests.conftest import create_mock_update
+from scr.bot import flood
+from scr.bot.flood import FloodGuard, TokenBucket, classify, FLOOD_REPLY
+
+
+def test_token_bucket_limits_burst(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(flood.time, "monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=1, burst=3)
+
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+    now[0] += 1
+    assert bucket.take()
+    assert not bucket.take()
+
+
+def test_classify_heavy_and_plain():
+    assert classify(create_mock_update(1, "/search физика")[0]) == "heavy"
+    assert classify(create_mock_update(1, "/start")[0]) == "command"
+    assert classify(create_mock_update(1, "привет")[0]) == "other"
+
+
+def test_classify_teacher_callbacks():
+    def callback(data):
+        update = create_mock_update(1, is_callback=True)[0]
+        update.callback_query.data = data
+        return classify(update)
+
+    assert callback("teacher_pairs_42") == "heavy"
+    assert callback("teacher_consult_42") == "heavy"
+    # навигация по меню преподавателей не загружает страниц
+    for data in ("teachers_list", "teacher_42", "teacher_day_42_Среда", "teacher_day_all_42"):
+        assert callback(data) == "callback"
+
+
+@pytest.mark.asyncio
+async def test_inline_queries_have_own_bucket(monkeypatch):
+    from types import SimpleNamespace
+    from unittest.mock import AsyncMock
+    from telegram import User
+    monkeypatch.setattr(flood, "FLOOD_INLINE_BURST", 3)
+    monkeypatch.setattr(flood, "FLOOD_INLINE_RATE", 0.001)
+    guard = FloodGuard()
+    user = User(id=555555556, is_bot=False, first_name="TestUser")
+
+    def inline_update():
+        return SimpleNamespace(effective_user=user, callback_query=None, inline_query=AsyncMock(), effective_message=None)
+
+    for _ in range(3):
+        await guard(inline_update(), None)
+    blocked = inline_update()
+    with pytest.raises(ApplicationHandlerStop):
+        await guard(blocked, None)
+    blocked.inline_query.answer.assert_called_once_with([], cache_time=0, is_personal=True)
+
+    # общий лимит команд не израсходован
+    update, context, bot = create_mock_update(user.id, "/start")
+    await guard(update, context)
+
+
+@pytest.mark.asyncio
+async def test_guard_stops_flood_and_replies_once(monkeypatch):
+    monkeypatch.setattr(flood, "FLOOD_USER_BURST", 2)
+    monkeypatch.setattr(flood, "FLOOD_USER_RATE", 0.001)
+    guard = FloodGuard()
+    user_id = 555555555
+
+    for _ in range(2):
+        update, context, bot = create_mock_update(user_id, "/start")
+        await guard(update, context)
+
+    replies = 0
+    for _ in range(3):
+        update, context, bot = create_mock_update(user_id, "/start")
+        with pytest.raises(ApplicationHandlerStop):
+            await guard(update, context)
+        replies += bot.send_message.call_count
+        if bot.send_message.call_count:
+            assert bot.send_message.call_args[1]["text"] == FLOOD_REPLY
+    assert replies == 1
+
+
+@pytest.mark.asyncio
+async def test_guard_stops_update_when_reply_fails(monkeypatch):
+    from telegram.error import BadRequest
+    monkeypatch.setattr(flood, "FLOOD_USER_BURST", 1)
+    monkeypatch.setattr(flood, "FLOOD_USER_RATE", 0.001)
+    guard = FloodGuard()
+    user_id = 555555556
+
+    update, context, bot = create_mock_update(user_id, "/start")
+    await guard(update, context)
+
+    update, context, bot = create_mock_update(user_id, "/start")
+    bot.send_message.side_effect = BadRequest("Forbidden: bot was blocked by the user")
+    with pytest.raises(ApplicationHandlerStop):
+        await guard(update, context)
@@ -56,8 +56,27 @@ async def test_broadcast_success(mock_settings):
     users.add_user(6000000000, "user")
     update, context, bot = create_mock_update(owner_id, "/broadcast")
     context.args = ["Тестовое сообщение"]
-    await broadcast(update, context)
-    assert "Рассылка завершена" in bot.send_message.call_args[1]["text"]
+
+    import asyncio
+    from telegram import Chat, Message
+    from scr.bot import broadcasts
+    from scr.bot.handlers import admin
+    manager = broadcasts.BroadcastManager(mock_settings["stats"].parent / "broadcasts.json")
+    admin.broadcast_manager = manager
+    bot.send_message.return_value = Message(message_id=10, date=None, chat=Chat(id=owner_id, type="private"))
+    context.application.bot = bot
+    try:
+        await broadcast(update, context)
+        assert "Рассылка #1 запущена" in bot.send_message.call_args_list[0][1]["text"]
+        await asyncio.gather(*manager._tasks.values())
+    finally:
+        admin.broadcast_manager = broadcasts.broadcast_manager
+
+    job = manager.get(1)
+    assert job["status"] == "done"
+    assert job["cursor"] == len(job["recipients"])
+    assert "6000000000" in [str(c[1]["chat_id"]) for c in bot.send_message.call_args_list]
+    assert "завершена" in bot.edit_message_text.call_args[1]["text"]
 
 @pytest.mark.asyncio
 async def test_stats_command_no_rights(mock_settings):
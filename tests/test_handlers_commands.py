@@ -42,4 +42,68 @@ async def test_map_no_access(mock_settings):
     user_id = 888888886
     update, context, bot = create_mock_update(user_id, "/map")
     await map_command(update, context)
-    assert "нет доступа" in bot.send_message.call_args[1]["text"]
\ No newline at end of file
+    assert "нет доступа" in bot.send_message.call_args[1]["text"]
+
+
+def _search_schedule(lessons: int) -> dict:
+    return {"week_1": {"Понедельник": [
+        {"time": "08:00-09:30", "info": f"Предмет {i} (Лекция)\nИванов И.И.", "subgroup": None}
+        for i in range(lessons)
+    ]}}
+
+@pytest.mark.asyncio
+async def test_search_pages_come_from_cache(mock_settings, monkeypatch):
+    from scr.core.settings import OWNER_ID
+    from scr.core.users import UserManager
+    from scr.bot.handlers import misc
+    UserManager(OWNER_ID).add_user(OWNER_ID, "owner")
+
+    async def fetch_schedule(*args, **kwargs):
+        return _search_schedule(25)
+
+    async def fetch_teachers(*args, **kwargs):
+        return {}
+
+    calls = []
+    run_search = misc.run_search
+
+    def counting_search(query, indexes):
+        calls.append(query)
+        return run_search(query, indexes)
+
+    monkeypatch.setattr(misc, "fetch_schedule", fetch_schedule)
+    monkeypatch.setattr(misc, "fetch_teachers", fetch_teachers)
+    monkeypatch.setattr(misc, "run_search", counting_search)
+    monkeypatch.setattr(misc.schedule_parser, "schedule_version", 10_001)
+    misc.search_cache.clear()
+
+    update, context, bot = create_mock_update(OWNER_ID, "/search")
+    context.args = ["лекция"]
+    await search_command(update, context)
+    kwargs = bot.send_message.call_args[1]
+    assert "Страница 1/3" in kwargs["text"] and "(25)" in kwargs["text"]
+    [buttons] = kwargs["reply_markup"].inline_keyboard
+    assert [b.text for b in buttons] == ["Далее ➡"]
+
+    # листание и повторный такой же запрос поиск не запускают
+    update, context, bot = create_mock_update(OWNER_ID, is_callback=True)
+    update.callback_query.data = buttons[0].callback_data
+    await misc.search_page_handler(update, context)
+    text = update.callback_query.edit_message_text.call_args[1]["text"]
+    assert "Страница 2/3" in text and "Предмет 10 " in text
+
+    update, context, bot = create_mock_update(OWNER_ID, "/search")
+    context.args = ["Лекция"]
+    await search_command(update, context)
+    assert calls == ["лекция"]
+
+    # новая версия данных — новый поиск
+    monkeypatch.setattr(misc.schedule_parser, "schedule_version", 10_002)
+    await search_command(update, context)
+    assert calls == ["лекция", "лекция"]
+
+def test_search_pages_respect_text_limit():
+    from scr.bot.handlers.misc import paginate
+    pages = paginate(["x" * 400] * 12, page_size=10, limit=1000)
+    assert [len(page) for page in pages] == [800] * 6
+    assert paginate(["a", "b", "c"], page_size=2) == ["ab", "c"]
@@ -0,0 +1,81 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from telegram import User
+from scr.bot.handlers import inline
+
+
+def create_inline_update(user_id: int, query: str):
+    inline_query = AsyncMock()
+    inline_query.from_user = User(id=user_id, is_bot=False, first_name="TestUser")
+    inline_query.query = query
+    context = AsyncMock()
+    return SimpleNamespace(inline_query=inline_query, effective_user=inline_query.from_user), context
+
+
+@pytest.fixture
+def inline_schedule(monkeypatch):
+    schedule = {"week_1": {"Среда": [
+        {"time": "08:00-09:30", "info": "Математический анализ (Лекция)\nИванов И.И.", "subgroup": None},
+    ]}, "week_2": {}}
+    monkeypatch.setattr(inline, "schedule_cache", schedule)
+    monkeypatch.setattr(inline.schedule_parser, "schedule_version", 20_001)
+    monkeypatch.setattr(inline, "get_current_week_and_day", lambda: ("01.10.2025", "Среда", "week_1"))
+    monkeypatch.setattr(inline, "get_tomorrow_week_and_day", lambda: ("02.10.2025", "Четверг", "week_1"))
+    inline.inline_cache.clear()
+    return schedule
+
+
+@pytest.mark.asyncio
+async def test_inline_no_access(mock_settings):
+    update, context = create_inline_update(888888885, "матан")
+    await inline.inline_query_handler(update, context)
+    args, kwargs = update.inline_query.answer.call_args
+    assert args[0] == [] and kwargs["is_personal"] is True
+    # отказ не кэшируется: после добавления в список доступа ответ сразу другой
+    assert kwargs["cache_time"] == 0
+
+
+@pytest.mark.asyncio
+async def test_inline_today_and_search_from_cache(mock_settings, inline_schedule, monkeypatch):
+    from scr.core.settings import OWNER_ID
+    from scr.core.users import UserManager
+    UserManager(OWNER_ID).add_user(OWNER_ID, "owner")
+
+    update, context = create_inline_update(OWNER_ID, "сег")
+    await inline.inline_query_handler(update, context)
+    [today] = update.inline_query.answer.call_args[0][0]
+    assert today.title == "Сегодня"
+    assert "Математический анализ" in today.input_message_content.message_text
+
+    calls = []
+    run_search = inline.run_search
+    monkeypatch.setattr(inline, "run_search", lambda query, indexes: calls.append(query) or run_search(query, indexes))
+    for _ in range(2):
+        update, context = create_inline_update(OWNER_ID, "Матан")
+        await inline.inline_query_handler(update, context)
+    results = update.inline_query.answer.call_args[0][0]
+    assert [r.title for r in results] == ["Математический анализ (Лекция)"]
+    assert results[0].description == "1-ая неделя, Среда, 08:00-09:30"
+    assert update.inline_query.answer.call_args[1] == {"cache_time": inline.INLINE_CACHE_TIME, "is_personal": True}
+    assert calls == ["матан"]
+
+
+def test_search_titles_are_plain_text():
+    res = {
+        "source": "schedule", "week": "week_1", "day": "Среда", "time": "08:00-09:30",
+        "info": "*Основы C\\_\\* (Лекция)*\nИванов И.И.", "subgroup": None, "classroom": None,
+    }
+    [result] = inline.search_articles([res])
+    assert result.title == "Основы C_* (Лекция)"
+
+
+def test_long_teacher_text_is_cut_between_pairs():
+    block = "1-ая неделя - Среда\n⏰ 08:00-09:30\n📚 *Очень длинное название дисциплины*\n\n"
+    text = "👨‍🏫 Преподаватель: *Иванов*\n\n" + block * 100
+    cut = inline.truncate_message(text)
+
+    assert len(cut) <= inline.MESSAGE_LIMIT
+    assert cut.endswith("*\n…")
+    assert cut.count("*") % 2 == 0
+    assert inline.truncate_message("коротко") == "коротко"
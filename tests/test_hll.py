@@ -0,0 +1,51 @@
+import json
+from scr.core.hll import HyperLogLog
+from scr.core.stats import StatsManager
+from scr.core.storage import SqliteStorage
+
+
+def test_hll_estimate_within_error():
+    hll = HyperLogLog()
+    hll.update(range(20000))
+    assert abs(len(hll) - 20000) / 20000 < 3 * hll.error
+    assert len(hll.registers) == 4096
+
+
+def test_hll_merge_and_serialization():
+    a, b = HyperLogLog(), HyperLogLog()
+    a.update(range(0, 600))
+    b.update(range(300, 900))
+    a.merge(b)
+    assert abs(len(a) - 900) / 900 < 3 * a.error
+
+    restored = HyperLogLog.from_str(a.to_str())
+    assert restored.registers == a.registers
+
+
+def test_stats_manager_hll_mode_roundtrip(temp_dir):
+    path = temp_dir / "stats.json"
+    manager = StatsManager(file_path=str(path), backend="json", counter_mode="hll")
+    for uid in range(100):
+        manager.stats["unique_users"].add(uid)
+        manager.record_daily_active(uid)
+    manager.flush()
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert HyperLogLog.is_serialized(data["unique_users"])
+
+    reloaded = StatsManager(file_path=str(path), backend="json", counter_mode="hll")
+    assert reloaded.estimate_error is not None
+    assert abs(reloaded.unique_users_count() - 100) <= 3
+    assert abs(sum(reloaded.rollups()["daily"].values()) - 100) <= 3
+
+
+def test_sqlite_keeps_hll_sketches(temp_dir):
+    sketch = HyperLogLog()
+    sketch.update([1, 2, 3])
+    storage = SqliteStorage(temp_dir / "bot.db")
+    storage.load_stats()
+    storage.save_stats({"unique_users": sketch.to_str(), "daily_active_users": {"2024-09-01": sketch.to_str()}})
+    data = storage.load_stats()
+    assert data["unique_users"] == sketch.to_str()
+    assert data["daily_active_users"] == {"2024-09-01": sketch.to_str()}
+    storage.close()
@@ -1,3 +1,4 @@
+import logging
 import pytest
 from tests.conftest import create_mock_update
 from scr.bot.handlers.admin import adduser
@@ -11,4 +12,41 @@ async def test_warning_log_written(caplog):
     with caplog.at_level("WARNING"):
         await adduser(update, context)
 
-    assert any("попытался выполнить /adduser без прав" in msg for msg in caplog.messages)
\ No newline at end of file
+    assert any("попытался выполнить /adduser без прав" in msg for msg in caplog.messages)
+
+
+class Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+
+
+def test_queue_handler_drops_debug_under_pressure():
+    from scr.core.logger import BoundedQueueHandler
+    from scr.core.metrics import registry
+
+    collector = Collector()
+    handler = BoundedQueueHandler([collector], maxsize=4)
+    handler.listener.stop()  # слушатель стоит — очередь только заполняется
+    dropped = registry.counter("log_records_dropped_total", level="DEBUG").value
+
+    def log(level, msg):
+        handler.handle(logging.makeLogRecord({"levelno": level, "levelname": logging.getLevelName(level), "msg": msg}))
+
+    log(logging.INFO, "i1")
+    log(logging.INFO, "i2")
+    log(logging.DEBUG, "d1")   # очередь заполнена наполовину — DEBUG отбрасывается
+    log(logging.WARNING, "w1")
+    log(logging.INFO, "i3")
+    log(logging.INFO, "i4")    # очередь полна — INFO отбрасывается
+    warnings_dropped = registry.counter("log_records_dropped_total", level="WARNING").value
+    log(logging.WARNING, "w2")  # и WARNING тоже: loop не ждёт места в очереди
+
+    assert registry.counter("log_records_dropped_total", level="DEBUG").value == dropped + 1
+    assert registry.counter("log_records_dropped_total", level="WARNING").value == warnings_dropped + 1
+    handler.listener.start()
+    handler.close()
+    assert collector.records == ["i1", "i2", "w1", "i3"]
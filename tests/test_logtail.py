@@ -0,0 +1,45 @@
+from scr.core.logtail import reverse_lines, tail
+
+
+def write_log(path, records):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, (level, text) in enumerate(records):
+            f.write(f"2024-01-01 12:00:{i % 60:02d} - {level} - {text}\r\n")
+
+
+def test_reverse_lines_across_small_blocks(tmp_path):
+    path = tmp_path / "warning.log"
+    lines = [f"строка {i} " + "x" * (i % 7) for i in range(200)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    assert list(reverse_lines(path, block_size=16)) == lines[::-1]
+
+
+def test_tail_spans_rotated_files(tmp_path):
+    path = tmp_path / "warning.log"
+    write_log(f"{path}.1", [("WARNING", f"old {i}") for i in range(5)])
+    write_log(path, [("WARNING", f"new {i}") for i in range(3)])
+
+    lines = tail(path, 5)
+
+    assert [line.rsplit(" - ", 1)[1] for line in lines] == ["old 3", "old 4", "new 0", "new 1", "new 2"]
+
+
+def test_tail_filters_keep_whole_records(tmp_path):
+    path = tmp_path / "warning.log"
+    write_log(path, [("WARNING", "a"), ("ERROR", "Ошибка парсинга"), ("WARNING", "b"), ("CRITICAL", "c")])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("Traceback (most recent call last):\n  ValueError: boom\n")
+
+    assert tail(path, 10, level="error") == [
+        "2024-01-01 12:00:01 - ERROR - Ошибка парсинга",
+        "2024-01-01 12:00:03 - CRITICAL - c",
+        "Traceback (most recent call last):",
+        "  ValueError: boom",
+    ]
+    assert tail(path, 10, contains="ОШИБКА") == ["2024-01-01 12:00:01 - ERROR - Ошибка парсинга"]
+    assert tail(path, 10, contains="boom")[0].endswith("CRITICAL - c")
+
+
+def test_tail_missing_file(tmp_path):
+    assert tail(tmp_path / "warning.log", 10) == []
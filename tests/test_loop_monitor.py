@@ -0,0 +1,42 @@
+import asyncio
+import time
+import pytest
+from scr.core.loop_monitor import LoopWatchdog
+
+
+def blocking_call():
+    time.sleep(0.4)
+
+
+@pytest.mark.asyncio
+async def test_watchdog_captures_blocking_stack():
+    watchdog = LoopWatchdog(interval=0.02, threshold=0.1, sample_interval=0.02, log_cooldown=0)
+    task = asyncio.create_task(watchdog.heartbeat())
+    watchdog.start_thread()
+    try:
+        await asyncio.sleep(0.1)
+        blocking_call()
+        await asyncio.sleep(0.2)
+    finally:
+        task.cancel()
+        watchdog.stop()
+
+    assert len(watchdog.recent_blocks) == 1
+    block = watchdog.recent_blocks[0]
+    assert block["duration_ms"] >= 200
+    assert "blocking_call" in block["location"]
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_heartbeat(monkeypatch):
+    from scr.core import loop_monitor
+    watchdog = LoopWatchdog(interval=0.02, threshold=0.1, sample_interval=0.02)
+    monkeypatch.setattr(loop_monitor, "watchdog", watchdog)
+    loop_monitor.start_loop_monitor(None)
+    task = watchdog.task
+    await asyncio.sleep(0.05)
+
+    watchdog.stop()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert watchdog.task is None
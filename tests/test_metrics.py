@@ -0,0 +1,53 @@
+import pytest
+from scr.core import metrics
+from scr.core.metrics import Histogram, MetricsRegistry
+from scr.bot.instrumentation import timed_handler, latency_summary
+
+
+def test_histogram_quantiles():
+    hist = Histogram(buckets=(0.01, 0.1, 1.0))
+    for _ in range(90):
+        hist.observe(0.005)
+    for _ in range(10):
+        hist.observe(0.5)
+    assert hist.count == 100
+    assert hist.quantile(0.5) <= 0.01
+    assert 0.1 < hist.quantile(0.99) <= 1.0
+
+
+def test_registry_returns_same_metric_for_same_labels():
+    reg = MetricsRegistry()
+    assert reg.counter("x", a="1") is reg.counter("x", a="1")
+    assert reg.counter("x", a="1") is not reg.counter("x", a="2")
+
+
+@pytest.mark.asyncio
+async def test_timed_handler_records_phases():
+    async def sample_handler(update, context):
+        with metrics.phase("fetch"):
+            pass
+        return "ok"
+
+    wrapped = timed_handler(sample_handler)
+    assert await wrapped(None, None) == "ok"
+
+    item = next(i for i in latency_summary() if i["handler"] == "sample_handler")
+    assert item["count"] == 1
+    assert {"fetch", "render"} <= set(item["phases"])
+
+
+def test_render_prometheus_format():
+    reg = MetricsRegistry()
+    reg.describe("requests_total", "Всего запросов")
+    reg.counter("requests_total", handler='say "hi"').inc(3)
+    hist = reg.histogram("latency_seconds", buckets=(0.1, 1.0), handler="start")
+    hist.observe(0.05)
+    hist.observe(0.5)
+
+    text = reg.render_prometheus()
+    assert "# HELP bot_requests_total Всего запросов" in text
+    assert "# TYPE bot_requests_total counter" in text
+    assert 'bot_requests_total{handler="say \\"hi\\""} 3' in text
+    assert 'bot_latency_seconds_bucket{handler="start",le="0.1"} 1' in text
+    assert 'bot_latency_seconds_bucket{handler="start",le="+Inf"} 2' in text
+    assert 'bot_latency_seconds_count{handler="start"} 2' in text
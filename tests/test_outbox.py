@@ -0,0 +1,61 @@
+import asyncio
+import json
+import time
+import pytest
+from telegram.request import HTTPXRequest, RequestData
+from telegram.request._requestparameter import RequestParameter
+from scr.bot import outbox as outbox_module
+from scr.bot.outbox import Outbox, OutboxRequest, BULK, INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_interactive_sends_overtake_bulk():
+    box = Outbox(rate=20, chat_interval=0)
+    order = []
+
+    async def send(name, chat_id, level):
+        await box.acquire(chat_id, level)
+        order.append(name)
+
+    bulk = [asyncio.create_task(send(f"bulk{i}", i, BULK)) for i in range(20)]
+    await asyncio.sleep(0.05)
+    await send("reply", 999, INTERACTIVE)
+    await asyncio.gather(*bulk)
+
+    # к моменту ответа успело уйти ~5 рассылочных сообщений из 20
+    assert order.index("reply") < 8
+
+
+@pytest.mark.asyncio
+async def test_bulk_sends_are_paced_per_chat():
+    box = Outbox(rate=1000, chat_interval=0.1)
+    granted = []
+    for _ in range(3):
+        await box.acquire(42, BULK)
+        granted.append(time.monotonic())
+
+    assert granted[1] - granted[0] >= 0.09
+    assert granted[2] - granted[1] >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_retried(monkeypatch):
+    monkeypatch.setattr(outbox_module, "outbox", Outbox(rate=1000, chat_interval=0))
+    replies = [
+        (429, json.dumps({"ok": False, "error_code": 429, "parameters": {"retry_after": 0.05}}).encode()),
+        (200, json.dumps({"ok": True, "result": True}).encode()),
+    ]
+    calls = []
+
+    async def fake_do_request(self, url, method, request_data=None, **kwargs):
+        calls.append(time.monotonic())
+        return replies[len(calls) - 1]
+
+    monkeypatch.setattr(HTTPXRequest, "do_request", fake_do_request)
+    request = OutboxRequest()
+    data = RequestData([RequestParameter.from_input("chat_id", 1), RequestParameter.from_input("text", "hi")])
+    status, _ = await request.do_request("https://api.telegram.org/botX/sendMessage", "POST", data)
+
+    assert status == 200
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.05
@@ -0,0 +1,128 @@
+import asyncio
+import httpx
+import pytest
+from scr.parsers import schedule_parser
+from scr.parsers.schedule_parser import fetch_schedule, schedule_cache, parse_minutes, get_current_and_next_lesson
+
+PAGE = """
+<div id="week_1_tab">
+  <div class="day monday">
+    <div class="line">
+      <div class="time">08:00 09:30</div>
+      <div class="discipline">Математика (Лекция)</div>
+    </div>
+  </div>
+</div>
+"""
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    schedule_cache.clear()
+    monkeypatch.setattr(schedule_parser, "finish_fetch", lambda record, parse_seconds, lessons: [])
+    yield
+    schedule_cache.clear()
+
+
+def fake_get(calls, delay=0.0, fail=False):
+    async def timed_get(client, url, target):
+        calls.append(url)
+        # пока идёт загрузка, обработчики продолжают читать кэш
+        await asyncio.sleep(delay)
+        if fail:
+            raise httpx.ConnectError("pallada недоступна")
+        response = httpx.Response(200, text=PAGE, request=httpx.Request("GET", "http://localhost/"))
+        return response, {}
+    return timed_get
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(monkeypatch):
+    calls = []
+    monkeypatch.setattr(schedule_parser, "timed_get", fake_get(calls, delay=0.05))
+
+    results = await asyncio.gather(*(fetch_schedule(None) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(result is schedule_cache for result in results)
+    assert schedule_cache["week_1"]["Понедельник"]
+
+
+@pytest.mark.asyncio
+async def test_forced_reload_keeps_old_data_until_swap(monkeypatch):
+    schedule_cache["week_1"] = {"Понедельник": ["старое"]}
+    version = schedule_parser.schedule_version
+    monkeypatch.setattr(schedule_parser, "timed_get", fake_get([], delay=0.05))
+
+    reload_task = asyncio.create_task(fetch_schedule(None, force=True))
+    await asyncio.sleep(0.01)
+    # во время загрузки читатели видят прежнее расписание, а не пустой кэш
+    assert (await fetch_schedule(None))["week_1"]["Понедельник"] == ["старое"]
+
+    await reload_task
+    assert schedule_cache["week_1"]["Понедельник"] != ["старое"]
+    assert schedule_parser.schedule_version == version + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_forced_reload_keeps_cache(monkeypatch):
+    schedule_cache["week_1"] = {"Понедельник": ["старое"]}
+    version = schedule_parser.schedule_version
+    monkeypatch.setattr(schedule_parser, "timed_get", fake_get([], fail=True))
+
+    await fetch_schedule(None, force=True)
+
+    assert schedule_cache["week_1"] == {"Понедельник": ["старое"]}
+    assert schedule_parser.schedule_version == version
+
+
+
+def test_parse_minutes():
+    assert parse_minutes("08:00-09:30") == (480, 570)
+    assert parse_minutes("10:15 11:00") == (615, 660)
+    # только начало: конец стандартного слота или 90 минут
+    assert parse_minutes("09:40") == (580, 670)
+    assert parse_minutes("07:05") == (425, 515)
+    assert parse_minutes("по договорённости") == (None, None)
+
+
+def lesson(time, info, subgroup=None):
+    return {"time": time, "info": info, "subgroup": subgroup}
+
+
+def test_current_and_next_lesson_with_non_standard_times():
+    schedule = {"week_1": {"Среда": [
+        lesson("13:30-15:00", "Физика"),
+        lesson("08:00-09:30", "Математика", "1 подгруппа"),
+        lesson("08:00-09:30", "Информатика", "2 подгруппа"),
+        lesson("10:15-13:15", "Практикум"),  # нестандартное время и длинная пара
+        lesson("11:30-13:00", "История"),
+    ]}}
+
+    def at(now):
+        current, until_end, following, until_next = get_current_and_next_lesson(schedule, "week_1", "Среда", now)
+        return (current or {}).get("info"), until_end, (following or {}).get("info"), until_next
+
+    assert at(7 * 60) == (None, None, "Математика", 60)
+    assert at(8 * 60 + 10) == ("Математика", 80, "Практикум", 125)
+    assert at(10 * 60 + 20) == ("Практикум", 175, "История", 70)
+    # История началась позже, но Практикум ещё идёт — показывается начавшаяся последней
+    assert at(12 * 60) == ("История", 60, "Физика", 90)
+    # История закончилась, а начавшийся раньше Практикум — ещё нет
+    assert at(13 * 60 + 10) == ("Практикум", 5, "Физика", 20)
+    assert at(13 * 60 + 20) == (None, None, "Физика", 10)
+    assert at(16 * 60) == (None, None, None, None)
+    assert get_current_and_next_lesson(schedule, "week_2", "Среда", 600) == (None, None, None, None)
+
+
+@pytest.mark.asyncio
+async def test_loaded_lessons_store_minutes_and_index(monkeypatch):
+    monkeypatch.setattr(schedule_parser, "timed_get", fake_get([]))
+    await fetch_schedule(None)
+
+    [monday] = schedule_cache["week_1"]["Понедельник"]
+    assert (monday["time"], monday["start"], monday["end"]) == ("08:00", 480, 570)
+    day = schedule_parser.lesson_index.days[("week_1", "Понедельник")]
+    assert day.starts == [480] and day.lessons == [monday]
+    current, until_end, _, _ = get_current_and_next_lesson(schedule_cache, "week_1", "Понедельник", 500)
+    assert current is monday and until_end == 70
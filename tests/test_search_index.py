@@ -0,0 +1,70 @@
+from scr.parsers.search_index import (
+    SearchIndex, VersionedIndex, schedule_documents, teacher_documents, expand_query,
+)
+
+SCHEDULE = {
+    "week_1": {
+        "_today_day": "Понедельник",
+        "Понедельник": [
+            {"time": "08:00-09:30", "info": "Математический анализ (Лекция)\nИванов Пётр\nауд. Л-301"},
+            {"time": "09:40-11:10", "info": "Физическая культура\nСпортзал"},
+        ],
+    },
+    "session": {
+        "20.01": [{"time": "10:00", "info": "Экзамен: Математический анализ\nИванов Пётр"}],
+    },
+}
+
+
+def build():
+    return SearchIndex(*schedule_documents(SCHEDULE))
+
+
+def test_prefix_and_multiword_and():
+    index = build()
+
+    assert [doc["week"] for doc in index.search("матем")] == ["week_1", "session"]
+    assert [doc["week"] for doc in index.search("матем экзамен")] == ["session"]
+    assert index.search("физ лекция") == []
+
+
+def test_normalization_of_case_and_yo():
+    index = build()
+
+    assert len(index.search("ПЕТР")) == 2
+    assert index.search("л-301")[0]["time"] == "08:00-09:30"
+
+
+def test_teacher_documents_and_versioning():
+    teachers = {"1": {"name": "Иванов Пётр Сергеевич"}, "2": {"name": "Петрова Анна"}}
+    holder = VersionedIndex(teacher_documents)
+
+    assert [doc["id"] for doc in holder.get(1, teachers).search("пет")] == ["1", "2"]
+    # та же версия — индекс не перестраивается
+    teachers["3"] = {"name": "Петров Олег"}
+    assert len(holder.get(1, teachers).search("пет")) == 2
+    assert len(holder.get(2, teachers).search("пет")) == 3
+
+
+def test_expand_query_synonyms_and_translit():
+    assert expand_query("Матан") == "математический анализ"
+    assert expand_query("физ-ра") == "физическая культура"
+    assert expand_query("Ivanov Pyotr") == "иванов петр"
+    assert expand_query("л-301") == "л-301"
+    assert build().search(expand_query("физ-ра"))[0]["time"] == "09:40-11:10"
+
+
+def test_fuzzy_search_ranks_typos():
+    teachers = {
+        "1": {"name": "Кузнецов Сергей Иванович"},
+        "2": {"name": "Кузьмин Олег Петрович"},
+        "3": {"name": "Смирнова Анна"},
+    }
+    index = SearchIndex(*teacher_documents(teachers))
+
+    assert index.search("кузнецв") == []
+    ranked = index.fuzzy_search("кузнецв")
+    assert ranked[0][1]["id"] == "1"
+    assert all(score <= ranked[0][0] for score, _ in ranked)
+    # латиница с опечаткой: сначала транслитерация, затем триграммы
+    assert index.fuzzy_search(expand_query("kuznecov sergei"))[0][1]["id"] == "1"
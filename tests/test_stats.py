@@ -0,0 +1,56 @@
+import json
+import time
+from scr.core.stats import StatsManager
+
+
+def test_save_is_deferred_until_flush(temp_dir):
+    path = temp_dir / "stats.json"
+    manager = StatsManager(file_path=str(path), backend="json", flush_interval=60)
+    manager.stats["total_messages"] += 1
+    manager.save()
+    assert not path.exists()
+
+    manager.stop()
+    assert json.loads(path.read_text(encoding="utf-8"))["total_messages"] == 1
+
+
+def test_background_flush(temp_dir):
+    path = temp_dir / "stats.json"
+    manager = StatsManager(file_path=str(path), backend="json", flush_interval=0.05)
+    manager.stats["unique_users"].add(42)
+    manager.save()
+    deadline = time.monotonic() + 2
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert json.loads(path.read_text(encoding="utf-8"))["unique_users"] == [42]
+    manager.stop()
+
+
+def test_compact_rolls_up_old_days(temp_dir, monkeypatch):
+    monkeypatch.setattr("scr.core.stats.DAU_RETENTION_DAYS", 2)
+    from datetime import datetime
+    manager = StatsManager(file_path=str(temp_dir / "stats.json"), backend="json")
+    manager.stats["daily_active_users"]["2024-09-01"] = {1, 2, 3}
+    manager.stats["daily_active_users"]["2024-09-10"] = {1}
+    manager.stats["weekly_active_users"]["2024-W35"] = {1, 2, 3}
+    manager.stats["monthly_active_users"]["2024-09"] = {1, 2, 3}
+
+    manager.compact(datetime(2024, 9, 10))
+
+    assert list(manager.stats["daily_active_users"]) == ["2024-09-10"]
+    assert manager.stats["activity_rollups"]["daily"] == {"2024-09-01": 3}
+    assert manager.stats["activity_rollups"]["weekly"] == {"2024-W35": 3}
+    assert "2024-09" in manager.stats["monthly_active_users"]
+    assert manager.rollups()["daily"] == {"2024-09-01": 3, "2024-09-10": 1}
+
+
+def test_legacy_daily_history_is_rolled_up(temp_dir):
+    path = temp_dir / "stats.json"
+    path.write_text(json.dumps({"daily_active_users": {"2020-01-01": [1, 2], "2020-01-02": [2, 3]}}), encoding="utf-8")
+    manager = StatsManager(file_path=str(path), backend="json")
+    activity = manager.rollups()
+    # дни старше DAU_ROLLUP_DAYS отброшены, недели и месяцы остаются
+    assert activity["daily"] == {}
+    assert activity["weekly"] == {"2020-W01": 3}
+    assert activity["monthly"] == {"2020-01": 3}
+    assert not manager.stats["daily_active_users"]
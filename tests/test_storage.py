@@ -0,0 +1,103 @@
+import json
+from scr.core.storage import SqliteStorage, migrate_from_json
+
+
+def test_sqlite_users_roundtrip(temp_dir):
+    storage = SqliteStorage(temp_dir / "bot.db")
+    storage.replace_users({"1": {"role": "admin", "username": "a"}, "2": "user"})
+    assert storage.get_user(1) == {"role": "admin", "username": "a"}
+    assert storage.get_user(2)["role"] == "user"
+
+    storage.replace_users({"2": {"role": "mod", "username": "b"}})
+    assert storage.get_user(1) is None
+    assert storage.load_users() == {"2": {"role": "mod", "username": "b"}}
+    storage.close()
+
+
+def test_sqlite_stats_incremental(temp_dir):
+    storage = SqliteStorage(temp_dir / "bot.db")
+    storage.load_stats()
+    storage.save_stats({
+        "unique_users": [1, 2],
+        "total_messages": 5,
+        "commands_per_user": {"1": 3},
+        "peak_usage": {"10": 2},
+        "daily_active_users": {"2024-09-01": [1, 2]},
+    })
+    storage.save_stats({
+        "unique_users": [1, 2, 3],
+        "total_messages": 6,
+        "commands_per_user": {"1": 4, "3": 1},
+        "peak_usage": {"10": 3},
+        "daily_active_users": {"2024-09-02": [3]},
+    })
+    storage.close()
+
+    data = SqliteStorage(temp_dir / "bot.db").load_stats()
+    assert sorted(data["unique_users"]) == [1, 2, 3]
+    assert data["total_messages"] == 6
+    assert data["commands_per_user"] == {"1": 4, "3": 1}
+    assert data["peak_usage"] == {"10": 3}
+    assert data["daily_active_users"] == {"2024-09-02": [3]}
+
+
+def test_sqlite_period_sets_are_rows(temp_dir):
+    storage = SqliteStorage(temp_dir / "bot.db")
+    storage.load_stats()
+    storage.save_stats({
+        "weekly_active_users": {"2024-W35": [1, 2]},
+        "monthly_active_users": {"2024-09": [1, 2]},
+        "activity_rollups": {"daily": {"2024-08-01": 7}, "weekly": {}, "monthly": {"2024-08": 9}},
+    })
+
+    statements = []
+    storage._conn.set_trace_callback(statements.append)
+    storage.save_stats({
+        "weekly_active_users": {"2024-W36": [3]},
+        "monthly_active_users": {"2024-09": [1, 2, 3]},
+        "activity_rollups": {"daily": {"2024-08-01": 7}, "weekly": {"2024-W35": 2}, "monthly": {"2024-08": 9}},
+    })
+    storage._conn.set_trace_callback(None)
+    # в базу уходят только новые строки, целые документы не переписываются
+    assert not any("INTO kv" in sql for sql in statements)
+    assert sum("INTO monthly_activity" in sql for sql in statements) == 1
+    assert sum("INTO activity_rollups" in sql for sql in statements) == 1
+    storage.close()
+
+    data = SqliteStorage(temp_dir / "bot.db").load_stats()
+    assert data["weekly_active_users"] == {"2024-W36": [3]}
+    assert sorted(data["monthly_active_users"]["2024-09"]) == [1, 2, 3]
+    assert data["activity_rollups"] == {
+        "daily": {"2024-08-01": 7}, "weekly": {"2024-W35": 2}, "monthly": {"2024-08": 9},
+    }
+
+
+def test_sqlite_moves_legacy_kv_periods_to_tables(temp_dir):
+    storage = SqliteStorage(temp_dir / "bot.db")
+    with storage._conn:
+        storage._conn.executemany("INSERT INTO kv (key, value) VALUES (?, ?)", [
+            ("weekly_active_users", json.dumps({"2024-W35": [1]})),
+            ("activity_rollups", json.dumps({"daily": {}, "weekly": {"2024-W34": 4}, "monthly": {}})),
+        ])
+    storage.close()
+
+    storage = SqliteStorage(temp_dir / "bot.db")
+    assert storage._conn.execute("SELECT key FROM kv").fetchall() == []
+    data = storage.load_stats()
+    assert data["weekly_active_users"] == {"2024-W35": [1]}
+    assert data["activity_rollups"]["weekly"] == {"2024-W34": 4}
+    storage.close()
+
+
+def test_migrate_from_json(temp_dir):
+    users_file = temp_dir / "allowed_users.json"
+    stats_file = temp_dir / "stats.json"
+    users_file.write_text(json.dumps({"users": {"5": {"role": "user", "username": "x"}}}), encoding="utf-8")
+    stats_file.write_text(json.dumps({"unique_users": [5], "errors": 1}), encoding="utf-8")
+
+    assert migrate_from_json(users_file, stats_file, temp_dir / "bot.db") == (1, True)
+
+    storage = SqliteStorage(temp_dir / "bot.db")
+    assert storage.get_user(5)["username"] == "x"
+    assert storage.load_stats()["errors"] == 1
+    storage.close()
@@ -0,0 +1,83 @@
+import pytest
+from scr.parsers import teacher_crawler as crawler_module
+from scr.parsers.search_index import TeacherPairsIndex
+from scr.parsers.teacher_crawler import TeacherCrawler
+
+
+def pairs(day, info, week="1"):
+    return {day: {week: [{"time": "09:40-11:10", "info": info}]}}
+
+
+def test_index_updates_one_teacher_at_a_time():
+    index = TeacherPairsIndex()
+    index.update_teacher("1", "Иванов Пётр", pairs("Среда", "Физика\nБПИ21-01\nкаб. 301 корп. Л"))
+    index.update_teacher("2", "Смирнова Анна", pairs("Среда", "История"))
+
+    [hit] = index.search("иванов среда")
+    assert (hit["name"], hit["week"], hit["day"], hit["time"], hit["room"]) == (
+        "Иванов Пётр", "1", "Среда", "09:40-11:10", "каб. 301 корп. Л",
+    )
+
+    index.update_teacher("1", "Иванов Пётр", pairs("Пятница", "Механика", week="2"))
+    assert index.search("иванов среда") == []
+    assert index.search("иванов пятница")[0]["week"] == "2"
+    # токены, которые больше нигде не встречаются, уходят из словаря
+    assert "физика" not in index.tokens
+    assert index.tokens == sorted(index.tokens)
+    assert len(index.search("среда")) == 1
+
+    # повторная загрузка тех же пар не меняет версию (и кэши поиска остаются)
+    version = index.version
+    assert not index.update_teacher("1", "Иванов Пётр", pairs("Пятница", "Механика", week="2"))
+    assert index.version == version
+
+
+@pytest.mark.asyncio
+async def test_crawl_refreshes_stale_pages_and_keeps_old_on_error(monkeypatch):
+    teachers = {"1": {"name": "Иванов Пётр"}, "2": {"name": "Смирнова Анна"}}
+    fetched = []
+    failing = set()
+
+    async def fetch_teachers(application):
+        return teachers
+
+    async def fetch_pairs(teacher_id, raise_errors=False):
+        fetched.append(teacher_id)
+        if teacher_id in failing:
+            raise RuntimeError("pallada недоступна")
+        return pairs("Среда", f"Предмет {teacher_id}")
+
+    monkeypatch.setattr(crawler_module, "fetch_teachers", fetch_teachers)
+    monkeypatch.setattr(crawler_module, "fetch_pairs_for_teacher", fetch_pairs)
+    monkeypatch.setattr(crawler_module, "teachers_cache", teachers)
+
+    crawler = TeacherCrawler(index=TeacherPairsIndex(), interval=3600, delay=0)
+    assert await crawler.crawl_once(None) == 2
+    # страницы свежие — повторный обход ничего не загружает
+    assert await crawler.crawl_once(None) == 0
+    assert sorted(fetched) == ["1", "2"]
+
+    failing.add("1")
+    assert await crawler.refresh("1", "Иванов Пётр") is None
+    assert crawler.index.search("иванов")[0]["info"] == "Предмет 1"
+
+
+
+@pytest.mark.asyncio
+async def test_background_crawl_is_cancelled_on_stop(monkeypatch):
+    import asyncio
+    crawler = TeacherCrawler(index=TeacherPairsIndex(), interval=3600, delay=0)
+
+    async def crawl_once(application):
+        return 0
+
+    monkeypatch.setattr(crawler, "crawl_once", crawl_once)
+    monkeypatch.setattr(crawler_module, "teacher_crawler", crawler)
+    crawler_module.start_teacher_crawler(None)
+    task = crawler.task
+    await asyncio.sleep(0)
+
+    crawler.stop()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert crawler.task is None
@@ -0,0 +1,58 @@
+import httpx
+import pytest
+from scr.parsers import telemetry
+from scr.parsers.telemetry import timed_get, finish_fetch, recent_fetches
+
+
+@pytest.fixture(autouse=True)
+def clean_log():
+    telemetry.fetch_logs.clear()
+    telemetry._last_alerts.clear()
+    yield
+    telemetry.fetch_logs.clear()
+
+
+@pytest.mark.asyncio
+async def test_timed_get_records_fetch():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"x" * 2048))
+    async with httpx.AsyncClient(transport=transport) as client:
+        response, record = await timed_get(client, "http://localhost/timetable", "schedule")
+
+    assert response.status_code == 200
+    assert record["status"] == 200
+    assert record["bytes"] == 2048
+    assert record["total_ms"] >= 0
+    assert recent_fetches("schedule") == [record]
+
+
+def test_finish_fetch_alerts_on_size_jump_once():
+    def fetch(size):
+        record = {"target": "schedule", "url": "u", "bytes": size, "parse_ms": None, "lessons": None}
+        telemetry.log_fetch(record)
+        return finish_fetch(record, 0.01, 40)
+
+    for _ in range(5):
+        assert fetch(10_000) == []
+    assert len(fetch(3_000)) == 1
+    # повтор в пределах ALERT_COOLDOWN не дублируется
+    assert fetch(3_000) == []
+
+
+def test_crawl_does_not_flush_schedule_history(monkeypatch):
+    monkeypatch.setattr(telemetry, "FETCH_TELEMETRY_SIZE", 10)
+
+    def fetch(target, url, size):
+        record = {"target": target, "url": url, "bytes": size, "parse_ms": None, "lessons": None}
+        telemetry.log_fetch(record)
+        return finish_fetch(record, 0.01, 40)
+
+    for _ in range(5):
+        fetch("schedule", "u", 10_000)
+    # обход преподавателей: больше загрузок, чем помещается в буфер
+    for i in range(30):
+        fetch("teacher_pairs", f"t{i}", 5_000)
+
+    assert len(recent_fetches("schedule")) == 5
+    assert len(recent_fetches("teacher_pairs")) == 10
+    assert [r["target"] for r in recent_fetches()][:5] == ["schedule"] * 5
+    assert len(fetch("schedule", "u", 3_000)) == 1
@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import MagicMock
+from scr.bot import bot_app
+from scr.core import settings
+
+
+def test_webhook_options_from_settings(monkeypatch):
+    monkeypatch.setattr(bot_app, "WEBHOOK_URL", "https://bot.example.com:8443/")
+    monkeypatch.setattr(bot_app, "WEBHOOK_PATH", "/hook/")
+    monkeypatch.setattr(bot_app, "WEBHOOK_SECRET", "")
+    monkeypatch.setattr(bot_app, "resolve_ssl_files", lambda: ("cert.crt", "key.key"))
+
+    options = bot_app.webhook_options()
+    assert options["url_path"] == "hook"
+    assert options["webhook_url"] == "https://bot.example.com:8443/hook"
+    assert (options["cert"], options["key"]) == ("cert.crt", "key.key")
+    # без WEBHOOK_SECRET секрет генерируется заново при каждом запуске
+    assert len(options["secret_token"]) >= 32
+    assert bot_app.webhook_options()["secret_token"] != options["secret_token"]
+
+
+def test_webhook_options_secret_and_defaults(monkeypatch):
+    monkeypatch.setattr(bot_app, "WEBHOOK_URL", "https://bot.example.com")
+    monkeypatch.setattr(bot_app, "WEBHOOK_PATH", "/")
+    monkeypatch.setattr(bot_app, "WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setattr(bot_app, "resolve_ssl_files", lambda: None)
+
+    options = bot_app.webhook_options()
+    assert options["secret_token"] == "s3cret"
+    assert options["url_path"] == "telegram"
+    assert options["webhook_url"] == "https://bot.example.com/telegram"
+    assert "cert" not in options and "key" not in options
+
+
+def test_resolve_ssl_files_relative_to_cwd(temp_dir, monkeypatch):
+    monkeypatch.chdir(temp_dir)
+    monkeypatch.setattr(settings, "SSL_CERT", "cert.crt")
+    monkeypatch.setattr(settings, "SSL_KEY", "key.key")
+    (temp_dir / "cert.crt").write_text("cert")
+    # нет ключа — SSL не используется
+    assert settings.resolve_ssl_files() is None
+
+    (temp_dir / "key.key").write_text("key")
+    assert settings.resolve_ssl_files() == (str(temp_dir / "cert.crt"), str(temp_dir / "key.key"))
+
+
+@pytest.fixture
+def fake_application(temp_dir, monkeypatch):
+    """run_bot без сети: ApplicationBuilder возвращает мок приложения"""
+    monkeypatch.chdir(temp_dir)  # .restart_flag ищется в текущем каталоге
+    monkeypatch.setattr(bot_app, "TOKEN", "123:ABC")
+    monkeypatch.setattr(bot_app, "bot_app", None)
+    application = MagicMock()
+    builder = MagicMock()
+    for method in ("token", "post_init", "post_shutdown", "request"):
+        getattr(builder, method).return_value = builder
+    builder.build.return_value = application
+    monkeypatch.setattr(bot_app, "ApplicationBuilder", lambda: builder)
+    monkeypatch.setattr(bot_app, "OutboxRequest", MagicMock())
+    monkeypatch.setattr(bot_app, "configure_concurrency", lambda b: b)
+    monkeypatch.setattr(bot_app, "register_flood_guard", lambda app: None)
+    monkeypatch.setattr(bot_app, "instrument_handlers", lambda app: None)
+    return application
+
+
+def test_run_bot_webhook_mode(fake_application, monkeypatch):
+    monkeypatch.setattr(bot_app, "BOT_MODE", "webhook")
+    monkeypatch.setattr(bot_app, "WEBHOOK_URL", "https://bot.example.com")
+    monkeypatch.setattr(bot_app, "WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setattr(bot_app, "resolve_ssl_files", lambda: None)
+
+    bot_app.run_bot()
+
+    fake_application.run_polling.assert_not_called()
+    options = fake_application.run_webhook.call_args[1]
+    assert options["secret_token"] == "s3cret"
+    assert options["webhook_url"].startswith("https://bot.example.com/")
+
+
+def test_run_bot_polling_mode(fake_application, monkeypatch):
+    monkeypatch.setattr(bot_app, "BOT_MODE", "polling")
+
+    bot_app.run_bot()
+
+    fake_application.run_polling.assert_called_once_with()
+    fake_application.run_webhook.assert_not_called()
+
+
+def test_run_bot_webhook_without_url_exits(fake_application, monkeypatch):
+    monkeypatch.setattr(bot_app, "BOT_MODE", "webhook")
+    monkeypatch.setattr(bot_app, "WEBHOOK_URL", "")
+    builder_called = []
+    monkeypatch.setattr(bot_app, "ApplicationBuilder", lambda: builder_called.append(True))
+
+    with pytest.raises(SystemExit) as exit_info:
+        bot_app.run_bot()
+
+    assert exit_info.value.code == 1
+    assert builder_called == []
@@ -0,0 +1,95 @@
+import time
+import pytest
+from scr.bot import welcome
+from scr.bot.welcome import WelcomeBoard, render_welcome
+
+SCHEDULE = {"week_1": {"Среда": [
+    {"time": "08:00-09:30", "info": "*Математика*\nЛекция", "subgroup": None, "classroom": "каб. 301"},
+    {"time": "10:15-11:45", "info": "*Физика*", "subgroup": "1️⃣ подгруппа", "classroom": None},
+]}}
+
+
+@pytest.fixture(autouse=True)
+def wednesday(monkeypatch):
+    monkeypatch.setattr(welcome, "get_current_week_and_day", lambda: ("01.10.2025", "Среда", "week_1"))
+
+
+def test_render_welcome_now_and_next():
+    text = render_welcome(SCHEDULE, 8 * 60 + 30)
+    assert text.startswith("⏱️ Сегодня: 01.10.2025, Среда, 1-ая неделя.")
+    assert "🎓 Сейчас идёт: *Математика*\n⏳ До конца: *1 ч 0 мин*\n📍 каб. 301" in text
+    assert "🔜 Следующая пара через *1 ч 45 мин*:\n📚 *Физика*\n🔸 1️⃣ подгруппа" in text
+
+    assert "🔚 Сегодня больше пар нет." in render_welcome(SCHEDULE, 12 * 60)
+
+
+@pytest.mark.asyncio
+async def test_board_serves_published_header_until_minute_or_version_changes(monkeypatch):
+    fetches = []
+
+    async def fetch_schedule(application):
+        fetches.append(application)
+        return SCHEDULE
+
+    monkeypatch.setattr(welcome, "fetch_schedule", fetch_schedule)
+    monkeypatch.setattr(welcome.schedule_parser, "schedule_version", 30_001)
+    board = WelcomeBoard()
+
+    first = await board.get(None)
+    header = board.header
+    assert header.expires > time.time()
+    # в пределах минуты — тот же объект текста, без загрузки и пересборки
+    assert await board.get(None) is first
+    assert len(fetches) == 1
+
+    monkeypatch.setattr(welcome.schedule_parser, "schedule_version", 30_002)
+    await board.get(None)
+    assert board.header is not header and board.header.version == 30_002
+
+    header = board.header
+    header.expires = time.time() - 1
+    await board.get(None)
+    assert board.header is not header
+    assert len(fetches) == 3
+
+
+
+@pytest.mark.asyncio
+async def test_tick_task_is_cancelled_on_stop(monkeypatch):
+    import asyncio
+    board = WelcomeBoard()
+    monkeypatch.setattr(welcome, "welcome_board", board)
+
+    async def fetch_schedule(application):
+        return SCHEDULE
+
+    monkeypatch.setattr(welcome, "fetch_schedule", fetch_schedule)
+    welcome.start_welcome_board(None)
+    task = board.task
+    await asyncio.sleep(0)
+    assert board.header is not None
+
+    board.stop()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert board.task is None
+
+
+
+@pytest.mark.asyncio
+async def test_tick_reads_cache_without_fetch(monkeypatch):
+    import asyncio
+    board = WelcomeBoard()
+    fetches = []
+
+    async def fetch_schedule(application):
+        fetches.append(application)
+        return SCHEDULE
+
+    monkeypatch.setattr(welcome, "fetch_schedule", fetch_schedule)
+    monkeypatch.setattr(welcome, "schedule_cache", SCHEDULE)
+    task = asyncio.create_task(board.run(None))
+    await asyncio.sleep(0)
+    task.cancel()
+
+    assert board.header is not None and fetches == []